@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import User, ProfilingSession
+from . import profiling
 
 # Register your models here.
 
@@ -14,4 +19,49 @@ class UserAdmin(BaseUserAdmin):
                 "fields": ("username", "usable_password", "password1", "password2", 'email', 'first_name', 'last_name'),
             },
         ),
-   )
\ No newline at end of file
+   )
+
+@admin.register(ProfilingSession)
+class ProfilingSessionAdmin(admin.ModelAdmin):
+    """
+    Admin for the live-traffic profiling sessions (see core.profiling).
+
+    The change page shows the signed X-Profile header to force profiling of a request and
+    links to the collapsed stacks of the session, overall and per view, ready for
+    flamegraph.pl or speedscope.
+    """
+    list_display = ['name', 'view_name', 'sample_rate', 'active', 'requests_profiled', 'max_requests', 'created_at']
+    list_filter = ['active']
+    readonly_fields = ['requests_profiled', 'created_at', 'signed_header', 'downloads']
+
+    def get_urls(self):
+        urls = [
+            path('<int:pk>/collapsed/', self.admin_site.admin_view(self.collapsed_view), name='core_profilingsession_collapsed'),
+        ]
+        return urls + super().get_urls()
+
+    def collapsed_view(self, request, pk):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        session = get_object_or_404(ProfilingSession, pk=pk)
+        view_name = request.GET.get('view')
+        response = HttpResponse(profiling.collapsed_stacks(session, view_name), content_type='text/plain; charset=utf-8')
+        filename = f"profile-{session.pk}{'-' + view_name if view_name else ''}.collapsed.txt"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.display(description='X-Profile header')
+    def signed_header(self, obj):
+        return profiling.signed_header(obj) if obj.pk else '-'
+
+    @admin.display(description='Collapsed stacks')
+    def downloads(self, obj):
+        if not obj.pk:
+            return '-'
+        url = reverse('admin:core_profilingsession_collapsed', args=[obj.pk])
+        view_names = obj.requests.values_list('view_name', flat=True).distinct().order_by('view_name')
+        return format_html(
+            '<a href="{}">All views</a><br>{}',
+            url,
+            format_html_join('<br>', '<a href="{}?view={}">{}</a>', ((url, view_name, view_name) for view_name in view_names)),
+        )
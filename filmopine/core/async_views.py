@@ -0,0 +1,156 @@
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import SynchronousOnlyOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import aauthenticate
+from .renderers import FastJSONRenderer
+
+async def aget_content_type(model):
+    """
+    ContentType.objects.get_for_model() for async code. The content types are cached per
+    process, so only the first call of a worker has to query the database (in a thread).
+    """
+    try:
+        return ContentType.objects.get_for_model(model)
+    except SynchronousOnlyOperation:
+        return await sync_to_async(ContentType.objects.get_for_model)(model)
+
+async def apaginate_queryset(paginator, queryset, request):
+    """
+    Async version of PageNumberPagination.paginate_queryset(): same pages, same errors,
+    with the count and page queries run by the async ORM.
+
+    Args:
+        paginator (PageNumberPagination): The pagination of the endpoint, left ready for
+            get_paginated_response() as after a sync call.
+        queryset (QuerySet): The (ordered) queryset to paginate.
+        request (Request): The DRF request.
+
+    Returns:
+        list: The rows of the page, or None if pagination is turned off.
+
+    Raises:
+        NotFound: The page does not exist.
+    """
+    paginator.request = request
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount() # Paginator.count is a cached property, preset it
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        paginator.page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+    if django_paginator.num_pages > 1 and paginator.template is not None:
+        paginator.display_page_controls = True
+    return [row async for row in paginator.page.object_list]
+
+def check_permissions(request, permission_classes):
+    for permission in [permission_class() for permission_class in permission_classes]:
+        if not permission.has_permission(request, None):
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(detail=getattr(permission, 'message', None), code=getattr(permission, 'code', None))
+
+def check_throttles(request):
+    """
+    Apply the DRF throttles. The token buckets live in the cache, whose async API is a
+    thread wrapper around the sync one, so they are checked inline.
+    """
+    durations = [
+        throttle.wait() for throttle in [throttle_class() for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES]
+        if not throttle.allow_request(request, None)
+    ]
+    if durations:
+        raise exceptions.Throttled(wait=max([duration for duration in durations if duration is not None], default=None))
+
+def handle_exception(exc, request):
+    """
+    Turn an exception into an error response like APIView.handle_exception(), or return
+    None if it must propagate.
+    """
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = JWTAuthentication().authenticate_header(request)
+    response = api_settings.EXCEPTION_HANDLER(exc, {'view': None, 'args': (), 'kwargs': {}, 'request': request})
+    if response is not None:
+        response.exception = True
+    return response
+
+def render_response(response):
+    """
+    Render a DRF Response as JSON, with the same body and headers as the sync views.
+    Responses rendered by the handler already (e.g. from the catalog snapshot) only get
+    their Vary header.
+    """
+    if not isinstance(response, Response):
+        patch_vary_headers(response, ('Accept',))
+        return response
+    content = FastJSONRenderer().render(response.data) if response.data is not None else b''
+    rendered = HttpResponse(content, status=response.status_code, content_type=FastJSONRenderer.media_type)
+    for name, value in response.items():
+        if name.lower() != 'content-type':
+            rendered[name] = value
+    patch_vary_headers(rendered, ('Accept',))
+    return rendered
+
+def async_read_view(handler, sync_view):
+    """
+    Serve the reads of an endpoint with an async handler when running under ASGI.
+
+    Under ASGI, a sync DRF view runs in a thread (sync_to_async), so every concurrent read
+    holds a thread for the whole duration of its queries. The async handler instead awaits
+    the async ORM on the event loop. The JWT is checked and the user loaded by
+    aauthenticate(), then the permissions and throttles of the endpoint are applied and the
+    handler's Response is rendered to JSON, producing the same output as the sync view.
+
+    Every other request goes to the sync view, in a thread: unsafe methods, OPTIONS, the
+    browsable API (Accept: text/html), and all requests served through WSGI.
+
+    Args:
+        handler (coroutine function): `handler(request, *args, **kwargs)`, called with an
+            authenticated DRF Request and returning a Response.
+        sync_view (callable): The regular view of the endpoint (from `as_view()`), whose
+            permission classes are applied to the async reads as well.
+
+    Returns:
+        coroutine function: The view to route the endpoint to. Its `sync_view` attribute is
+            the sync view, for in-process callers such as core.composite.
+    """
+    fallback = sync_to_async(sync_view)
+    permission_classes = sync_view.cls.permission_classes
+
+    async def view(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or not isinstance(request, ASGIRequest)
+            or 'text/html' in request.headers.get('Accept', '')
+        ):
+            return await fallback(request, *args, **kwargs)
+
+        drf_request = Request(request)
+        try:
+            drf_request.user, drf_request.auth = await aauthenticate(request)
+            check_permissions(drf_request, permission_classes)
+            check_throttles(drf_request)
+            response = await handler(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = handle_exception(exc, drf_request)
+            if response is None:
+                raise
+        return render_response(response)
+
+    view.sync_view = sync_view
+    view.csrf_exempt = True # As DRF views: JWT authentication is not cookie based
+    return view
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+def token_user_id(request):
+    """
+    Return the user ID carried by a valid JWT in the request's Authorization header.
+
+    Unlike DRF authentication, this runs outside of views (e.g. in middleware) and never
+    hits the database: the token signature and expiry are checked, but the user is not loaded.
+
+    Args:
+        request (HttpRequest): The Django request.
+
+    Returns:
+        The user ID claim of the token, or None for anonymous requests and invalid tokens.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+async def aauthenticate(request):
+    """
+    Authenticate a request by its JWT without blocking the event loop, for the async read
+    views (see core.async_views).
+
+    Performs the same checks as JWTAuthentication: the token is validated in place (CPU
+    only) and the user is loaded with the async ORM.
+
+    Args:
+        request (HttpRequest): The Django request.
+
+    Returns:
+        tuple: (user, validated token), or (AnonymousUser, None) without an Authorization header.
+
+    Raises:
+        AuthenticationFailed: The token is invalid or its user is unknown or inactive.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return AnonymousUser(), None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return AnonymousUser(), None
+    token = authentication.get_validated_token(raw_token)
+
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    try:
+        user = await authentication.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+    except authentication.user_model.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if api_settings.CHECK_REVOKE_TOKEN and token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+    return user, token
+
+def user_state_key(user_id):
+    return f"jwt-user-active:{user_id}"
+
+def forget_user_state(user_id):
+    cache.delete(user_state_key(user_id))
+
+def user_is_active(user_id):
+    """
+    Whether the user with this ID exists and is active, cached for JWT_USER_STATE_CACHE_SECONDS.
+
+    The cache entry is dropped whenever the user is saved or deleted (see core.signals).
+    """
+    key = user_state_key(user_id)
+    active = cache.get(key)
+    if active is None:
+        active = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}, is_active=True).exists()
+        cache.set(key, active, timeout=settings.JWT_USER_STATE_CACHE_SECONDS)
+    return active
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer (`/auth/jwt/refresh/`) that also refuses the refresh tokens of
+    deleted and deactivated users.
+
+    simplejwt only checks the signature and expiry of the refresh token, so an account
+    that is switched off keeps getting access tokens for the whole refresh lifetime. The
+    check is answered from the cache (see user_is_active), so in steady state the refresh
+    path still makes no database query.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not user_is_active(user_id):
+            raise AuthenticationFailed("User is inactive or does not exist.", code='user_inactive')
+        return super().validate(attrs)
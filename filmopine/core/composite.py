@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+def error_body(detail):
+    return json.dumps({'detail': detail}).encode()
+
+def build_subrequest(request, path, query_string):
+    """
+    Build an in-process GET request for a sub-request of a composite request.
+
+    The sub-request carries the headers and cookies of the outer request and the user it
+    was authenticated as (`_force_auth_user`), so DRF does not decode the JWT again.
+
+    Args:
+        request (Request): The outer (DRF) request, already authenticated.
+        path (str): Path of the sub-request.
+        query_string (str): Its query string.
+
+    Returns:
+        HttpRequest: The sub-request.
+    """
+    outer = request._request
+    subrequest = HttpRequest()
+    subrequest.method = 'GET'
+    subrequest.path = subrequest.path_info = path
+    subrequest.META = {
+        **outer.META,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'CONTENT_LENGTH': '0',
+        'HTTP_ACCEPT': 'application/json',
+    }
+    subrequest.META.pop('CONTENT_TYPE', None)
+    subrequest.GET = QueryDict(query_string)
+    subrequest.COOKIES = outer.COOKIES
+    subrequest._stream = io.BytesIO()
+    subrequest._read_started = False
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+def execute(request, path):
+    """
+    Run one sub-request by calling the view its path resolves to.
+
+    Only GET requests to API views are allowed: the composite view itself, async views
+    (e.g. event streams) and streaming responses are refused, and bodies larger than
+    COMPOSITE_MAX_RESPONSE_BYTES are replaced by an error.
+
+    Returns:
+        tuple: (status code, JSON body as bytes).
+    """
+    path, _, query_string = path.partition('?')
+    if not path.startswith('/api/'):
+        return 400, error_body("Only /api/ paths can be requested.")
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return 404, error_body("Not found.")
+    view = getattr(match.func, 'sync_view', match.func) # Async read views (core.async_views) are called through their sync view
+    if getattr(getattr(view, 'view_class', None), 'composite', False) or asyncio.iscoroutinefunction(view):
+        return 400, error_body("This endpoint cannot be part of a composite request.")
+
+    subrequest = build_subrequest(request, path, query_string)
+    subrequest.resolver_match = match
+    try:
+        response = view(subrequest, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+    except Exception:
+        # Reported the way Django reports the exceptions of a request (error logs, Sentry, ...)
+        logger.exception("Composite sub-request failed: GET %s", path, extra={'status_code': 500, 'request': subrequest})
+        got_request_exception.send(sender=None, request=subrequest)
+        return 500, error_body("Server error.")
+
+    if response.streaming:
+        return 400, error_body("Streaming endpoints cannot be part of a composite request.")
+    if len(response.content) > settings.COMPOSITE_MAX_RESPONSE_BYTES:
+        return 413, error_body("Response too large for a composite request.")
+    if not response.content:
+        return response.status_code, b'null'
+    if not response.get('Content-Type', '').startswith('application/json'):
+        return response.status_code, json.dumps(response.content.decode(errors='replace')).encode()
+    return response.status_code, response.content
+
+def execute_in_thread(request, path, context):
+    """
+    Run a sub-request in a worker thread, in a copy of the caller's context (e.g. the
+    replica routing decision), closing the thread's database connections afterwards.
+    """
+    try:
+        return context.copy().run(execute, request, path)
+    finally:
+        connections.close_all()
+
+def execute_all(request, items, parallel=False):
+    """
+    Run the sub-requests of a composite request and render the combined response body.
+
+    Sequentially, every sub-request shares the database connection of the request. With
+    `parallel`, they run in up to COMPOSITE_MAX_WORKERS threads, each using its own
+    connection, which pays off when the sub-requests are slow and independent.
+
+    Args:
+        request (Request): The outer request.
+        items (list): Dicts with the `id` and `path` of each sub-request.
+        parallel (bool): Run the sub-requests concurrently.
+
+    Returns:
+        bytes: `{"responses": [{"id": ..., "status": ..., "body": ...}, ...]}`, with the
+            already rendered sub-response bodies embedded as they are.
+    """
+    paths = [item['path'] for item in items]
+    if parallel and len(paths) > 1 and settings.COMPOSITE_MAX_WORKERS > 1:
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(len(paths), settings.COMPOSITE_MAX_WORKERS)) as executor:
+            results = list(executor.map(lambda path: execute_in_thread(request, path, context), paths))
+    else:
+        results = [execute(request, path) for path in paths]
+
+    entries = [
+        b'{"id":%s,"status":%d,"body":%s}' % (json.dumps(item['id']).encode(), status, body)
+        for item, (status, body) in zip(items, results)
+    ]
+    return b'{"responses":[' + b','.join(entries) + b']}'
@@ -0,0 +1,163 @@
+import threading
+import time
+import zlib
+from collections import defaultdict
+from . import metrics
+
+try:
+    import brotli
+except ImportError: # brotli is optional, only gzip is offered without it
+    brotli = None
+
+class GzipCompressor:
+    """
+    Incremental gzip compressor (same interface as brotli.Compressor).
+    """
+
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+def available_encodings():
+    """
+    Supported content codings, in order of preference.
+    """
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def get_compressor(encoding, gzip_level, brotli_quality):
+    if encoding == 'br':
+        return brotli.Compressor(mode=brotli.MODE_TEXT, quality=brotli_quality)
+    return GzipCompressor(gzip_level)
+
+def negotiate_encoding(accept_encoding, supported=None):
+    """
+    Pick the content coding to use from an Accept-Encoding header.
+
+    The codings with the highest q-value win, ties are broken by server preference
+    (brotli, then gzip). A `*` entry applies to every coding not listed explicitly, and
+    `q=0` excludes a coding.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding request header.
+        supported (iterable, optional): Codings the server can produce. Defaults to
+            available_encodings().
+
+    Returns:
+        str or None: 'br', 'gzip' or None to send the response uncompressed.
+    """
+    supported = available_encodings() if supported is None else tuple(supported)
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class CompressionStats:
+    """
+    Per-endpoint compression counters of this worker process, exposed through core.metrics.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = defaultdict(lambda: {
+            'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'bytes_saved': 0, 'cpu_ms': 0.0, 'encodings': defaultdict(int),
+        })
+
+    def record(self, endpoint, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self.lock:
+            stats = self.endpoints[endpoint]
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['bytes_saved'] += bytes_in - bytes_out
+            stats['cpu_ms'] += cpu_seconds * 1000
+            stats['encodings'][encoding] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                endpoint: {**stats, 'cpu_ms': round(stats['cpu_ms'], 3), 'encodings': dict(stats['encodings'])}
+                for endpoint, stats in sorted(self.endpoints.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+stats = CompressionStats()
+metrics.register('compression', stats.snapshot)
+
+class CompressedStream:
+    """
+    Compress a streaming response chunk by chunk.
+
+    Every chunk is flushed so the client receives data as soon as the view produces it,
+    and the statistics are recorded once the stream is exhausted (or closed early).
+    Wraps both sync and async iterators.
+    """
+
+    def __init__(self, compressor, endpoint, encoding):
+        self.compressor = compressor
+        self.endpoint = endpoint
+        self.encoding = encoding
+        self.bytes_in = self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, chunk, last=False):
+        started = time.thread_time()
+        if last:
+            data = self.compressor.finish()
+        else:
+            self.bytes_in += len(chunk)
+            data = self.compressor.process(chunk) + self.compressor.flush()
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_out += len(data)
+        return data
+
+    def record(self):
+        stats.record(self.endpoint, self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+
+    def wrap(self, chunks):
+        try:
+            for chunk in chunks:
+                data = self.compress(chunk)
+                if data:
+                    yield data
+            yield self.compress(b'', last=True)
+        finally:
+            self.record()
+
+    async def awrap(self, chunks):
+        try:
+            async for chunk in chunks:
+                data = self.compress(chunk)
+                if data:
+                    yield data
+            yield self.compress(b'', last=True)
+        finally:
+            self.record()
@@ -0,0 +1,67 @@
+"""
+MySQL database backend drawing its connections from a process-wide, bounded pool.
+
+Use it for threaded (gunicorn gthread) or ASGI workers, where Django's per-thread
+persistent connections (CONN_MAX_AGE) would otherwise open one MySQL connection per
+thread. Set CONN_MAX_AGE to 0 with this backend: closing a connection at the end of a
+request only hands it back to the pool. Pool options are read from the "POOL" key of
+the database settings:
+
+    'POOL': {
+        'MAX_SIZE': 10,       # connections open at once per process
+        'TIMEOUT': 5,         # seconds to wait for a free connection
+        'MAX_IDLE_TIME': 300, # idle connections older than this are reopened
+    }
+"""
+import threading
+from django.db.backends.mysql import base as mysql_base
+from core import metrics
+from core.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def ping(connection):
+    connection.ping()
+
+def reset(connection):
+    connection.rollback() # End any transaction left open by the request
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+
+    def get_pool(self, conn_params):
+        with _pools_lock:
+            pool = _pools.get(self.alias)
+            if pool is None:
+                options = self.settings_dict.get('POOL', {})
+                pool = ConnectionPool(
+                    connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5),
+                    max_idle_time=options.get('MAX_IDLE_TIME', 300),
+                    ping=ping,
+                    reset=reset,
+                )
+                _pools[self.alias] = pool
+                metrics.register(f'db_pool.{self.alias}', pool.stats)
+            return pool
+
+    def get_new_connection(self, conn_params):
+        return self.get_pool(conn_params).acquire()
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                _pools[self.alias].release(self.connection, discard=self.errors_occurred)
+
+    def close_pool(self):
+        """
+        Close this alias' pool, so that a process about to fork (e.g. a gunicorn master
+        preloading the app, see core.warmup) does not share pooled sockets with its children.
+        The next connection opens a new pool.
+        """
+        self.close()
+        with _pools_lock:
+            pool = _pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close_all()
@@ -0,0 +1,156 @@
+import collections
+import logging
+import threading
+import time
+from django.db import OperationalError
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(OperationalError):
+    """
+    Raised when no pooled connection became available within the pool timeout.
+    """
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of raw DB-API connections.
+
+    At most `max_size` connections are open at once. Idle connections are handed out
+    most-recently-used first and checked with `ping` before reuse (pre-ping), so a
+    connection dropped by the server is replaced transparently. A caller finding the
+    pool exhausted waits up to `timeout` seconds before PoolTimeout is raised.
+
+    Attributes:
+        waits (int): Number of acquisitions that had to wait for a connection.
+        timeouts (int): Number of acquisitions that gave up waiting.
+        created (int): Number of connections opened.
+        discarded (int): Number of connections closed because they were broken or too old.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=5, ping=None, reset=None, max_idle_time=None):
+        """
+        Args:
+            connect (callable): Opens and returns a new connection.
+            max_size (int): Maximum number of connections open at once.
+            timeout (float): Seconds to wait for a connection when the pool is exhausted.
+            ping (callable, optional): Raises if the given connection is no longer usable.
+            reset (callable, optional): Cleans up a connection before it goes back to the pool
+                (e.g. rolls back an unfinished transaction). Raising discards the connection.
+            max_idle_time (float, optional): Idle connections older than this are closed instead of reused.
+        """
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping = ping
+        self.reset = reset
+        self.max_idle_time = max_idle_time
+        self.idle = collections.deque()
+        self.size = 0
+        self.in_use = 0
+        self.waits = self.timeouts = self.created = self.discarded = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Take a connection from the pool, opening one if the pool is not full.
+        """
+        deadline = None
+        with self.condition:
+            while True:
+                if self.idle:
+                    connection, released_at = self.idle.pop()
+                    break
+                if self.size < self.max_size:
+                    connection, released_at = None, None
+                    self.size += 1
+                    break
+                if deadline is None:
+                    self.waits += 1
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No database connection available within {self.timeout}s (pool size {self.max_size}).")
+                self.condition.wait(remaining)
+            self.in_use += 1
+
+        if connection is not None and not self.usable(connection, released_at):
+            self.close_quietly(connection)
+            with self.condition:
+                self.discarded += 1
+            connection = None
+
+        if connection is None:
+            try:
+                connection = self.connect()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                    self.in_use -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.created += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Give a connection back to the pool (or close it for good if `discard` is set or it cannot be reset).
+        """
+        if not discard and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+
+        if discard:
+            self.close_quietly(connection)
+        with self.condition:
+            self.in_use -= 1
+            if discard:
+                self.size -= 1
+                self.discarded += 1
+            else:
+                self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def usable(self, connection, released_at):
+        if self.max_idle_time is not None and time.monotonic() - released_at > self.max_idle_time:
+            return False
+        if self.ping is None:
+            return True
+        try:
+            self.ping(connection)
+        except Exception:
+            logger.info("Discarding a pooled database connection that failed its health check.")
+            return False
+        return True
+
+    def close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """
+        Close every idle connection (connections in use are closed when released with discard=True).
+        """
+        with self.condition:
+            idle, self.idle = self.idle, collections.deque()
+            self.size -= len(idle)
+        for connection, _ in idle:
+            self.close_quietly(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+            }
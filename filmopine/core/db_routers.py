@@ -0,0 +1,126 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set for the duration of requests that must read from the primary (see core.middleware.ReplicaRoutingMiddleware)
+use_primary = contextvars.ContextVar('use_primary', default=False)
+
+class ReplicaHealth:
+    """
+    Process-wide cache of replica health, refreshed at most every
+    REPLICA_HEALTH_CHECK_INTERVAL seconds per replica.
+
+    A replica is healthy when a connection can be opened and, on MySQL, when its
+    replication lag is below REPLICA_MAX_LAG_SECONDS.
+    """
+
+    def __init__(self):
+        self.checked_at = {}
+        self.healthy = {}
+        self.lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        if now - self.checked_at.get(alias, float('-inf')) >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            with self.lock:
+                if now - self.checked_at.get(alias, float('-inf')) >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+                    self.healthy[alias] = self.check(alias)
+                    self.checked_at[alias] = now
+        return self.healthy.get(alias, False)
+
+    def check(self, alias):
+        try:
+            connection = connections[alias]
+            connection.ensure_connection()
+            lag = self.replication_lag(connection)
+        except Exception:
+            logger.warning("Database replica %s is unreachable, reading from the primary.", alias, exc_info=True)
+            return False
+        if lag is not None and lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Database replica %s is %ss behind, reading from the primary.", alias, lag)
+            return False
+        return True
+
+    def replication_lag(self, connection):
+        """
+        Replication lag in seconds, or None when it cannot be measured (non-MySQL backends,
+        missing REPLICATION CLIENT privilege).
+        """
+        if connection.vendor != 'mysql':
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SHOW REPLICA STATUS')
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                columns = [column[0] for column in cursor.description]
+        except Exception:
+            return None
+        status = dict(zip(columns, row))
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return float('inf') if lag is None else lag # NULL means replication is stopped
+
+    def mark_unhealthy(self, alias):
+        """
+        Stop reading from a replica until its next health check.
+        """
+        with self.lock:
+            self.healthy[alias] = False
+            self.checked_at[alias] = time.monotonic()
+
+health = ReplicaHealth()
+
+def mark_failed_replicas(exception):
+    """
+    After a request failed with a connection error, take the replicas whose connection
+    raised it out of rotation, rather than sending reads to them until the next periodic
+    health check (see ReplicaRoutingMiddleware.process_exception).
+    """
+    if not isinstance(exception, (OperationalError, InterfaceError)):
+        return
+    for alias in settings.DATABASE_REPLICAS:
+        if connections[alias].errors_occurred: # Set by Django on database errors, until the connection is checked
+            logger.warning("Database replica %s failed during a request, reading from the primary.", alias)
+            health.mark_unhealthy(alias)
+
+def choose_replica():
+    """
+    Pick a healthy replica at random, weighted by DATABASE_REPLICAS, or None if there is none.
+    """
+    replicas = [(alias, weight) for alias, weight in settings.DATABASE_REPLICAS.items() if health.is_healthy(alias)]
+    if not replicas:
+        return None
+    aliases, weights = zip(*replicas)
+    return random.choices(aliases, weights=weights)[0]
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending writes to the primary and reads to the replicas.
+
+    Reads stay on the primary when:
+        - the current request is pinned to it (unsafe requests, and safe requests from a
+          client that wrote less than REPLICA_STICKY_SECONDS ago, for read-your-writes),
+        - a transaction is open on the primary (reads inside it must see its writes),
+        - no replica is configured or healthy.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return choose_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS # Replicas get the schema through replication
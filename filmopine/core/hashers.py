@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the iteration count of PASSWORD_PBKDF2_ITERATIONS.
+
+    It keeps the algorithm name of Django's hasher, so it verifies every existing hash.
+    A hash made with another iteration count is flagged by `must_update`, and Django
+    rehashes the password with the current count on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Django's Argon2id hasher (memory-hard, needs the argon2-cffi package) with the costs of
+    PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST and PASSWORD_ARGON2_PARALLELISM.
+    Hashes made with other costs are updated on login, as with TunedPBKDF2PasswordHasher.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
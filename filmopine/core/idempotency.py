@@ -0,0 +1,91 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from .renderers import FastJSONRenderer
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05 # Seconds between checks of a request in flight
+IN_FLIGHT = 'in-flight'
+
+# Responses the client is expected to retry for (with the same key) are not stored
+UNSTORED_STATUSES = {401, 403, 408, 409, 429}
+
+def get_cache():
+    return caches[settings.IDEMPOTENCY_CACHE]
+
+def invalid_key_response(key):
+    """
+    A 400 response if the key is unusable, else None.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return error_response(400, f"The {HEADER} header must be 1 to {MAX_KEY_LENGTH} characters long.")
+    return None
+
+def error_response(status, detail):
+    return HttpResponse(FastJSONRenderer().render({'detail': detail}), status=status, content_type=FastJSONRenderer.media_type)
+
+class IdempotentRequest:
+    """
+    An unsafe request carrying an Idempotency-Key header.
+
+    The first request with a key runs normally, then its response is stored in the
+    IDEMPOTENCY_CACHE for IDEMPOTENCY_TTL seconds; retries with the same key get the
+    stored response back (with `Idempotent-Replayed: true`) without reaching the view.
+    Keys are scoped per client (see core.middleware.client_key), and bound to the request
+    they were first used for: reusing one for another method, path or body is a 422.
+
+    While the first request is in flight its key holds a marker, set with an atomic
+    cache `add`, so concurrent duplicates do not run the view either: they wait up to
+    IDEMPOTENCY_WAIT seconds for the stored response, then give up with a 409.
+    Server errors and streaming responses are not stored, so the key can be retried.
+
+    The cache calls are made by the middleware (sync or async), this class only decides.
+    """
+
+    def __init__(self, request, client):
+        key = request.headers[HEADER]
+        self.cache_key = f"idempotency:{client}:{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+        fingerprint = hashlib.sha256()
+        for part in (request.method.encode(), request.get_full_path().encode(), request.body):
+            fingerprint.update(part)
+            fingerprint.update(b'\0')
+        self.fingerprint = fingerprint.hexdigest()
+
+    def in_flight_entry(self):
+        return {'fingerprint': self.fingerprint, 'status': IN_FLIGHT}
+
+    def stored_response(self, entry):
+        """
+        The response to give for the cache entry of the key: the stored response, or a 422
+        if the key was used for another request. None if there is no entry, or the first
+        request is still in flight.
+        """
+        if entry is None:
+            return None
+        if entry['fingerprint'] != self.fingerprint:
+            return error_response(422, f"This {HEADER} was already used for a different request.")
+        if entry['status'] == IN_FLIGHT:
+            return None
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for name, value in entry['headers']:
+            response[name] = value
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def conflict_response(self):
+        response = error_response(409, f"A request with this {HEADER} is still in progress.")
+        response['Retry-After'] = '1'
+        return response
+
+    def entry_for(self, response):
+        """
+        The cache entry storing `response`, or None if it must not be stored.
+        """
+        if response.streaming or response.status_code >= 500 or response.status_code in UNSTORED_STATUSES:
+            return None
+        return {
+            'fingerprint': self.fingerprint, 'status': response.status_code,
+            'headers': list(response.items()), 'content': response.content,
+        }
@@ -0,0 +1,19 @@
+import os
+import time
+import uuid
+
+def uuid7():
+    """
+    Generate a time-ordered UUID (version 7, RFC 9562): 48 bits of Unix time in
+    milliseconds followed by random bits.
+
+    Used as the default primary key of large tables. Random UUID4 keys spread inserts over
+    the whole clustered index (InnoDB), so every insert touches a different page once the
+    table outgrows the buffer pool. UUIDv7 keys are appended near the end of the index like
+    an auto-increment, while staying unguessable and exposed as regular UUIDs by the API.
+    Keys generated within the same millisecond are not ordered between themselves.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76 # Version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62 # RFC 4122 variant
+    return uuid.UUID(int=value)
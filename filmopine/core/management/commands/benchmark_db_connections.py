@@ -0,0 +1,50 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+
+class Command(BaseCommand):
+    """
+    Measure the per-request cost of opening a database connection.
+
+    Runs the same query the given number of times, first closing the connection after
+    every "request" (CONN_MAX_AGE = 0 without a pool), then keeping it open (persistent
+    connections). With the pooled backend, closing hands the connection back to the pool,
+    so the first mode measures a pool checkout instead of a new connection.
+
+    Usage:
+        python manage.py benchmark_db_connections --requests 500
+    """
+    help = 'Compare per-request latency with new, pooled and persistent database connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Number of simulated requests per mode.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--query', default='SELECT 1', help='Query run by every simulated request.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        engine = connection.settings_dict['ENGINE']
+        self.stdout.write(f"Database '{options['database']}' ({engine}), {options['requests']} requests per mode\n")
+
+        results = {}
+        for mode, close_each_time in (('close after each request', True), ('persistent connection', False)):
+            connection.close()
+            timings = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(options['query'])
+                    cursor.fetchall()
+                if close_each_time:
+                    connection.close()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[mode] = statistics.mean(timings)
+            self.stdout.write(
+                f"{mode:<28} mean {results[mode]:.3f} ms   p50 {timings[len(timings) // 2]:.3f} ms   "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+            )
+
+        saving = results['close after each request'] - results['persistent connection']
+        self.stdout.write(self.style.SUCCESS(f"\nReusing the connection saves {saving:.3f} ms per request."))
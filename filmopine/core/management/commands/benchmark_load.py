@@ -0,0 +1,140 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+class Target:
+    def __init__(self, label, url, headers):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise CommandError(f"Unsupported URL: {url}")
+        self.label = label
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Accept: application/json", *headers]
+        self.request = ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+async def read_response(reader):
+    """
+    Read one HTTP/1.1 response.
+
+    Returns:
+        tuple: (status code, whether the server keeps the connection open).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by the server")
+    status = int(status_line.split()[1])
+    length, chunked, keep_alive = 0, False, True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2) # Chunk and its CRLF
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+async def client(target, deadline, latencies, errors):
+    """
+    One simulated client: sends requests one after the other over a keep-alive connection
+    until the deadline.
+    """
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(target.host, target.port, ssl=target.ssl)
+            writer.write(target.request)
+            status, keep_alive = await read_response(reader)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            errors.append('connection')
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+async def run_level(target, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(target, deadline, latencies, errors) for _ in range(concurrency)))
+    return latencies, errors
+
+class Command(BaseCommand):
+    """
+    Load test API endpoints at increasing concurrency and report throughput and tail
+    latency, side by side for several deployments.
+
+    Meant to compare gunicorn sync workers (WSGI) with uvicorn workers serving the async
+    read views (ASGI, see core.async_views) on the same database. Every simulated client
+    sends one request at a time over its own keep-alive connection, so concurrency is the
+    number of requests in flight. The client is a single asyncio loop: run it on another
+    machine than the servers, or at least check that it is not the bottleneck.
+
+    Usage:
+        gunicorn --pythonpath filmopine -w 4 -b 127.0.0.1:8001 filmopine.wsgi
+        gunicorn --pythonpath filmopine -w 4 -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8002 filmopine.asgi
+        python manage.py benchmark_load --target wsgi=http://127.0.0.1:8001/api/movies/ \
+            --target asgi=http://127.0.0.1:8002/api/movies/ --concurrency 1,16,64,256 --duration 10
+    """
+    help = 'Measure requests/sec and p50/p95/p99 latency of HTTP endpoints at several concurrency levels.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, help="label=URL of an endpoint to load (repeatable).")
+        parser.add_argument('--concurrency', default='1,16,64', help='Comma-separated numbers of concurrent clients.')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds of load per target and concurrency level.')
+        parser.add_argument('--header', action='append', default=[], help="Extra request header, e.g. 'Authorization: JWT <token>' (repeatable).")
+
+    def handle(self, *args, **options):
+        targets = []
+        for value in options['target']:
+            label, sep, url = value.partition('=')
+            if not sep:
+                raise CommandError(f"--target must be label=URL, got {value!r}")
+            targets.append(Target(label, url, options['header']))
+        levels = [int(level) for level in options['concurrency'].split(',')]
+
+        self.stdout.write(f"{'target':<12} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for concurrency in levels:
+            for target in targets:
+                latencies, errors = asyncio.run(run_level(target, concurrency, options['duration']))
+                self.stdout.write(self.format_row(target.label, concurrency, options['duration'], latencies, errors))
+
+    def format_row(self, label, concurrency, duration, latencies, errors):
+        if len(latencies) < 2:
+            return f"{label:<12} {concurrency:>7} {len(latencies) / duration:>9.1f} {'-':>8} {'-':>8} {'-':>8} {len(errors):>7}"
+        percentiles = statistics.quantiles(latencies, n=100)
+        p50, p95, p99 = (percentiles[index] * 1000 for index in (49, 94, 98))
+        return (
+            f"{label:<12} {concurrency:>7} {len(latencies) / duration:>9.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {len(errors):>7}"
+        )
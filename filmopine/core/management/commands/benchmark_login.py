@@ -0,0 +1,98 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from core.authentication import CachedTokenRefreshSerializer
+from core.models import User
+
+try:
+    import argon2
+except ImportError: # argon2-cffi is optional, the argon2 policy is skipped without it
+    argon2 = None
+
+PASSWORD = 'benchmark-login-password'
+
+class Rollback(Exception):
+    pass
+
+def policy_settings(policy):
+    """
+    The settings of a hashing policy given as 'pbkdf2:<iterations>' or 'argon2'.
+    """
+    name, _, iterations = policy.partition(':')
+    hashers = list(settings.PASSWORD_HASHERS)
+    preferred = {'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher', 'argon2': 'core.hashers.TunedArgon2PasswordHasher'}.get(name)
+    if preferred is None:
+        raise CommandError(f"Unknown hashing policy {policy!r}, use pbkdf2:<iterations> or argon2.")
+    hashers.remove(preferred)
+    overrides = {'PASSWORD_HASHERS': [preferred] + hashers}
+    if iterations:
+        overrides['PASSWORD_PBKDF2_ITERATIONS'] = int(iterations)
+    return overrides
+
+class Command(BaseCommand):
+    """
+    Measure login throughput per worker under several password hashing policies, and the
+    cost of token refreshes.
+
+    A login runs what `/auth/jwt/create/` runs: authenticate() (a user query and the
+    password check) and the creation of the token pair. Everything runs in one thread, so
+    the numbers are per sync worker; the password check is CPU bound and dominates, so a
+    worker with N threads on N cores does at most about N times better. A refresh runs the
+    serializer of `/auth/jwt/refresh/`; its queries are counted with a warm cache.
+
+    The sample user is created inside a transaction that is rolled back at the end.
+
+    Usage:
+        python manage.py benchmark_login --policies pbkdf2:870000,pbkdf2:260000,argon2 --logins 20
+    """
+    help = 'Measure logins/sec per worker for password hashing policies, and token refreshes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policies', default='pbkdf2:870000,pbkdf2:260000,argon2', help="Comma-separated policies: pbkdf2:<iterations> or argon2.")
+        parser.add_argument('--logins', type=int, default=20, help='Timed logins per policy.')
+        parser.add_argument('--refreshes', type=int, default=200, help='Timed token refreshes.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run([policy for policy in options['policies'].split(',') if policy], options['logins'], options['refreshes'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, policies, logins, refreshes):
+        user = User.objects.create_user(username='benchmark-login', email='benchmark-login@example.com', password=None)
+        credentials = {'username': user.username, 'password': PASSWORD}
+
+        self.stdout.write(f"{'policy':<16} {'ms/login':>9} {'logins/s':>9}")
+        refresh_token = None
+        for policy in policies:
+            if policy.startswith('argon2') and argon2 is None:
+                self.stdout.write(f"{policy:<16} skipped (argon2-cffi is not installed)")
+                continue
+            with override_settings(**policy_settings(policy)):
+                user.set_password(PASSWORD)
+                user.save(update_fields=['password'])
+                started = time.perf_counter()
+                for _ in range(logins):
+                    serializer = TokenObtainPairSerializer(data=credentials)
+                    serializer.is_valid(raise_exception=True)
+                elapsed = time.perf_counter() - started
+            refresh_token = serializer.validated_data['refresh']
+            self.stdout.write(f"{policy:<16} {elapsed / logins * 1000:>9.1f} {logins / elapsed:>9.1f}")
+
+        if refresh_token is None:
+            return
+        CachedTokenRefreshSerializer(data={'refresh': refresh_token}).is_valid(raise_exception=True) # Warm the user state cache
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(refreshes):
+                CachedTokenRefreshSerializer(data={'refresh': refresh_token}).is_valid(raise_exception=True)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Refresh: {elapsed / refreshes * 1000:.2f} ms, {refreshes / elapsed:.0f}/s, "
+            f"{len(queries) / refreshes:.1f} queries per refresh."
+        ))
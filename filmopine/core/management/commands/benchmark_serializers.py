@@ -0,0 +1,93 @@
+import time
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from core.models import User
+from core.renderers import FastJSONRenderer
+from movie.models import Movie
+from movie.serializers import MovieSerializer, MovieRowSerializer
+from review.models import Review
+from review.serializers import ReviewSerializer, ReviewFullRowSerializer
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    """
+    Compare the list endpoints' DRF serialization path with the fast path
+    (`.values()` rows + RowSerializer + FastJSONRenderer).
+
+    Sample movies and reviews are created inside a transaction that is rolled back at the
+    end, so the command can be run against any database. Both paths must produce the same
+    bytes, otherwise the command fails.
+
+    Usage:
+        python manage.py benchmark_serializers --rows 100 --rounds 20
+    """
+    help = 'Measure rows/sec of the DRF and the fast-path list serialization.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page (movies and reviews).')
+        parser.add_argument('--rounds', type=int, default=20, help='Number of timed runs per path.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['rounds'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, rounds):
+        user = User.objects.create_user(username='benchmark-serializers', password=None)
+        content_type = ContentType.objects.get_for_model(Movie)
+        movies = Movie.objects.bulk_create([
+            Movie(imdb_id=f"bench{i}", title=f"Benchmark Movie {i} – Épisode", year="2024", film_type="movie", poster="N/A")
+            for i in range(rows)
+        ])
+        Review.objects.bulk_create([
+            Review(
+                user=user, content_type=content_type, object_id=movie.id, movie=movie, review_title=f"Review {movie.id}",
+                review_content="A fairly long review body. " * 20, rating=(movie.id % 9) / 2 + 1
+            )
+            for movie in movies
+        ])
+        movie_ids = [movie.id for movie in movies]
+
+        def movie_queryset():
+            return Movie.objects.filter(id__in=movie_ids).order_by('id')
+
+        def review_queryset():
+            return Review.objects.filter(object_id__in=movie_ids, content_type=content_type).order_by('created_at', 'id')
+
+        cases = [
+            (
+                'movies',
+                lambda: JSONRenderer().render(MovieSerializer(movie_queryset(), many=True).data),
+                lambda: FastJSONRenderer().render(MovieRowSerializer().serialize(movie_queryset().values(*MovieRowSerializer.columns))),
+            ),
+            (
+                'reviews',
+                lambda: JSONRenderer().render(ReviewSerializer(review_queryset(), many=True).data),
+                lambda: FastJSONRenderer().render(ReviewFullRowSerializer().serialize(review_queryset().values(*ReviewFullRowSerializer.columns))),
+            ),
+        ]
+
+        for name, slow, fast in cases:
+            if slow() != fast():
+                self.stderr.write(self.style.ERROR(f"{name}: the fast path output differs from the DRF serializer"))
+                return
+
+            timings = {}
+            for label, render in (('drf', slow), ('fast', fast)):
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    render()
+                timings[label] = (time.perf_counter() - started) / rounds
+
+            self.stdout.write(
+                f"{name:<8} drf {rows / timings['drf']:>10.0f} rows/s   fast {rows / timings['fast']:>10.0f} rows/s   "
+                f"speedup x{timings['drf'] / timings['fast']:.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-identical."))
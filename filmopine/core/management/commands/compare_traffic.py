@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import traffic
+
+class Command(BaseCommand):
+    """
+    Compare two replays of the same traffic capture (see `replay_traffic`): latency
+    percentiles per view and overall, and responses whose status or body checksum differ.
+
+    Fails (non-zero exit status) when responses differ, or when the overall p95 latency of
+    the candidate is more than --tolerance above the baseline, so it can gate a deploy.
+
+    Usage:
+        python manage.py compare_traffic baseline.jsonl candidate.jsonl --tolerance 0.2
+    """
+    help = 'Compare the latency distributions and response checksums of two traffic replays.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Results of the reference build.')
+        parser.add_argument('candidate', help='Results of the build under test.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Accepted relative increase of the overall p95 latency.')
+        parser.add_argument('--show', type=int, default=10, help='Mismatched requests listed.')
+
+    def handle(self, *args, **options):
+        try:
+            comparison = traffic.compare_runs(traffic.read_log(options['baseline']), traffic.read_log(options['candidate']))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'view':<32} {'requests':>8} {'p50 ms':>15} {'p95 ms':>15} {'p99 ms':>15} {'diff':>5}")
+        rows = sorted(comparison['views'].items(), key=lambda item: -item[1]['count'])
+        for view, stats in rows + [('overall', comparison['overall'])]:
+            self.stdout.write(self.format_row(view, stats))
+
+        for index, view in comparison['mismatched'][:options['show']]:
+            self.stdout.write(f"  request {index} ({view}): different response")
+
+        overall = comparison['overall']
+        base_p95, cand_p95 = overall['baseline'][1], overall['candidate'][1]
+        failures = []
+        if overall['mismatches']:
+            failures.append(f"{overall['mismatches']} responses differ")
+        if base_p95 and cand_p95 > base_p95 * (1 + options['tolerance']):
+            failures.append(f"p95 latency went from {base_p95:.1f} ms to {cand_p95:.1f} ms")
+        if failures:
+            raise CommandError("Regression: " + ", ".join(failures) + ".")
+        self.stdout.write(self.style.SUCCESS("Same responses, latency within tolerance."))
+
+    def format_row(self, view, stats):
+        cells = [f"{base:>6.1f} → {cand:<6.1f}" for base, cand in zip(stats['baseline'], stats['candidate'])]
+        return f"{view[:32]:<32} {stats['count']:>8} {cells[0]:>15} {cells[1]:>15} {cells[2]:>15} {stats['mismatches']:>5}"
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core import openapi
+
+class Command(BaseCommand):
+    """
+    Generate the OpenAPI schema once and store it as the artifact served by /swagger.json/
+    (and loaded by the Swagger and ReDoc UIs). Run it at build/deploy time, after every
+    change to the API, e.g. next to collectstatic.
+
+    Usage:
+        python manage.py generate_schema
+        python manage.py generate_schema --output /srv/filmopine/openapi.json
+    """
+    help = 'Write the pre-generated OpenAPI schema artifact.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Artifact path. Defaults to settings.OPENAPI_SCHEMA_PATH.')
+
+    def handle(self, *args, **options):
+        artifact = openapi.write_artifact(options['output'])
+        openapi.reset_artifact()
+        self.stdout.write(self.style.SUCCESS(f"Schema version {artifact.version} written ({len(artifact.content)} bytes)."))
@@ -0,0 +1,63 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from django.core.management.base import BaseCommand
+
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+print(f"STARTUP {time.perf_counter() - started:.6f}")
+"""
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$')
+
+class Command(BaseCommand):
+    """
+    Measure the cold start of a worker process: Django setup, app loading, URLconf import
+    and WSGI application creation, each run in a fresh interpreter (as on a gunicorn boot
+    or worker recycle).
+
+    With --imports, the modules with the largest cumulative import time are listed
+    (from `python -X importtime`) to find what to load lazily or only in DEBUG.
+
+    Usage:
+        python manage.py measure_startup --runs 5 --imports 15
+    """
+    help = 'Measure the startup time of a fresh worker process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Number of fresh processes started.')
+        parser.add_argument('--imports', type=int, default=0, help='Show the N slowest top-level imports.')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        timings = []
+        import_times = {}
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            timings.extend(float(line.split()[1]) * 1000 for line in result.stdout.splitlines() if line.startswith('STARTUP '))
+            for line in result.stderr.splitlines():
+                match = IMPORT_TIME_RE.match(line)
+                if match and '.' not in match.group(2):
+                    import_times.setdefault(match.group(2), []).append(int(match.group(1)) / 1000)
+
+        self.stdout.write(
+            f"Startup over {len(timings)} runs: mean {statistics.mean(timings):.1f} ms   "
+            f"min {min(timings):.1f} ms   max {max(timings):.1f} ms"
+        )
+        if options['imports']:
+            slowest = sorted(import_times.items(), key=lambda item: -statistics.mean(item[1]))[:options['imports']]
+            self.stdout.write("\nSlowest top-level imports (cumulative):")
+            for module, values in slowest:
+                self.stdout.write(f"  {statistics.mean(values):>8.1f} ms  {module}")
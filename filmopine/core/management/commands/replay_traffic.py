@@ -0,0 +1,74 @@
+import threading
+from collections import Counter
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from core import traffic
+
+class Command(BaseCommand):
+    """
+    Replay a traffic capture (see core.middleware.TrafficCaptureMiddleware) against a
+    running instance, and record the status, latency and body checksum of every request.
+
+    Replay the same capture against two builds serving the same database, with OMDb
+    stubbed (`python manage.py omdb_stub`, and OMDB_BASE_URL pointing to it, so searches
+    are deterministic and free), then compare the two result files with
+    `python manage.py compare_traffic`. Raise the THROTTLE_RATE_* settings of the instances
+    under test, or the replay gets throttled.
+
+    Captured JWT requests are sent with --auth-header (e.g. the token of a test user), or
+    anonymously without it. Responses are requested uncompressed, so checksums do not
+    depend on compression settings, and the --ignore-fields of JSON bodies (timestamps by
+    default) are left out of the checksums.
+
+    Usage:
+        python manage.py omdb_stub --port 8765 &
+        OMDB_BASE_URL=http://127.0.0.1:8765/ gunicorn --pythonpath filmopine -w 4 -b 127.0.0.1:8001 filmopine.wsgi &
+        python manage.py replay_traffic traffic.jsonl --base-url http://127.0.0.1:8001 \
+            --speedup 10 --concurrency 16 --output baseline.jsonl
+    """
+    help = 'Replay captured traffic against an instance and record latencies and response checksums.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('capture', help='Capture log (JSON Lines).')
+        parser.add_argument('--base-url', required=True, help='Instance to replay against, e.g. http://127.0.0.1:8001.')
+        parser.add_argument('--output', required=True, help='Result file (JSON Lines), input of compare_traffic.')
+        parser.add_argument('--speedup', type=float, default=1.0, help='Replay N times faster than captured (0: as fast as possible).')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at most.')
+        parser.add_argument('--auth-header', help="Authorization header of captured JWT requests, e.g. 'JWT <token>'.")
+        parser.add_argument('--limit', type=int, help='Replay only the first N requests.')
+        parser.add_argument('--ignore-fields', default='created_at,updated_at', help='Comma-separated JSON fields left out of the checksums.')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed.')
+
+    def handle(self, *args, **options):
+        entries = traffic.read_log(options['capture'])[:options['limit']]
+        if not entries:
+            raise CommandError("The capture is empty.")
+        base_url = options['base_url'].rstrip('/')
+        sessions = threading.local()
+
+        def send(entry):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            headers = {'Accept': 'application/json', 'Accept-Encoding': 'identity'}
+            if entry['auth'] == 'jwt' and options['auth_header']:
+                headers['Authorization'] = options['auth_header']
+            response = sessions.session.request(
+                entry['method'], base_url + traffic.request_url(entry), headers=headers,
+                allow_redirects=False, timeout=options['timeout']
+            )
+            return response.status_code, response.content
+
+        ignored_fields = [field for field in options['ignore_fields'].split(',') if field]
+        results = traffic.replay(entries, send, options['speedup'], options['concurrency'], ignored_fields)
+        traffic.write_results(options['output'], results)
+
+        p50, p95, p99 = traffic.percentiles([result['ms'] for result in results])
+        statuses = Counter(result['status'] for result in results)
+        late = sum(1 for result in results if result['late_ms'] > 100)
+        self.stdout.write(f"{len(results)} requests, statuses {dict(sorted(statuses.items()))}")
+        self.stdout.write(f"Latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms")
+        if late:
+            self.stdout.write(self.style.WARNING(
+                f"{late} requests started over 100 ms late: lower --speedup or raise --concurrency."
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
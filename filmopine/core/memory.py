@@ -0,0 +1,168 @@
+import linecache
+import os
+import random
+import resource
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from django.conf import settings
+from . import metrics
+from .profiling import PATH_PREFIXES
+
+def current_rss():
+    """
+    Resident set size of this process in bytes (the peak RSS where /proc is not available).
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 # Bytes on macOS, KB elsewhere
+
+def allocator_entry(frame, size, blocks):
+    filename = frame.filename
+    for prefix in PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    source = linecache.getline(frame.filename, frame.lineno).strip()
+    return {'line': f"{filename}:{frame.lineno}", 'source': source or None, 'bytes': size, 'blocks': blocks}
+
+class ViewMemory:
+    """
+    Memory growth attributed to a view over its sampled requests.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.retained = 0 # Bytes still allocated at the end of the sampled requests
+        self.rss_growth = 0
+        self.allocators = Counter() # Allocating frame -> retained bytes
+        self.blocks = Counter() # Allocating frame -> retained blocks
+
+    def as_dict(self, limit):
+        return {
+            'requests': self.requests,
+            'retained_bytes': self.retained,
+            'retained_bytes_per_request': self.retained // self.requests if self.requests else 0,
+            'rss_growth_bytes': self.rss_growth,
+            'top_allocators': [allocator_entry(frame, size, self.blocks[frame]) for frame, size in self.allocators.most_common(limit)],
+        }
+
+class MemoryTracker:
+    """
+    Attribute the memory growth of a worker to the views it serves.
+
+    A sampled request is traced with tracemalloc from its start to its end: the snapshot
+    taken when the view returns holds exactly the blocks allocated during the request that
+    are still alive, i.e. what the request left behind (caches filled, objects leaked in
+    module globals, ...), plus the response itself. Those blocks are grouped by allocating
+    line and added to the view's totals, along with the RSS growth over the request.
+
+    Tracing slows allocations down several times, so it is only on during sampled
+    requests, and one at a time per process: a request arriving while another one is
+    traced is not sampled. Blocks allocated meanwhile by other threads of the worker are
+    counted too, so the attribution is exact with sync workers only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tracing = threading.Lock()
+        self.views = {}
+        self.started_rss = current_rss()
+
+    def should_sample(self):
+        return random.random() < settings.MEMORY_PROFILING_RATE
+
+    def trace(self, get_response, request):
+        """
+        Run `get_response(request)` under tracemalloc if no other request is traced, and
+        charge what it retained to the view that served it.
+        """
+        if not self.tracing.acquire(blocking=False):
+            return get_response(request)
+        try:
+            rss = current_rss()
+            already_tracing = tracemalloc.is_tracing() # e.g. PYTHONTRACEMALLOC: diff two snapshots instead
+            before = tracemalloc.take_snapshot() if already_tracing else None
+            if not already_tracing:
+                tracemalloc.start(settings.MEMORY_PROFILING_FRAMES)
+            try:
+                response = get_response(request)
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                if not already_tracing:
+                    tracemalloc.stop()
+            match = request.resolver_match
+            self.record(match.view_name if match else 'unresolved', snapshot, before, current_rss() - rss)
+        finally:
+            self.tracing.release()
+        return response
+
+    def record(self, view_name, snapshot, before, rss_growth):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        if before is None:
+            growth = [(stat.traceback, stat.size, stat.count) for stat in snapshot.statistics('traceback')]
+        else:
+            growth = [(stat.traceback, stat.size_diff, stat.count_diff) for stat in snapshot.compare_to(before, 'traceback') if stat.size_diff > 0]
+
+        with self.lock:
+            stats = self.views.setdefault(view_name, ViewMemory())
+            stats.requests += 1
+            stats.rss_growth += rss_growth
+            for traceback, size, count in growth:
+                frame = self.first_project_frame(traceback)
+                stats.retained += size
+                stats.allocators[frame] += size
+                stats.blocks[frame] += count
+
+    def first_project_frame(self, traceback):
+        """
+        The innermost frame of a traceback in the project's code, so that growth inside
+        Django or a library is charged to the line of ours that triggered it.
+        """
+        base_dir = os.path.join(str(settings.BASE_DIR), '')
+        for frame in reversed(traceback):
+            if frame.filename.startswith(base_dir):
+                return frame
+        return traceback[-1]
+
+    def report(self, view_name=None, limit=20):
+        """
+        Memory growth per view, the views with the most retained bytes first.
+
+        Args:
+            view_name (str): Only report this view.
+            limit (int): Number of top allocators listed per view.
+
+        Returns:
+            dict: Worker `pid`, `rss_bytes`, `rss_growth_bytes` since startup, and `views`.
+        """
+        with self.lock:
+            views = {name: stats.as_dict(limit) for name, stats in self.views.items() if view_name in (None, name)}
+        rss = current_rss()
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': rss,
+            'rss_growth_bytes': rss - self.started_rss,
+            'views': dict(sorted(views.items(), key=lambda item: item[1]['retained_bytes'], reverse=True)),
+        }
+
+    def summary(self):
+        with self.lock:
+            sampled = sum(stats.requests for stats in self.views.values())
+        return {'rss_bytes': current_rss(), 'sampled_requests': sampled}
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.started_rss = current_rss()
+
+tracker = MemoryTracker()
+
+metrics.register('memory', tracker.summary)
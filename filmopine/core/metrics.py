@@ -0,0 +1,28 @@
+import os
+import threading
+
+_providers = {}
+_lock = threading.Lock()
+
+def register(name, provider):
+    """
+    Register a metrics provider for this process.
+
+    Args:
+        name (str): Unique name of the metrics group (e.g. 'db_pool.default').
+        provider (callable): Returns a JSON-serializable dict of current values when called.
+    """
+    with _lock:
+        _providers[name] = provider
+
+def unregister(name):
+    with _lock:
+        _providers.pop(name, None)
+
+def snapshot():
+    """
+    Current values of every registered metrics group of this worker process.
+    """
+    with _lock:
+        providers = dict(_providers)
+    return {'pid': os.getpid(), 'metrics': {name: provider() for name, provider in sorted(providers.items())}}
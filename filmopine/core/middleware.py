@@ -0,0 +1,381 @@
+import asyncio
+import hashlib
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .authentication import token_user_id
+from .db_routers import mark_failed_replicas, use_primary
+from . import compression, idempotency, memory, profiling, traffic
+
+def client_key(request):
+    """
+    Stable, anonymized identifier of the client making a request: the user ID of its JWT,
+    or its IP address for anonymous requests.
+    """
+    user_id = token_user_id(request)
+    identity = f"user:{user_id}" if user_id is not None else f"ip:{request.META.get('REMOTE_ADDR', '')}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide, per request, whether database reads may go to a replica (see core.db_routers).
+
+    Unsafe requests (POST, PUT, PATCH, DELETE) read from the primary, except for the
+    read-only POST endpoints listed in REPLICA_READ_ONLY_PATHS. After a successful write,
+    the client is pinned to the primary for REPLICA_STICKY_SECONDS so it reads its own
+    writes even if the replicas lag behind.
+
+    Works in both sync and async middleware chains: the decision is a context variable,
+    which async views and the threads of sync_to_async inherit.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key, is_write = self.pin_key(request)
+        token = use_primary.set(is_write or bool(cache.get(key)))
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+
+        if is_write and response.status_code < 400:
+            cache.set(key, True, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key, is_write = self.pin_key(request)
+        token = use_primary.set(is_write or bool(await cache.aget(key)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_primary.reset(token)
+
+        if is_write and response.status_code < 400:
+            await cache.aset(key, True, timeout=settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_exception(self, request, exception):
+        if settings.DATABASE_REPLICAS:
+            mark_failed_replicas(exception)
+
+    def pin_key(self, request):
+        is_write = request.method not in SAFE_METHODS and request.path_info not in settings.REPLICA_READ_ONLY_PATHS
+        return f"primary-pin:{client_key(request)}", is_write
+
+class CompressionMiddleware:
+    """
+    Compress API responses with brotli or gzip, as negotiated through Accept-Encoding.
+
+    Only responses whose media type is listed in COMPRESSION_CONTENT_TYPES are compressed;
+    regular responses must also be at least COMPRESSION_MIN_SIZE bytes long, since below a
+    packet or so compression costs CPU without saving any transfer time. Streaming
+    responses are compressed chunk by chunk. Responses that already carry a
+    Content-Encoding (e.g. pre-compressed or cached compressed bodies) are left untouched,
+    as are partial responses and those marked `Cache-Control: no-transform`.
+
+    Bytes saved and CPU time spent are recorded per endpoint (URL name) in core.metrics.
+    Brotli is only offered when the optional `brotli` package is installed. Compression
+    is CPU work only, so the middleware runs in sync and async chains alike.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressor = compression.get_compressor(
+            encoding, settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY
+        )
+        endpoint = request.resolver_match.view_name if request.resolver_match else 'unresolved'
+
+        if response.streaming:
+            stream = compression.CompressedStream(compressor, endpoint, encoding)
+            if response.is_async:
+                response.streaming_content = stream.awrap(response.streaming_content)
+            else:
+                response.streaming_content = stream.wrap(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            started = time.thread_time()
+            compressed = compressor.process(response.content) + compressor.finish()
+            cpu_seconds = time.thread_time() - started
+            if len(compressed) >= len(response.content):
+                return response
+            compression.stats.record(endpoint, encoding, len(response.content), len(compressed), cpu_seconds)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is a different representation: weaken a strong ETag (as GZipMiddleware does)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def should_compress(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return (
+            response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and 'no-transform' not in response.get('Cache-Control', '')
+            and content_type in settings.COMPRESSION_CONTENT_TYPES
+        )
+
+class IdempotencyMiddleware:
+    """
+    Make unsafe requests retry-safe with the Idempotency-Key header (see
+    core.idempotency.IdempotentRequest): a retried POST gets the stored response of the
+    first attempt from the cache, instead of running authentication, validation and the
+    write again. Concurrent duplicates are coalesced: they wait for the first request to
+    finish and get its response.
+
+    Requests without the header, and safe methods, go straight through. It sits inside
+    CompressionMiddleware, so stored responses are uncompressed and replays are
+    compressed as negotiated by each retry.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method in SAFE_METHODS or idempotency.HEADER not in request.headers:
+            return self.get_response(request)
+        invalid = idempotency.invalid_key_response(request.headers[idempotency.HEADER])
+        if invalid is not None:
+            return invalid
+
+        cache = idempotency.get_cache()
+        idempotent = idempotency.IdempotentRequest(request, client_key(request))
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            stored = idempotent.stored_response(cache.get(idempotent.cache_key))
+            if stored is not None:
+                return stored
+            if cache.add(idempotent.cache_key, idempotent.in_flight_entry(), timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                break
+            if time.monotonic() >= deadline:
+                return idempotent.conflict_response()
+            time.sleep(idempotency.POLL_INTERVAL)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            cache.delete(idempotent.cache_key)
+            raise
+        entry = idempotent.entry_for(response)
+        if entry is None:
+            cache.delete(idempotent.cache_key)
+        else:
+            cache.set(idempotent.cache_key, entry, timeout=settings.IDEMPOTENCY_TTL)
+        return response
+
+    async def __acall__(self, request):
+        if request.method in SAFE_METHODS or idempotency.HEADER not in request.headers:
+            return await self.get_response(request)
+        invalid = idempotency.invalid_key_response(request.headers[idempotency.HEADER])
+        if invalid is not None:
+            return invalid
+
+        cache = idempotency.get_cache()
+        idempotent = idempotency.IdempotentRequest(request, client_key(request))
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            stored = idempotent.stored_response(await cache.aget(idempotent.cache_key))
+            if stored is not None:
+                return stored
+            if await cache.aadd(idempotent.cache_key, idempotent.in_flight_entry(), timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                break
+            if time.monotonic() >= deadline:
+                return idempotent.conflict_response()
+            await asyncio.sleep(idempotency.POLL_INTERVAL)
+
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await cache.adelete(idempotent.cache_key)
+            raise
+        entry = idempotent.entry_for(response)
+        if entry is None:
+            await cache.adelete(idempotent.cache_key)
+        else:
+            await cache.aset(idempotent.cache_key, entry, timeout=settings.IDEMPOTENCY_TTL)
+        return response
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, usable in an async middleware chain.
+
+    WhiteNoiseMiddleware is sync only, which under ASGI would make every request cross
+    into a thread on its way to the views. Here only the requests for static files are
+    served in a thread; all other requests go straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+class ProfilingMiddleware:
+    """
+    Profile live requests with the stack sampler of core.profiling.
+
+    A request is profiled when an active ProfilingSession targets its view and picks it
+    at the session's sample rate, or when it carries the session's signed X-Profile header.
+    The collapsed stacks of each profiled request are stored for download from the admin.
+
+    The middleware removes itself at startup unless PROFILING_ENABLED is set, so it costs
+    nothing when profiling is off. It is sync only, as it samples the thread running the
+    view: under ASGI, turning it on moves the async read views into threads as well.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            profile = getattr(request, '_profile', None)
+            if profile is not None:
+                profiling.sampler.stop(threading.get_ident())
+
+        if profile is not None:
+            session, view_name, started = profile
+            duration_ms = (time.perf_counter() - started) * 1000
+            profiling.save_profile(session, view_name, request.path, duration_ms, request._profile_stacks)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name if request.resolver_match else ''
+        session = profiling.pick_session(request, view_name)
+        if session is not None:
+            request._profile = (session, view_name, time.perf_counter())
+            request._profile_stacks = profiling.sampler.start(threading.get_ident(), session.interval_ms / 1000)
+        return None
+
+class MemoryProfilingMiddleware:
+    """
+    Attribute the memory growth of long-running workers to views (see core.memory).
+
+    A fraction MEMORY_PROFILING_RATE of the requests is traced with tracemalloc; what each
+    traced request leaves allocated is added to its view's totals, exposed with the top
+    allocating lines by the admin-only /api/metrics/memory/ endpoint.
+
+    The middleware removes itself at startup when the rate is 0, so it costs nothing when
+    memory profiling is off. It is sync only, like ProfilingMiddleware: tracemalloc traces
+    the whole process, so requests interleaved on an event loop would be mixed up.
+    """
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILING_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not memory.tracker.should_sample():
+            return self.get_response(request)
+        return memory.tracker.trace(self.get_response, request)
+
+class TrafficCaptureMiddleware:
+    """
+    Sample live requests into an anonymized JSON Lines log (see core.traffic), to replay
+    the real mix of endpoints and query strings against other builds with
+    `python manage.py replay_traffic`.
+
+    A fraction TRAFFIC_CAPTURE_RATE of the requests with a method in
+    TRAFFIC_CAPTURE_METHODS is recorded: method, path, route, view name, query parameters
+    (sensitive ones redacted), authentication class, status and duration. Bodies, headers
+    and client identities are never recorded.
+
+    The middleware removes itself at startup when the rate is 0, so it costs nothing when
+    capture is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not traffic.should_capture(request):
+            return self.get_response(request)
+        started, timer = time.time(), time.perf_counter()
+        response = self.get_response(request)
+        traffic.capture_log.write(traffic.capture_entry(request, response, started, time.perf_counter() - timer))
+        return response
+
+    async def __acall__(self, request):
+        if not traffic.should_capture(request):
+            return await self.get_response(request)
+        started, timer = time.time(), time.perf_counter()
+        response = await self.get_response(request)
+        traffic.capture_log.write(traffic.capture_entry(request, response, started, time.perf_counter() - timer))
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-19 03:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilingSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('view_name', models.CharField(blank=True, max_length=255)),
+                ('sample_rate', models.FloatField(default=0.01)),
+                ('interval_ms', models.FloatField(default=5.0)),
+                ('max_requests', models.PositiveIntegerField(default=1000)),
+                ('active', models.BooleanField(default=True)),
+                ('requests_profiled', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfiledRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=2048)),
+                ('duration_ms', models.FloatField()),
+                ('stacks', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests', to='core.profilingsession')),
+            ],
+        ),
+    ]
@@ -10,8 +10,84 @@ class User(AbstractUser):
 
     Attributes:
         email (EmailField): A unique email address for the user, required for authentication and communication.
+        following (ManyToManyField): Users this user follows (see Follow); the reverse relation is `followers`.
+        followers_count (PositiveIntegerField): Denormalized number of followers, used to decide between
+            fan-out-on-write and fan-out-on-read for the activity feed without counting rows.
 
     Note:
         Ensure to update any relevant settings in your project to point to this custom user model.
     """
-    email = models.EmailField(unique=True)
\ No newline at end of file
+    email = models.EmailField(unique=True)
+    following = models.ManyToManyField('self', through='Follow', through_fields=('follower', 'followee'), symmetrical=False, related_name='followers')
+    followers_count = models.PositiveIntegerField(default=0)
+
+
+class Follow(models.Model):
+    """
+    A user following another user, to see the reviews they write in their activity feed.
+
+    Attributes:
+        follower (ForeignKey): The user who follows.
+        followee (ForeignKey): The user being followed.
+        created_at (DateTimeField): When the follow started.
+    """
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following_relations')
+    followee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follower_relations')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['follower', 'followee']]
+        indexes = [models.Index(fields=['followee', 'follower'])]
+
+    def __str__(self):
+        return f"{self.follower_id} follows {self.followee_id}"
+
+
+class ProfilingSession(models.Model):
+    """
+    An admin-defined profiling session on live traffic (see core.profiling).
+
+    Requests are profiled when they hit `view_name` and are picked by `sample_rate`, or when
+    they carry the session's signed X-Profile header (any view, if `view_name` is empty).
+
+    Attributes:
+        name (CharField): Free-form label.
+        view_name (CharField): URL name of the profiled view (e.g. 'review_search'); empty for any view.
+        sample_rate (FloatField): Fraction (0-1) of the view's requests that are profiled.
+        interval_ms (FloatField): Stack sampling interval.
+        max_requests (PositiveIntegerField): The session stops after profiling this many requests.
+        active (BooleanField): Inactive sessions profile nothing.
+        requests_profiled (PositiveIntegerField): Number of requests profiled so far.
+        created_at (DateTimeField): When the session was created.
+    """
+    name = models.CharField(max_length=255)
+    view_name = models.CharField(max_length=255, blank=True)
+    sample_rate = models.FloatField(default=0.01)
+    interval_ms = models.FloatField(default=5.0)
+    max_requests = models.PositiveIntegerField(default=1000)
+    active = models.BooleanField(default=True)
+    requests_profiled = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ProfiledRequest(models.Model):
+    """
+    The stack samples of one profiled request.
+
+    Attributes:
+        session (ForeignKey): The profiling session.
+        view_name (CharField): URL name of the view that served the request.
+        path (CharField): Request path (without the query string).
+        duration_ms (FloatField): Time spent in the view and the inner middleware.
+        stacks (JSONField): Collapsed stack ("outer;...;inner") -> number of samples.
+        created_at (DateTimeField): When the request was profiled.
+    """
+    session = models.ForeignKey(ProfilingSession, on_delete=models.CASCADE, related_name='requests')
+    view_name = models.CharField(max_length=255)
+    path = models.CharField(max_length=2048)
+    duration_ms = models.FloatField()
+    stacks = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from django.conf import settings
+from drf_yasg import openapi
+
+api_info = openapi.Info(
+    title="Film Opine API",
+    default_version='v1',
+    description="A Movie Review and Rating API",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="officialmokua@gmail.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+SchemaArtifact = namedtuple('SchemaArtifact', ['content', 'version'])
+
+_artifact = None
+_artifact_lock = threading.Lock()
+
+def make_artifact(content):
+    return SchemaArtifact(content, hashlib.sha256(content).hexdigest()[:16])
+
+def generate_schema():
+    """
+    Generate the OpenAPI document of the public API by introspecting every view.
+
+    This is the expensive step that used to run on every Swagger/Redoc hit.
+
+    Returns:
+        SchemaArtifact: The JSON document (bytes) and its version (a hash of the content).
+    """
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(info=api_info)
+    schema = generator.get_schema(request=None, public=True)
+    return make_artifact(OpenAPICodecJson(validators=[]).encode(schema))
+
+def write_artifact(path=None):
+    """
+    Generate the schema and store it atomically as the artifact file. Run it at build or
+    deploy time, next to collectstatic.
+
+    Args:
+        path (str, optional): Defaults to settings.OPENAPI_SCHEMA_PATH.
+
+    Returns:
+        SchemaArtifact: The artifact that was written.
+    """
+    path = path or settings.OPENAPI_SCHEMA_PATH
+    artifact = generate_schema()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(artifact.content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return artifact
+
+def read_artifact(path=None):
+    """
+    Load the artifact written by write_artifact(), or return None if there is none.
+    """
+    path = path or settings.OPENAPI_SCHEMA_PATH
+    try:
+        with open(path, 'rb') as artifact_file:
+            return make_artifact(artifact_file.read())
+    except FileNotFoundError:
+        return None
+
+def get_artifact():
+    """
+    The schema served by this process: loaded once from the artifact file or, when no
+    artifact was built, generated once on first use and kept in memory.
+    """
+    global _artifact
+    if _artifact is None:
+        with _artifact_lock:
+            if _artifact is None:
+                _artifact = read_artifact() or generate_schema()
+    return _artifact
+
+def reset_artifact():
+    """
+    Forget the in-memory schema (e.g. after writing a new artifact in the same process).
+    """
+    global _artifact
+    with _artifact_lock:
+        _artifact = None
@@ -0,0 +1,172 @@
+import os
+import random
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+
+SIGNING_SALT = 'core.profiling'
+
+# Shortened in frame labels
+PATH_PREFIXES = sorted(
+    {os.path.join(str(settings.BASE_DIR), ''), os.path.join(sysconfig.get_paths()['purelib'], ''), os.path.join(sysconfig.get_paths()['stdlib'], '')},
+    key=len, reverse=True
+)
+
+def frame_label(code):
+    filename = code.co_filename
+    for prefix in PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{filename}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def collapse_stack(frame):
+    """
+    Turn a frame into a collapsed stack line ("outer;...;inner"), the input format of
+    flamegraph.pl and speedscope.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+class StackSampler:
+    """
+    Statistical profiler sampling the stacks of the threads that registered with it.
+
+    A single daemon thread wakes up every `interval` seconds and records the current stack
+    of each registered thread (via sys._current_frames), so the profiled code itself runs
+    unmodified: unlike tracing profilers, nothing is added to function calls. The thread
+    only runs while at least one thread is registered.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.targets = {} # thread id -> (Counter, interval)
+        self.thread = None
+
+    def start(self, thread_id, interval):
+        """
+        Start sampling a thread.
+
+        Returns:
+            Counter: Collapsed stack -> number of samples, filled until stop() is called.
+        """
+        counter = Counter()
+        with self.lock:
+            self.targets[thread_id] = (counter, interval)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+                self.thread.start()
+        return counter
+
+    def stop(self, thread_id):
+        with self.lock:
+            self.targets.pop(thread_id, None)
+
+    def run(self):
+        sampler_id = threading.get_ident()
+        while True:
+            with self.lock:
+                if not self.targets:
+                    self.thread = None
+                    return
+                targets = dict(self.targets)
+            frames = sys._current_frames()
+            for thread_id, (counter, _) in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != sampler_id:
+                    counter[collapse_stack(frame)] += 1
+            del frames
+            time.sleep(min(interval for _, interval in targets.values()))
+
+sampler = StackSampler()
+
+def signed_header(session):
+    """
+    X-Profile header value that makes any request profiled by `session` (valid for
+    PROFILING_SIGNATURE_MAX_AGE seconds).
+    """
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(session.pk))
+
+def session_from_header(value):
+    """
+    The session ID of a signed X-Profile header value, or None if it is invalid or expired.
+    """
+    try:
+        return int(signing.TimestampSigner(salt=SIGNING_SALT).unsign(value, max_age=settings.PROFILING_SIGNATURE_MAX_AGE))
+    except (signing.BadSignature, ValueError):
+        return None
+
+class ActiveSessions:
+    """
+    In-process cache of the active profiling sessions, refreshed every
+    PROFILING_REFRESH_SECONDS, so unprofiled requests do not query the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = []
+        self.loaded_at = None
+
+    def get(self):
+        now = time.monotonic()
+        if self.loaded_at is None or now - self.loaded_at >= settings.PROFILING_REFRESH_SECONDS:
+            from .models import ProfilingSession
+            with self.lock:
+                self.sessions = list(ProfilingSession.objects.filter(active=True, requests_profiled__lt=F('max_requests')))
+                self.loaded_at = now
+        return self.sessions
+
+    def clear(self):
+        with self.lock:
+            self.loaded_at = None
+
+active_sessions = ActiveSessions()
+
+def pick_session(request, view_name):
+    """
+    The profiling session that should profile this request, if any.
+    """
+    sessions = active_sessions.get()
+    header = request.META.get('HTTP_X_PROFILE')
+    if header:
+        session_id = session_from_header(header)
+        for session in sessions:
+            if session.pk == session_id and session.view_name in ('', view_name):
+                return session
+    for session in sessions:
+        if session.view_name == view_name and random.random() < session.sample_rate:
+            return session
+    return None
+
+def save_profile(session, view_name, path, duration_ms, stacks):
+    """
+    Store the samples of a profiled request and count it against the session's budget.
+    """
+    from .models import ProfiledRequest, ProfilingSession
+    ProfiledRequest.objects.create(session=session, view_name=view_name, path=path[:2048], duration_ms=duration_ms, stacks=dict(stacks))
+    ProfilingSession.objects.filter(pk=session.pk).update(requests_profiled=F('requests_profiled') + 1)
+
+def collapsed_stacks(session, view_name=None):
+    """
+    Aggregate the samples of the requests of a session, optionally for a single view.
+
+    Returns:
+        str: One "stack count" line per distinct stack, the collapsed format read by
+            flamegraph.pl and speedscope.
+    """
+    totals = Counter()
+    requests = session.requests.all()
+    if view_name:
+        requests = requests.filter(view_name=view_name)
+    for stacks in requests.values_list('stacks', flat=True).iterator():
+        totals.update(stacks)
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(totals.items()))
@@ -0,0 +1,44 @@
+import re
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError: # orjson is optional, fall back to DRF's stdlib json rendering
+    orjson = None
+
+# orjson writes exponents as "1e16"/"1e-7" where the json module writes "1e+16"/"1e-07"
+EXPONENT_RE = re.compile(rb'\de-?\d')
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, producing byte-for-byte the same output as DRF's
+    JSONRenderer (compact separators, UTF-8, U+2028/U+2029 escaped, same encoding of
+    Decimal, datetime, UUID and other types).
+
+    Types orjson does not handle natively are encoded by DRF's own JSONEncoder. Anything
+    orjson would write differently (indented output, floats in exponent notation, integers
+    beyond 64 bits) is handed to DRF's renderer instead.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as DRF: escape the line/paragraph separators that are invalid in JavaScript strings
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
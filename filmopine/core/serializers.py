@@ -1,4 +1,9 @@
+from django.conf import settings
+from rest_framework import serializers
 from djoser.serializers import UserSerializer as BaseUserSerializer, UserCreateSerializer as BaseUserCreateSerializer
+from drf_yasg.utils import swagger_serializer_method
+from review.serializers import UserReviewStatsSerializer
+from review.user_stats import stats_of
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     """
@@ -43,21 +48,52 @@ class UserSerializer(BaseUserSerializer):
         - email: The email address of the user.
         - first_name: The user's first name.
         - last_name: The user's last name.
+        - review_stats: The user's review statistics (see UserReviewStatsSerializer).
 
     It is used to serialize user instances for responses, ensuring that only 
     the specified fields are included in the output. A unique reference name 
     is set to avoid conflicts with other serializers.
 
     Attributes:
+        review_stats (SerializerMethodField): The precomputed review statistics of the user.
         Meta: A nested class that defines the fields to be included in the 
               serialization process and specifies a unique reference name.
 
     Methods:
-        None
+        get_review_stats(obj): Reads the stats row of the user (zeros if there is none).
 
     Returns:
         None
     """
+    review_stats = serializers.SerializerMethodField()
+
     class Meta(BaseUserSerializer.Meta):
-        fields = ['id', 'username', 'email', 'first_name', 'last_name']
-        ref_name = 'CustomUser' # Setting unique reference name, it was confilicting with another serializer
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'review_stats']
+        ref_name = 'CustomUser' # Setting unique reference name, it was confilicting with another serializer
+
+    @swagger_serializer_method(serializer_or_field=UserReviewStatsSerializer)
+    def get_review_stats(self, obj):
+        return UserReviewStatsSerializer(stats_of(obj)).data
+
+
+class CompositeItemSerializer(serializers.Serializer):
+    """
+    One sub-request of a composite request: a client-chosen `id` echoed in the response,
+    and the `path` (with optional query string) of an API GET endpoint.
+    """
+    id = serializers.CharField(max_length=100)
+    path = serializers.CharField(max_length=2000)
+
+class CompositeRequestSerializer(serializers.Serializer):
+    """
+    Validates the body of a composite request (see CompositeAPIView).
+    """
+    requests = CompositeItemSerializer(many=True)
+    parallel = serializers.BooleanField(required=False, default=False)
+
+    def validate_requests(self, value):
+        if not value:
+            raise serializers.ValidationError("Provide at least one sub-request.")
+        if len(value) > settings.COMPOSITE_MAX_REQUESTS:
+            raise serializers.ValidationError(f"At most {settings.COMPOSITE_MAX_REQUESTS} sub-requests are allowed.")
+        return value
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import forget_user_state
+from .models import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    """
+    Drop the cached state used to validate refresh tokens, so that deactivating or deleting
+    a user takes effect on their next refresh.
+    """
+    forget_user_state(instance.pk)
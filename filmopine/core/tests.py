@@ -1,8 +1,36 @@
-from django.test import TestCase
-from .models import User
+import gzip
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import OperationalError, ProgrammingError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from .models import User, ProfilingSession, ProfiledRequest
 from .serializers import UserCreateSerializer, UserSerializer
 from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIClient
+from .db_routers import PrimaryReplicaRouter, ReplicaHealth, health as replica_health, use_primary
+from .middleware import CompressionMiddleware, MemoryProfilingMiddleware, ProfilingMiddleware, ReplicaRoutingMiddleware, TrafficCaptureMiddleware, client_key
+from .idempotency import IdempotentRequest
+from .compression import negotiate_encoding, stats as compression_stats
+from .db.pool import ConnectionPool, PoolTimeout
+from . import openapi
+from .throttling import TokenBucket, omdb_budget_allows
+from . import composite, memory, profiling, traffic, warmup
+from .ids import uuid7
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import got_request_exception
+from django.urls import ResolverMatch
+import threading
+import time
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from rest_framework_simplejwt.tokens import AccessToken
+from movie.models import Movie
+from review.models import Review
 
 class UserModelTest(TestCase):
     """
@@ -84,7 +112,13 @@ class UserSerializerTest(TestCase):
             "username": "testuser",
             "email": "testuser@example.com",
             "first_name": "Test",
-            "last_name": "User"
+            "last_name": "User",
+            "review_stats": {
+                "reviews_count": 0,
+                "average_rating": Decimal("0.00"),
+                "rating_distribution": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+                "last_reviewed_at": None
+            }
         }
         self.assertEqual(serializer.data, expected_data)
 
@@ -123,3 +157,870 @@ class ApiHomeViewTest(TestCase):
         }
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, expected_data)
+
+
+@override_settings(DATABASE_REPLICAS={'replica1': 1})
+class ReplicaRoutingTest(SimpleTestCase):
+    """
+    Test case for the primary/replica database router and its middleware.
+    """
+
+    def setUp(self):
+        """
+        Pretend the replica is healthy and start with an empty stickiness cache.
+        """
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch('core.db_routers.health.is_healthy', return_value=True)
+        self.is_healthy = patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def route(self, request):
+        """
+        Run a request through the middleware and return the database reads were routed to.
+        """
+        routed = {}
+
+        def get_response(request):
+            routed['db'] = self.router.db_for_read(User)
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        ReplicaRoutingMiddleware(get_response)(request)
+        return routed['db']
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        """
+        Test that reads use the replica and writes always use the primary.
+        """
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        """
+        Test that reads use the primary when no replica is healthy.
+        """
+        self.is_healthy.return_value = False
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_read_your_writes(self):
+        """
+        Test that a client is pinned to the primary right after writing, and others are not.
+        """
+        self.assertEqual(self.route(self.factory.get('/api/movies/', REMOTE_ADDR='10.0.0.1')), 'replica1')
+        self.assertEqual(self.route(self.factory.post('/api/reviews/', REMOTE_ADDR='10.0.0.1')), 'default')
+        self.assertEqual(self.route(self.factory.get('/api/movies/', REMOTE_ADDR='10.0.0.1')), 'default')
+        self.assertEqual(self.route(self.factory.get('/api/movies/', REMOTE_ADDR='10.0.0.2')), 'replica1')
+        self.assertFalse(use_primary.get())
+
+    def test_failing_replica_marked_unhealthy(self):
+        """
+        Test that a replica whose connection failed during a request is taken out of rotation.
+        """
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        replica = mock.Mock(errors_occurred=True)
+        with mock.patch('core.db_routers.connections', {'replica1': replica}), mock.patch('core.db_routers.health.mark_unhealthy') as mark_unhealthy:
+            middleware.process_exception(self.factory.get('/api/movies/'), ProgrammingError())
+            mark_unhealthy.assert_not_called()
+            middleware.process_exception(self.factory.get('/api/movies/'), OperationalError())
+            mark_unhealthy.assert_called_once_with('replica1')
+
+        health = ReplicaHealth()
+        health.mark_unhealthy('replica1')
+        with mock.patch.object(health, 'check') as check:
+            self.assertFalse(health.is_healthy('replica1'))
+        check.assert_not_called()
+
+
+
+class ReplicaDatabaseTest(TransactionTestCase):
+    """
+    Test case for the replica routing against two real databases (see filmopine.test_settings).
+
+    A TransactionTestCase: inside the transaction of a TestCase, every read would stay on
+    the primary, as the router does for open transactions.
+    """
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        """
+        Put a different movie on each database, forget earlier health checks and turn the
+        replica on (only for the test itself: the databases are flushed after it, which the
+        router only allows on databases that are not replicas).
+        """
+        override = override_settings(DATABASE_REPLICAS={'replica1': 1})
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        replica_health.checked_at.clear()
+        replica_health.healthy.clear()
+        # bulk_create: no signals, which would write derived rows to the primary
+        Movie.objects.using('default').bulk_create([Movie(imdb_id="tt0000001", title="On the primary")])
+        Movie.objects.using('replica1').bulk_create([Movie(imdb_id="tt0000002", title="On the replica")])
+        self.client = APIClient(REMOTE_ADDR='10.0.0.1')
+
+    def titles(self):
+        response = self.client.get('/api/movies/')
+        self.assertEqual(response.status_code, 200)
+        return sorted(movie['title'] for movie in response.json()['results'])
+
+    def test_reads_go_to_the_replica(self):
+        """
+        Test that a GET reads from the healthy replica.
+        """
+        self.assertEqual(self.titles(), ["On the replica"])
+
+    def test_writes_and_sticky_reads_go_to_the_primary(self):
+        """
+        Test that a write goes to the primary, and that the client then reads from it.
+        """
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password123", is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.post('/api/movies/', {'imdb_id': "tt0000003", 'title': "Written", 'year': "2024", 'film_type': "movie"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Movie.objects.using('default').filter(imdb_id="tt0000003").exists())
+        self.assertFalse(Movie.objects.using('replica1').filter(imdb_id="tt0000003").exists())
+        self.assertEqual(self.titles(), ["On the primary", "Written"])
+        self.assertEqual(APIClient(REMOTE_ADDR='10.0.0.2').get('/api/movies/').json()['results'][0]['title'], "On the replica")
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        """
+        Test that reads go to the primary when the replica fails its health check.
+        """
+        with mock.patch.object(ReplicaHealth, 'replication_lag', return_value=3600), self.assertLogs('core.db_routers', 'WARNING'):
+            self.assertEqual(self.titles(), ["On the primary"])
+
+class FakeConnection:
+    """
+    Stand-in for a DB-API connection.
+    """
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """
+    Test case for the bounded database connection pool.
+    """
+
+    def setUp(self):
+        """
+        Set up a pool of two fake connections with a pre-ping health check.
+        """
+        def ping(connection):
+            if not connection.alive:
+                raise ConnectionError("gone away")
+
+        self.pool = ConnectionPool(FakeConnection, max_size=2, timeout=0.05, ping=ping)
+
+    def test_connections_are_reused(self):
+        """
+        Test that a released connection is handed out again instead of opening a new one.
+        """
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+        self.assertEqual(self.pool.stats()['created'], 1)
+
+    def test_exhausted_pool_times_out(self):
+        """
+        Test that waiting for a connection is bounded and counted.
+        """
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        stats = self.pool.stats()
+        self.assertEqual((stats['in_use'], stats['waits'], stats['timeouts']), (2, 1, 1))
+
+    def test_broken_connection_is_replaced(self):
+        """
+        Test that a connection failing the pre-ping is discarded and replaced.
+        """
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.alive = False
+
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        stats = self.pool.stats()
+        self.assertEqual((stats['size'], stats['discarded']), (1, 1))
+
+
+class MetricsViewTest(TestCase):
+    """
+    Test case for the admin-only metrics view.
+    """
+
+    def test_metrics_require_admin(self):
+        """
+        Test that only staff users can read the metrics.
+        """
+        client = APIClient()
+        self.assertEqual(client.get('/api/metrics/').status_code, 401)
+
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password123", is_staff=True)
+        client.force_authenticate(user=admin)
+        response = client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('metrics', response.data)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024, COMPRESSION_CONTENT_TYPES=['application/json'])
+class CompressionMiddlewareTest(SimpleTestCase):
+    """
+    Test case for the negotiated response compression middleware.
+    """
+
+    def setUp(self):
+        """
+        Start every test with empty compression statistics.
+        """
+        self.factory = RequestFactory()
+        self.payload = {'results': [{'title': f'Movie {i}', 'poster': 'https://m.media-amazon.com/images/M/poster.jpg'} for i in range(100)]}
+        compression_stats.reset()
+
+    def process(self, response, accept_encoding='gzip, deflate'):
+        request = self.factory.get('/api/movies/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate_encoding(self):
+        """
+        Test Accept-Encoding negotiation with q-values, wildcards and exclusions.
+        """
+        self.assertEqual(negotiate_encoding('gzip, br', supported=('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5', supported=('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('*', supported=('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('*;q=0.5, br;q=0', supported=('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('identity', supported=('br', 'gzip')), None)
+        self.assertEqual(negotiate_encoding('br', supported=('gzip',)), None)
+        self.assertEqual(negotiate_encoding('', supported=('gzip',)), None)
+
+    def test_large_json_is_compressed(self):
+        """
+        Test that a large JSON response is gzipped and the savings are recorded.
+        """
+        original = JsonResponse(self.payload)
+        body = original.content
+        response = self.process(original)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        endpoint = compression_stats.snapshot()['unresolved']
+        self.assertEqual(endpoint['responses'], 1)
+        self.assertEqual(endpoint['bytes_saved'], len(body) - len(response.content))
+
+    def test_responses_left_untouched(self):
+        """
+        Test that small, non-JSON, already encoded or unaccepted responses are not compressed.
+        """
+        self.assertFalse(self.process(JsonResponse({'id': 1})).has_header('Content-Encoding'))
+        self.assertFalse(self.process(HttpResponse('x' * 5000, content_type='text/plain')).has_header('Content-Encoding'))
+        self.assertFalse(self.process(JsonResponse(self.payload), accept_encoding='identity').has_header('Content-Encoding'))
+
+        cached = HttpResponse(gzip.compress(b'{}' * 1000), content_type='application/json')
+        cached['Content-Encoding'] = 'gzip'
+        self.assertEqual(gzip.decompress(self.process(cached).content), b'{}' * 1000)
+        self.assertEqual(compression_stats.snapshot(), {})
+
+    def test_streaming_response(self):
+        """
+        Test that streaming responses are compressed chunk by chunk.
+        """
+        chunks = [json.dumps(movie).encode() + b'\n' for movie in self.payload['results']]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+        self.assertEqual(compression_stats.snapshot()['unresolved']['bytes_in'], len(b''.join(chunks)))
+
+
+class SchemaArtifactTest(TestCase):
+    """
+    Test case for the pre-generated OpenAPI schema and its views.
+    """
+
+    def setUp(self):
+        """
+        Point the artifact path to a temporary directory and forget any loaded schema.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'openapi.json')
+        override = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        openapi.reset_artifact()
+        self.addCleanup(openapi.reset_artifact)
+
+    def test_artifact_is_served_with_etag(self):
+        """
+        Test that the written artifact is served with its version as ETag and long cache headers.
+        """
+        artifact = openapi.write_artifact()
+        self.assertEqual(openapi.read_artifact(), artifact)
+
+        response = self.client.get('/swagger.json/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, artifact.content)
+        self.assertEqual(response['ETag'], f'"{artifact.version}"')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertIn('/api/movies/', json.loads(response.content)['paths'])
+
+        response = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=f'"{artifact.version}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_schema_generated_once_without_artifact(self):
+        """
+        Test that, without an artifact, the schema is generated on first use only.
+        """
+        with mock.patch('core.openapi.generate_schema', wraps=openapi.generate_schema) as generate:
+            self.client.get('/swagger.json/')
+            self.client.get('/swagger.json/')
+        self.assertEqual(generate.call_count, 1)
+
+    def test_ui_loads_pre_generated_schema(self):
+        """
+        Test that the Swagger and ReDoc pages point to the artifact without generating the schema.
+        """
+        with mock.patch('core.openapi.generate_schema') as generate:
+            for url in ('/swagger/', '/redoc/'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'/swagger.json/', response.content)
+        generate.assert_not_called()
+
+
+class ThrottlingTest(TestCase):
+    """
+    Test case for the GCRA token bucket throttles.
+    """
+
+    def setUp(self):
+        """
+        Start with empty buckets.
+        """
+        cache.clear()
+
+    def test_token_bucket(self):
+        """
+        Test that a bucket allows a burst of `capacity` requests, then refills at the given rate.
+        """
+        bucket = TokenBucket(cache, 'test-bucket', capacity=3, duration=3)
+        self.assertEqual([bucket.consume(now=100.0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.consume(now=100.0), 1.0)
+        self.assertAlmostEqual(bucket.consume(now=100.5), 0.5) # Refused requests do not take tokens
+        self.assertEqual(bucket.consume(now=101.0), 0)
+        self.assertGreater(bucket.consume(now=101.0), 0)
+        self.assertEqual([bucket.consume(now=200.0) for _ in range(3)], [0, 0, 0]) # Full again after idling
+
+    def test_ip_throttle(self):
+        """
+        Test that a client going over its IP rate gets a 429 with Retry-After, while others do not.
+        """
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'ip': '2/min'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            client = APIClient()
+            self.assertEqual(client.get('/api/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+            self.assertEqual(client.get('/api/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+            response = client.get('/api/', REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+            self.assertEqual(client.get('/api/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_omdb_budget(self):
+        """
+        Test that a search refused by the global OMDb budget does not spend the client's budget.
+        """
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'omdb': '1/min', 'omdb_global': '1/min'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            first, second = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1'), RequestFactory().get('/', REMOTE_ADDR='10.0.0.2')
+            self.assertTrue(omdb_budget_allows(first))
+            self.assertFalse(omdb_budget_allows(second)) # Global quota exhausted
+            cache.delete('throttle_omdb_global') # The global quota is available again
+            self.assertTrue(omdb_budget_allows(second))
+            self.assertFalse(omdb_budget_allows(first)) # Client budget exhausted
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingTest(TestCase):
+    """
+    Test case for the live-traffic sampling profiler.
+    """
+
+    def setUp(self):
+        """
+        Forget the sessions cached by previous tests.
+        """
+        profiling.active_sessions.clear()
+        cache.clear()
+
+    def test_middleware_not_loaded_when_disabled(self):
+        """
+        Test that the middleware removes itself when profiling is off.
+        """
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_stack_sampler(self):
+        """
+        Test that the sampler records the stacks of a registered thread.
+        """
+        stacks = profiling.sampler.start(threading.get_ident(), 0.001)
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        profiling.sampler.stop(threading.get_ident())
+        self.assertTrue(any('ProfilingTest.test_stack_sampler' in stack for stack in stacks))
+
+    def test_sampled_view(self):
+        """
+        Test that requests to the session's view are profiled and counted, and other views are not.
+        """
+        session = ProfilingSession.objects.create(name="home", view_name="api_home", sample_rate=1.0, interval_ms=1)
+        self.client.get('/api/')
+        self.client.get('/api/metrics/')
+        profiled = ProfiledRequest.objects.get()
+        self.assertEqual((profiled.session, profiled.view_name, profiled.path), (session, 'api_home', '/api/'))
+        session.refresh_from_db()
+        self.assertEqual(session.requests_profiled, 1)
+
+    def test_signed_header(self):
+        """
+        Test that only a valid signed X-Profile header forces profiling.
+        """
+        session = ProfilingSession.objects.create(name="any view", sample_rate=0)
+        self.client.get('/api/', HTTP_X_PROFILE=profiling.signed_header(session) + 'x')
+        self.assertFalse(ProfiledRequest.objects.exists())
+        self.client.get('/api/', HTTP_X_PROFILE=profiling.signed_header(session))
+        self.assertEqual(ProfiledRequest.objects.get().view_name, 'api_home')
+
+    def test_admin_download(self):
+        """
+        Test that the aggregated collapsed stacks can be downloaded from the admin.
+        """
+        session = ProfilingSession.objects.create(name="home", view_name="api_home")
+        ProfiledRequest.objects.create(session=session, view_name='api_home', path='/api/', duration_ms=1, stacks={'a;b': 2, 'a': 1})
+        ProfiledRequest.objects.create(session=session, view_name='api_home', path='/api/', duration_ms=1, stacks={'a;b': 3})
+        admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="password123")
+        self.client.force_login(admin)
+        response = self.client.get(f'/admin/core/profilingsession/{session.pk}/collapsed/?view=api_home')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), 'a 1\na;b 5\n')
+
+
+class CompositeAPIViewTest(TestCase):
+    """
+    Test case for composite requests.
+    """
+
+    def setUp(self):
+        """
+        Set up an authenticated client.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username="composite", email="composite@example.com", password="password123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, requests, **extra):
+        return self.client.post('/api/batch/', {'requests': requests, **extra}, format='json')
+
+    def test_sub_requests_in_order(self):
+        """
+        Test that sub-requests run with the outer user and come back in order, errors included.
+        """
+        response = self.post([
+            {'id': 'me', 'path': '/api/reviews/me/?page=1'},
+            {'id': 'home', 'path': '/api/'},
+            {'id': 'missing', 'path': '/api/movies/999/'},
+            {'id': 'nowhere', 'path': '/api/does-not-exist/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([(entry['id'], entry['status']) for entry in responses], [('me', 200), ('home', 200), ('missing', 404), ('nowhere', 404)])
+        self.assertEqual(responses[0]['body']['results'], [])
+        self.assertEqual(responses[1]['body']['name'], "Film Opine API")
+
+    def test_parallel(self):
+        """
+        Test that parallel sub-requests return the same responses.
+        """
+        response = self.post([{'id': str(i), 'path': '/api/'} for i in range(3)], parallel=True)
+        self.assertEqual([entry['status'] for entry in response.json()['responses']], [200, 200, 200])
+
+    def test_limits(self):
+        """
+        Test that nesting, non-API paths and too many sub-requests are refused.
+        """
+        responses = self.post([{'id': 'nested', 'path': '/api/batch/'}, {'id': 'admin', 'path': '/admin/'}]).json()['responses']
+        self.assertEqual([entry['status'] for entry in responses], [400, 400])
+        with override_settings(COMPOSITE_MAX_REQUESTS=1):
+            self.assertEqual(self.post([{'id': 'a', 'path': '/api/'}, {'id': 'b', 'path': '/api/'}]).status_code, 400)
+        with override_settings(COMPOSITE_MAX_RESPONSE_BYTES=10):
+            self.assertEqual(self.post([{'id': 'home', 'path': '/api/'}]).json()['responses'][0]['status'], 413)
+
+    def test_failed_sub_request_is_reported(self):
+        """
+        Test that an exception in a sub-request is logged and signalled, not only turned into a 500.
+        """
+        def broken_view(request):
+            raise RuntimeError("broken")
+
+        self.client.raise_request_exception = False # The test client re-raises the exceptions it is signalled
+        receiver = mock.Mock()
+        got_request_exception.connect(receiver)
+        self.addCleanup(got_request_exception.disconnect, receiver)
+        with mock.patch.object(composite, 'resolve', return_value=ResolverMatch(broken_view, (), {})):
+            with self.assertLogs('core.composite', 'ERROR') as logs:
+                responses = self.post([{'id': 'broken', 'path': '/api/broken/'}]).json()['responses']
+        self.assertEqual(responses[0]['status'], 500)
+        self.assertIn('RuntimeError', logs.output[0])
+        receiver.assert_called_once()
+
+class UUID7Test(SimpleTestCase):
+    """
+    Test case for the time-ordered UUIDs used as primary keys.
+    """
+
+    def test_version_and_order(self):
+        """
+        Test that the UUIDs are valid version 7 UUIDs, ordered by creation time.
+        """
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+        self.assertEqual((first.version, first.variant), (7, 'specified in RFC 4122'))
+        self.assertLess(first, second)
+        self.assertLess(first.hex, second.hex) # Also ordered as stored in CHAR(32) columns
+        self.assertAlmostEqual(first.int >> 80, time.time() * 1000, delta=1000)
+
+
+class IdempotencyTest(TestCase):
+    """
+    Test case for the Idempotency-Key support of unsafe requests.
+    """
+
+    def setUp(self):
+        """
+        Set up two users with JWTs and a movie to review.
+        """
+        cache.clear()
+        self.users = [User.objects.create_user(username=f"retrier{i}", email=f"retrier{i}@example.com", password="password123") for i in range(2)]
+        self.tokens = [f"JWT {AccessToken.for_user(user)}" for user in self.users]
+        movie = Movie.objects.create(imdb_id="tt0001", title="Retried", year="2000", film_type="movie")
+        self.body = json.dumps({
+            'content_type': ContentType.objects.get_for_model(Movie).id, 'object_id': movie.id,
+            'review_title': "Title", 'review_content': "Content", 'rating': 4.0,
+        })
+        self.client = APIClient()
+
+    def post(self, key, body=None, user=0):
+        return self.client.post(
+            '/api/reviews/', body or self.body, content_type='application/json',
+            HTTP_AUTHORIZATION=self.tokens[user], HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_response(self):
+        """
+        Test that a retry gets the stored response without reaching the view or the database.
+        """
+        first = self.post('key-1')
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(0):
+            retry = self.post('key-1')
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_key_scope(self):
+        """
+        Test that keys are bound to their first request and scoped per user, and must be valid.
+        """
+        self.assertEqual(self.post('key-1').status_code, 201)
+        self.assertEqual(self.post('key-1', body=self.body.replace('"Title"', '"Other"')).status_code, 422)
+        self.assertEqual(self.post('key-1', user=1).status_code, 201)
+        self.assertEqual(self.post('x' * 256).status_code, 400)
+
+    def test_concurrent_duplicate(self):
+        """
+        Test that a duplicate of a request in flight waits for its response, or gets a 409 once it gave up waiting.
+        """
+        request = RequestFactory().post(
+            '/api/reviews/', self.body, content_type='application/json',
+            HTTP_AUTHORIZATION=self.tokens[0], HTTP_IDEMPOTENCY_KEY='key-1'
+        )
+        idempotent = IdempotentRequest(request, client_key(request))
+        cache.set(idempotent.cache_key, idempotent.in_flight_entry())
+
+        with override_settings(IDEMPOTENCY_WAIT=0):
+            response = self.post('key-1')
+        self.assertEqual(response.status_code, 409)
+
+        first_response = HttpResponse(b'{"id":"first"}', status=201, content_type='application/json')
+        timer = threading.Timer(0.2, cache.set, (idempotent.cache_key, idempotent.entry_for(first_response)))
+        timer.start()
+        response = self.post('key-1')
+        timer.join()
+        self.assertEqual((response.status_code, response.content), (201, b'{"id":"first"}'))
+
+
+class PasswordHashingTest(TestCase):
+    """
+    Test case for the tunable password hashing and the cached refresh token validation.
+    """
+
+    def setUp(self):
+        """
+        Set up a user whose password was hashed with 1000 PBKDF2 iterations.
+        """
+        cache.clear()
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.user = User.objects.create_user(username="login", email="login@example.com", password="password123")
+        self.client = APIClient()
+
+    def login(self):
+        return self.client.post('/auth/jwt/create/', {'username': "login", 'password': "password123"}, format='json')
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=2000)
+    def test_rehash_on_login(self):
+        """
+        Test that a password hashed under another policy is rehashed on the next successful login.
+        """
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password("password123"))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_refresh_from_cache(self):
+        """
+        Test that refreshes query the database once per user, and are refused once the user is deactivated.
+        """
+        refresh = self.login().json()['refresh']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.post('/auth/jwt/refresh/', {'refresh': refresh}, format='json').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post('/auth/jwt/refresh/', {'refresh': refresh}, format='json').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.post('/auth/jwt/refresh/', {'refresh': refresh}, format='json').status_code, 401)
+
+
+class TrafficCaptureTest(TestCase):
+    """
+    Test case for the traffic capture and replay harness.
+    """
+
+    def setUp(self):
+        """
+        Capture every read request to a temporary log.
+        """
+        cache.clear()
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+        override = override_settings(TRAFFIC_CAPTURE_RATE=1.0, TRAFFIC_CAPTURE_PATH=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_middleware_not_loaded_when_disabled(self):
+        """
+        Test that the middleware removes itself when the capture rate is 0.
+        """
+        with override_settings(TRAFFIC_CAPTURE_RATE=0):
+            with self.assertRaises(MiddlewareNotUsed):
+                TrafficCaptureMiddleware(lambda request: HttpResponse())
+
+    def test_anonymized_capture(self):
+        """
+        Test that sampled reads are logged with their route and parameters, but without credentials.
+        """
+        client = APIClient()
+        client.get('/api/reviews/search/?movie_title=matrix&rating=4&apikey=secret', HTTP_AUTHORIZATION='JWT not-a-token')
+        client.get('/api/movies/')
+        client.post('/api/movies/', {'title': "Not captured"}, format='json')
+
+        entries = traffic.read_log(self.path)
+        self.assertEqual([entry['view'] for entry in entries], ['review-search', 'movie-list'])
+        search = entries[0]
+        self.assertEqual(search['params'], {'movie_title': ['matrix'], 'rating': ['4'], 'apikey': ['<redacted>']})
+        self.assertEqual((search['method'], search['route'], search['auth'], search['status']), ('GET', 'api/reviews/search/', 'jwt', 401))
+        self.assertNotIn('not-a-token', open(self.path).read())
+        self.assertEqual(traffic.request_url(search), '/api/reviews/search/?movie_title=matrix&rating=4&apikey=%3Credacted%3E')
+
+    def test_replay_and_compare(self):
+        """
+        Test that replays keep the capture order and that comparisons catch different responses.
+        """
+        entries = [{'t': 100.0 + i / 100, 'view': 'movie-list', 'path': '/api/movies/', 'params': {'page': [str(i)]}} for i in range(5)]
+        body = lambda page: json.dumps({'page': page, 'updated_at': time.time()}).encode()
+        baseline = traffic.replay(entries, lambda entry: (200, body(entry['params']['page'][0])), speedup=10, concurrency=2, ignored_fields=['updated_at'])
+        candidate = traffic.replay(entries, lambda entry: (200, body(entry['params']['page'][0])), speedup=0, ignored_fields=['updated_at'])
+        self.assertEqual([result['i'] for result in baseline], list(range(5)))
+        self.assertEqual(traffic.compare_runs(baseline, candidate)['mismatched'], [])
+
+        changed = traffic.replay(entries, lambda entry: (200 if entry['params']['page'] != ['3'] else 500, b'{}'), speedup=0)
+        comparison = traffic.compare_runs(baseline, changed)
+        self.assertEqual(comparison['overall']['count'], 5)
+        self.assertEqual(comparison['views']['movie-list']['mismatches'], 5)
+        with self.assertRaises(ValueError):
+            traffic.compare_runs(baseline, changed[:2])
+
+
+LEAKED = [] # Grown by the leaky view of MemoryProfilingTest
+
+
+class MemoryProfilingTest(TestCase):
+    """
+    Test case for the per-view memory profiling.
+    """
+
+    def setUp(self):
+        """
+        Trace every request, starting from empty totals.
+        """
+        memory.tracker.reset()
+        self.addCleanup(memory.tracker.reset)
+        override = override_settings(MEMORY_PROFILING_RATE=1.0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_middleware_not_loaded_when_disabled(self):
+        """
+        Test that the middleware removes itself when the profiling rate is 0.
+        """
+        with override_settings(MEMORY_PROFILING_RATE=0):
+            with self.assertRaises(MiddlewareNotUsed):
+                MemoryProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_retained_memory_charged_to_the_leaking_line(self):
+        """
+        Test that what a request leaves allocated is charged to its view and allocating line.
+        """
+        def leaky_view(request):
+            request.resolver_match = mock.Mock(view_name='leaky')
+            LEAKED.append([object() for _ in range(1000)])
+            return HttpResponse()
+
+        middleware = MemoryProfilingMiddleware(leaky_view)
+        for _ in range(3):
+            middleware(RequestFactory().get('/leaky/'))
+        LEAKED.clear()
+
+        stats = memory.tracker.report(limit=1)['views']['leaky']
+        self.assertEqual(stats['requests'], 3)
+        self.assertGreater(stats['retained_bytes'], 3 * 1000 * 16)
+        top = stats['top_allocators'][0]
+        self.assertTrue(top['line'].startswith('core/tests.py:'))
+        self.assertEqual(top['source'], 'LEAKED.append([object() for _ in range(1000)])')
+
+    def test_memory_view(self):
+        """
+        Test that only staff users can read and reset the memory report of a worker.
+        """
+        client = APIClient()
+        client.get('/api/movies/')
+        self.assertEqual(client.get('/api/metrics/memory/').status_code, 401)
+
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password123", is_staff=True)
+        client.force_authenticate(admin)
+        response = client.get('/api/metrics/memory/', {'view': 'movie-list', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['views']), ['movie-list'])
+        self.assertLessEqual(len(response.data['views']['movie-list']['top_allocators']), 5)
+        self.assertEqual(client.delete('/api/metrics/memory/').status_code, 204)
+        self.assertNotIn('movie-list', memory.tracker.report()['views'])
+
+
+class WarmupTest(TestCase):
+    """
+    Test case for the worker warm-up and the readiness endpoint.
+    """
+
+    def setUp(self):
+        """
+        Start from a cold process.
+        """
+        def reset():
+            warmup.state.status = 'cold'
+            warmup.state.timings = {}
+            warmup.state.failed = []
+
+        reset()
+        self.addCleanup(reset)
+
+    def test_warm_up_runs_every_step(self):
+        """
+        Test that a warm-up runs every step once and leaves the process ready.
+        """
+        Movie.objects.create(imdb_id="tt0111161", title="The Shawshank Redemption", year="1994", film_type="movie")
+        timings = warmup.warm_up()
+        self.assertEqual(list(timings), [name for name, _ in warmup.PROCESS_STEPS + warmup.WORKER_STEPS])
+        self.assertEqual(warmup.state.failed, [])
+        self.assertTrue(warmup.state.ready)
+        self.assertEqual(warmup.warm_up(), timings)
+
+    def test_warm_up_before_fork(self):
+        """
+        Test that a warm-up before forking only runs the process-wide steps, which the
+        workers then skip.
+        """
+        with mock.patch.object(warmup, 'release_connections') as release:
+            timings = warmup.warm_up(before_fork=True)
+        release.assert_called_once()
+        self.assertEqual(list(timings), [name for name, _ in warmup.PROCESS_STEPS])
+        self.assertFalse(warmup.state.ready)
+
+        with mock.patch.object(warmup, 'prime_urls') as prime_urls:
+            warmup.warm_up()
+        prime_urls.assert_not_called()
+        self.assertTrue(warmup.state.ready)
+
+    def test_failed_step_does_not_block_readiness(self):
+        """
+        Test that a failing step is reported without stopping the warm-up.
+        """
+        steps = [('broken', mock.Mock(side_effect=RuntimeError)), ('urls', warmup.prime_urls)]
+        with mock.patch.object(warmup, 'PROCESS_STEPS', steps), mock.patch.object(warmup, 'WORKER_STEPS', []):
+            with self.assertLogs('core.warmup', 'ERROR'):
+                warmup.warm_up()
+        self.assertEqual(warmup.state.failed, ['broken'])
+        self.assertEqual(list(warmup.state.timings), ['broken', 'urls'])
+        self.assertTrue(warmup.state.ready)
+
+    def test_readiness_view(self):
+        """
+        Test that the readiness endpoint answers 503 and starts the warm-up while the process
+        is cold, then 200.
+        """
+        client = APIClient()
+        with mock.patch.object(warmup, 'start_in_background') as start:
+            response = client.get('/api/ready/')
+        start.assert_called_once()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(response.data['ready'])
+
+        warmup.warm_up()
+        response = client.get('/api/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['ready'])
+        self.assertEqual(response.data['status'], 'ready')
+
+    @override_settings(WARMUP_ENABLED=False)
+    def test_disabled(self):
+        """
+        Test that with the warm-up disabled nothing runs and the process is always ready.
+        """
+        self.assertEqual(warmup.warm_up(), {})
+        self.assertEqual(APIClient().get('/api/ready/').status_code, 200)
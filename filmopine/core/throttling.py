@@ -0,0 +1,157 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+def parse_rate(rate):
+    """
+    The (capacity, duration in seconds) of a DRF rate, e.g. (120, 60) for '120/min'.
+    """
+    count, period = rate.split('/')
+    return int(count), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+class TokenBucket:
+    """
+    Token bucket stored in the shared cache, implemented as GCRA (generic cell rate algorithm).
+
+    A bucket of `capacity` tokens refills at `capacity` tokens per `duration` seconds. Rather
+    than a token count and a refill timestamp, GCRA keeps a single integer per key, the
+    "theoretical arrival time" (TAT, in microseconds): the time at which the bucket would be
+    full again. Taking a token is one atomic `incr` of the TAT by the refill interval, so
+    concurrent workers never need a read-modify-write. A request is allowed if the TAT stays
+    within `capacity` intervals of now; a refused request gives its token back with `decr`.
+
+    Each decision costs two cache round trips (`add` + `incr`), plus a `set` after an idle
+    period and a `decr`/`touch` on refusals.
+    """
+
+    def __init__(self, cache, key, capacity, duration):
+        self.cache = cache
+        self.key = key
+        self.interval = int(duration * 1_000_000 / capacity) # Microseconds per token
+        self.tolerance = self.interval * capacity
+        self.timeout = max(60, 2 * duration)
+
+    def consume(self, now=None):
+        """
+        Try to take a token.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds to wait for a token.
+        """
+        now = int((time.time() if now is None else now) * 1_000_000)
+        self.cache.add(self.key, now, timeout=self.timeout)
+        try:
+            tat = self.cache.incr(self.key, self.interval)
+        except ValueError: # The key expired between add() and incr(): the bucket is full
+            return 0
+
+        if tat - self.interval < now:
+            # The bucket was idle (TAT in the past): restart from now. Two racing requests may
+            # both get here, in which case one token is not counted.
+            self.cache.set(self.key, now + self.interval, timeout=self.timeout)
+            return 0
+
+        if tat - now <= self.tolerance:
+            return 0
+
+        # Refused: give the token back and keep the key alive while the client keeps pushing
+        self.refund()
+        self.cache.touch(self.key, self.timeout)
+        return (tat - now - self.tolerance) / 1_000_000
+
+    def refund(self):
+        """
+        Give back a token taken by consume(), e.g. when another bucket refused the request.
+        """
+        try:
+            self.cache.decr(self.key, self.interval)
+        except ValueError: # Expired meanwhile: the bucket is full
+            pass
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base class of the token bucket throttles, configured like DRF's throttles through a
+    `scope` and REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] ('capacity/period': '120/min' is a
+    bucket of 120 requests refilled at 2 per second). Buckets are kept in the
+    THROTTLE_CACHE cache, which must be shared by every worker in production.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.THROTTLE_CACHE]
+        self.wait_seconds = None
+
+    def get_rate(self):
+        # Read the rates at instantiation rather than at import time, so that they follow settings changes
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        self.wait_seconds = TokenBucket(self.cache, key, self.num_requests, self.duration).consume()
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per authenticated user.
+    """
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per client IP address, for authenticated and anonymous requests alike.
+    """
+    scope = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+class GlobalTokenBucketThrottle(TokenBucketThrottle):
+    """
+    A single bucket shared by every request, capping the total load on the database.
+    """
+    scope = 'global'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+def omdb_budget_allows(request):
+    """
+    Whether a search may call the OMDb API, under a separate and stricter budget than the
+    throttles: one bucket per client (user, or IP for anonymous requests) and a global
+    bucket matching the quota of our OMDb API key. Running out of budget does not fail the
+    request; the caller falls back to local results.
+
+    Args:
+        request (Request): The search request (authenticated already).
+
+    Returns:
+        bool: True if a token was taken from both buckets.
+    """
+    cache = caches[settings.THROTTLE_CACHE]
+    user = getattr(request, 'user', None)
+    ident = f"user{user.pk}" if user and user.is_authenticated else BaseThrottle().get_ident(request)
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    client = TokenBucket(cache, f"throttle_omdb_{ident}", *parse_rate(rates['omdb']))
+    if client.consume():
+        return False
+    if TokenBucket(cache, 'throttle_omdb_global', *parse_rate(rates['omdb_global'])).consume():
+        client.refund() # Out of global quota: the client's budget is not spent
+        return False
+    return True
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from django.conf import settings
+
+REDACTED = '<redacted>'
+MAX_PARAM_LENGTH = 200 # Longer query values are cut, to keep the log compact
+
+class CaptureLog:
+    """
+    Append-only JSON Lines file of sampled requests, shared by the threads of a worker.
+
+    Each entry is written with a single write() on a file opened in append mode, so the
+    lines of several workers writing to the same file do not interleave.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+
+    def write(self, entry):
+        line = json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file is None or self.path != settings.TRAFFIC_CAPTURE_PATH:
+                if self.file is not None:
+                    self.file.close()
+                self.path = settings.TRAFFIC_CAPTURE_PATH
+                self.file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            self.file.write(line)
+
+capture_log = CaptureLog()
+
+def should_capture(request):
+    return request.method in settings.TRAFFIC_CAPTURE_METHODS and random.random() < settings.TRAFFIC_CAPTURE_RATE
+
+def auth_class(request):
+    """
+    How the request authenticates ('jwt' or 'anonymous'), without recording any credential.
+    """
+    return 'jwt' if request.headers.get('Authorization') else 'anonymous'
+
+def anonymized_params(request):
+    """
+    The query parameters of a request, with the values of TRAFFIC_CAPTURE_REDACTED_PARAMS
+    replaced and long values cut. Repeated parameters keep all their values.
+    """
+    params = {}
+    for name, values in request.GET.lists():
+        if name.lower() in settings.TRAFFIC_CAPTURE_REDACTED_PARAMS:
+            values = [REDACTED for _ in values]
+        params[name] = [value[:MAX_PARAM_LENGTH] for value in values]
+    return params
+
+def capture_entry(request, response, started, duration):
+    """
+    The log entry of a request: no body, no headers, no client identity.
+    """
+    match = request.resolver_match
+    return {
+        't': round(started, 3),
+        'method': request.method,
+        'path': request.path_info,
+        'route': match.route if match else None,
+        'view': match.view_name if match else None,
+        'params': anonymized_params(request),
+        'auth': auth_class(request),
+        'status': response.status_code,
+        'ms': round(duration * 1000, 2),
+    }
+
+def read_log(path):
+    """
+    The entries of a capture log (or of a replay result file), in file order.
+    """
+    with open(path, encoding='utf-8') as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+def request_url(entry):
+    """
+    The path and query string to replay a captured entry with.
+    """
+    query = urlencode([(name, value) for name, values in entry['params'].items() for value in values])
+    return entry['path'] + ('?' + query if query else '')
+
+def without_fields(data, fields):
+    if isinstance(data, dict):
+        return {key: without_fields(value, fields) for key, value in data.items() if key not in fields}
+    if isinstance(data, list):
+        return [without_fields(value, fields) for value in data]
+    return data
+
+def checksum(content, ignored_fields=()):
+    """
+    Checksum of a response body. For JSON bodies, the `ignored_fields` (at any depth) are
+    left out first, so that timestamps refreshed by every request (e.g. the `updated_at`
+    of movies re-fetched from OMDb) do not count as differences.
+    """
+    if ignored_fields:
+        try:
+            data = json.loads(content)
+        except ValueError:
+            pass
+        else:
+            content = json.dumps(without_fields(data, set(ignored_fields)), sort_keys=True).encode()
+    return hashlib.sha256(content).hexdigest()[:16]
+
+def replay(entries, send, speedup=1.0, concurrency=8, ignored_fields=()):
+    """
+    Replay captured entries through `send`, keeping their original pacing.
+
+    Entries are started at their captured time offsets divided by `speedup` (0 sends them
+    as fast as `concurrency` allows), by a pool of `concurrency` threads. The latency is
+    measured from the moment a request is sent, so a pool falling behind shows up as
+    requests starting late, not as slower responses.
+
+    Args:
+        entries (list): Captured entries, in capture order.
+        send (callable): `send(entry)` performs the request and returns (status, body bytes).
+        speedup (float): Time compression of the capture (2 replays twice as fast).
+        concurrency (int): Requests in flight at most.
+        ignored_fields (iterable): JSON fields left out of the checksums (see checksum()).
+
+    Returns:
+        list: One result per entry, in entry order: {'i', 'view', 'status', 'ms', 'checksum',
+            'bytes', 'late_ms'}.
+    """
+    results = [None] * len(entries)
+    first = entries[0]['t'] if entries else 0
+    started = time.perf_counter()
+
+    def run(index, entry, due):
+        sent = time.perf_counter()
+        try:
+            status, content = send(entry)
+        except Exception as exc:
+            status, content = 0, repr(exc).encode() # Connection errors count as failed requests
+        results[index] = {
+            'i': index, 'view': entry.get('view'), 'status': status,
+            'ms': round((time.perf_counter() - sent) * 1000, 2), 'checksum': checksum(content, ignored_fields),
+            'bytes': len(content), 'late_ms': round(max(0, sent - due) * 1000, 2),
+        }
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, entry in enumerate(entries):
+            due = started + ((entry['t'] - first) / speedup if speedup else 0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, index, entry, due)
+    return results
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49], cuts[94], cuts[98]
+
+def compare_runs(baseline, candidate):
+    """
+    Compare two replays of the same capture: latency distribution and response checksums
+    per view, and overall.
+
+    Args:
+        baseline (list): Results of replay() for the reference build.
+        candidate (list): Results of replay() for the build under test.
+
+    Returns:
+        dict: {'views': {view: {'count', 'baseline': (p50, p95, p99), 'candidate': (...),
+            'mismatches'}}, 'overall': {...}, 'mismatched': [(index, view), ...]}.
+    """
+    if len(baseline) != len(candidate):
+        raise ValueError("The runs do not replay the same capture.")
+    views = defaultdict(lambda: {'count': 0, 'baseline': [], 'candidate': [], 'mismatches': 0})
+    mismatched = []
+    for base, cand in zip(baseline, candidate):
+        mismatch = (base['status'], base['checksum']) != (cand['status'], cand['checksum'])
+        if mismatch:
+            mismatched.append((base['i'], base['view']))
+        for key in ('overall', base['view'] or 'unresolved'):
+            stats = views[key]
+            stats['count'] += 1
+            stats['baseline'].append(base['ms'])
+            stats['candidate'].append(cand['ms'])
+            stats['mismatches'] += mismatch
+
+    summary = {
+        view: {
+            'count': stats['count'], 'mismatches': stats['mismatches'],
+            'baseline': percentiles(stats['baseline']), 'candidate': percentiles(stats['candidate']),
+        }
+        for view, stats in views.items()
+    }
+    overall = summary.pop('overall', {'count': 0, 'mismatches': 0, 'baseline': (0, 0, 0), 'candidate': (0, 0, 0)})
+    return {'views': summary, 'overall': overall, 'mismatched': mismatched}
+
+def write_results(path, results):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as output:
+        for result in results:
+            output.write(json.dumps(result, separators=(',', ':')) + '\n')
@@ -1,6 +1,12 @@
 from django.urls import path
-from .views import api_home
+from .views import api_home, memory_view, metrics_view, readiness_view, CompositeAPIView
+from feed.views import FollowAPIView
 
 urlpatterns = [
     path('', api_home, name='api_home'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('metrics/memory/', memory_view, name='metrics-memory'),
+    path('ready/', readiness_view, name='ready'),
+    path('batch/', CompositeAPIView.as_view(), name='composite'),
+    path('users/<int:pk>/follow/', FollowAPIView.as_view(), name='user-follow'),
 ]
@@ -1,5 +1,16 @@
-from rest_framework.decorators import api_view
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+from drf_yasg import openapi as yasg_openapi
+from drf_yasg.views import UI_RENDERERS
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import composite, memory, metrics, openapi, warmup
+from .serializers import CompositeRequestSerializer
+from drf_yasg.utils import swagger_auto_schema
 
 @api_view(['GET'])
 def api_home(request):
@@ -37,3 +48,134 @@ def api_home(request):
         "swagger": "URL-PENDING"
     }
     return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Admin-only view exposing the runtime metrics of the worker process serving the request
+    (e.g. database connection pool usage). Each gunicorn worker keeps its own metrics.
+
+    Returns:
+        Response: A JSON object with the worker `pid` and its `metrics` groups.
+    """
+    return Response(metrics.snapshot())
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def memory_view(request):
+    """
+    Admin-only view exposing the memory growth of the worker process serving the request,
+    per view, as measured on the requests sampled by MemoryProfilingMiddleware.
+
+    Query parameters:
+        view (str): Only report this view name (e.g. 'review-search').
+        limit (int): Number of top allocating lines listed per view (default 20).
+
+    A DELETE resets the totals of the worker, e.g. after a warm-up period whose caches
+    would otherwise be reported as growth.
+
+    Returns:
+        Response: The worker `pid`, its `rss_bytes` and `rss_growth_bytes` since startup
+            (or the last reset), and the `views` ordered by retained bytes.
+    """
+    if request.method == 'DELETE':
+        memory.tracker.reset()
+        return Response(status=204)
+    try:
+        limit = max(1, int(request.query_params.get('limit', 20)))
+    except ValueError:
+        return Response({'detail': "limit must be an integer."}, status=400)
+    return Response(memory.tracker.report(request.query_params.get('view'), limit))
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def readiness_view(request):
+    """
+    Readiness probe of the worker process serving the request: 200 once its warm-up (see
+    core.warmup) is done, 503 before. Point the load balancer or orchestrator health check
+    here, so traffic only reaches warm workers.
+
+    Workers started by gunicorn with gunicorn.conf.py warm up before serving anything;
+    under other servers, the first probe starts the warm-up in the background.
+
+    Returns:
+        Response: The warm-up state: `pid`, `ready`, `status`, the `timings_ms` of each
+            step, their `total_ms`, and the `failed` steps.
+    """
+    if warmup.state.ready:
+        return Response(warmup.state.snapshot())
+    warmup.start_in_background()
+    return Response(warmup.state.snapshot(), status=503, headers={'Retry-After': '1'})
+
+@require_safe
+@condition(etag_func=lambda request: openapi.get_artifact().version)
+def schema_json(request):
+    """
+    Serve the pre-generated OpenAPI schema (see core.openapi and the generate_schema command).
+
+    The schema is not regenerated per request: the artifact is loaded once per process and
+    served with its version as ETag and a long max-age, so clients and proxies revalidate
+    with a cheap 304.
+
+    Returns:
+        HttpResponse: The OpenAPI JSON document.
+    """
+    response = HttpResponse(openapi.get_artifact().content, content_type='application/json')
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+    return response
+
+class SchemaUIView(APIView):
+    """
+    Swagger UI / ReDoc page loading the pre-generated schema from SPEC_URL (schema_json).
+
+    drf_yasg's own UI view generates the full schema just to render the page title; this
+    view hands the UI renderers a stub with the API info only.
+
+    Attributes:
+        ui (str): 'swagger' or 'redoc'.
+    """
+    ui = 'swagger'
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    swagger_schema = None # Not part of the schema itself
+
+    def get_renderers(self):
+        return [renderer() for renderer in UI_RENDERERS[self.ui]]
+
+    def get(self, request):
+        return Response(yasg_openapi.Swagger(info=openapi.api_info, _prefix='/', paths=yasg_openapi.Paths(paths={})))
+
+class CompositeAPIView(APIView):
+    """
+    API View running several API reads in one round trip.
+
+    A page that needs e.g. `/api/movies/<id>/`, `/api/movies/<id>/reviews/` and
+    `/api/reviews/me/` can send them as one composite request. The sub-requests are
+    executed in-process, without going through the middleware again, with the user the
+    composite request was authenticated as (the JWT is decoded once) and the same
+    database connection, or concurrently with `parallel` (see core.composite).
+
+    Limits: GET sub-requests to /api/ paths only, at most COMPOSITE_MAX_REQUESTS of them,
+    each response at most COMPOSITE_MAX_RESPONSE_BYTES; every sub-request goes through the
+    throttles of its own view.
+
+    Methods:
+        post(request): Executes the sub-requests and returns their responses in order.
+    """
+    composite = True # Marks the view so that it cannot be nested in itself
+
+    @swagger_auto_schema(request_body=CompositeRequestSerializer, responses={200: "Responses of the sub-requests, in request order", 400: "Invalid composite request"})
+    def post(self, request):
+        """
+        Handles POST requests: `{"requests": [{"id": "movie", "path": "/api/movies/1/"}, ...], "parallel": false}`.
+
+        Returns:
+            HttpResponse: `{"responses": [{"id": "movie", "status": 200, "body": {...}}, ...]}`.
+        """
+        serializer = CompositeRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        body = composite.execute_all(request, serializer.validated_data['requests'], serializer.validated_data['parallel'])
+        return HttpResponse(body, content_type='application/json')
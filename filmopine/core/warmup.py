@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+def walk_patterns(patterns):
+    for pattern in patterns:
+        yield pattern
+        if hasattr(pattern, 'url_patterns'):
+            yield from walk_patterns(pattern.url_patterns)
+
+def prime_urls():
+    """
+    Populate the URL resolver (reverse lookups) and compile the regex of every route.
+    """
+    from django.urls import get_resolver
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for pattern in walk_patterns(resolver.url_patterns):
+        pattern.pattern.regex
+
+def prime_translations():
+    from django.utils import translation
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("Not found.")
+
+def prime_rest_framework():
+    """
+    Import the classes DRF, simplejwt and drf_yasg load lazily on first use.
+    """
+    from rest_framework.settings import api_settings
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+                 'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES', 'DEFAULT_PAGINATION_CLASS'):
+        getattr(api_settings, name)
+    JWTAuthentication()
+    import drf_yasg.generators # noqa: F401
+    import drf_yasg.views # noqa: F401
+
+def prime_serializers():
+    """
+    Build the fields of the serializers of the hot endpoints, which also fills the model
+    metadata caches they introspect.
+    """
+    from core.serializers import CompositeRequestSerializer, UserCreateSerializer, UserSerializer
+    from movie.serializers import MovieSerializer
+    from review.serializers import ArchivedReviewSerializer, RatingPeriodSerializer, ReviewSerializer, UserReviewStatsSerializer
+    for serializer_class in (MovieSerializer, ReviewSerializer, ArchivedReviewSerializer, RatingPeriodSerializer,
+                             UserReviewStatsSerializer, UserSerializer, UserCreateSerializer, CompositeRequestSerializer):
+        serializer_class().fields
+
+def prime_content_types():
+    """
+    Load the content type of every model into the per-process ContentType cache (one query).
+    """
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    ContentType.objects.get_for_models(*apps.get_models())
+
+def prime_openapi_schema():
+    from . import openapi
+    openapi.get_artifact()
+
+def connect_databases():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+def prime_catalog_snapshot():
+    from movie.snapshot import get_snapshot
+    get_snapshot()
+
+def prime_hot_listings():
+    """
+    Query and serialize the first page of the movie and review listings.
+    """
+    from rest_framework.settings import api_settings
+    from movie.models import Movie
+    from movie.serializers import MovieRowSerializer
+    from review.models import Review
+    from review.serializers import ReviewRowSerializer
+    MovieRowSerializer().serialize(Movie.objects.values(*MovieRowSerializer.columns)[:api_settings.PAGE_SIZE])
+    ReviewRowSerializer().serialize(Review.objects.values(*ReviewRowSerializer.columns)[:api_settings.PAGE_SIZE])
+
+# Steps whose results are process-wide: run before forking, the workers share them (copy-on-write)
+PROCESS_STEPS = [
+    ('urls', prime_urls),
+    ('translations', prime_translations),
+    ('rest_framework', prime_rest_framework),
+    ('serializers', prime_serializers),
+    ('content_types', prime_content_types),
+    ('openapi_schema', prime_openapi_schema),
+]
+
+# Steps that open connections or files, which must not be shared between processes
+WORKER_STEPS = [
+    ('databases', connect_databases),
+    ('catalog_snapshot', prime_catalog_snapshot),
+    ('hot_listings', prime_hot_listings),
+]
+
+def release_connections():
+    """
+    Close the database connections opened by the process steps, pools included.
+    """
+    for connection in connections.all(initialized_only=True):
+        close_pool = getattr(connection, 'close_pool', None) # core.db.backends.mysql_pool
+        if close_pool is not None:
+            close_pool()
+        else:
+            connection.close()
+
+class WarmupState:
+    """
+    Warm-up progress of this process, reported by the readiness endpoint.
+
+    Attributes:
+        status (str): 'cold', 'warming' or 'ready'.
+        timings (dict): Step name -> milliseconds spent, in execution order.
+        failed (list): Steps that raised (logged; the warm-up goes on without them).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = 'cold'
+        self.timings = {}
+        self.failed = []
+
+    @property
+    def ready(self):
+        return self.status == 'ready' or not settings.WARMUP_ENABLED
+
+    def snapshot(self):
+        return {
+            'pid': os.getpid(), 'ready': self.ready, 'status': self.status,
+            'timings_ms': dict(self.timings), 'total_ms': round(sum(self.timings.values()), 1), 'failed': list(self.failed),
+        }
+
+    def run(self, steps):
+        for name, step in steps:
+            if name in self.timings:
+                continue # Done before the fork
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception("Warm-up step %s failed.", name)
+                self.failed.append(name)
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+state = WarmupState()
+
+metrics.register('warmup', state.snapshot)
+
+def warm_up(before_fork=False):
+    """
+    Prime the caches of this process before it serves its first request.
+
+    Without it, the first requests of every new worker compile the URL resolver, load
+    translations and lazily imported classes, build serializer fields, query the content
+    types, load the OpenAPI schema and connect to the databases, which shows up as p99
+    spikes after each deploy or worker recycle (see gunicorn.conf.py).
+
+    With `before_fork`, only the process-wide steps run, then the database connections
+    are closed: this is for a master process preloading the app (gunicorn --preload), whose
+    workers inherit the warm caches through fork and share their memory copy-on-write.
+    Each worker then runs the remaining steps on boot, after which it reports ready.
+
+    Returns:
+        dict: Step name -> milliseconds spent (steps already done are not repeated).
+    """
+    if not settings.WARMUP_ENABLED:
+        return {}
+    with state.lock:
+        if state.status == 'ready':
+            return dict(state.timings)
+        state.status = 'warming'
+        try:
+            state.run(PROCESS_STEPS)
+            if before_fork:
+                release_connections()
+                return dict(state.timings)
+            state.run(WORKER_STEPS)
+        finally:
+            state.status = 'cold' if before_fork else 'ready'
+    logger.info("Warm-up of process %s done in %.0f ms.", os.getpid(), sum(state.timings.values()))
+    return dict(state.timings)
+
+def start_in_background():
+    """
+    Warm this process up in a thread, for servers that do not run warm_up() on boot (the
+    readiness endpoint starts it on its first call).
+    """
+    def run():
+        try:
+            warm_up()
+        finally:
+            connections.close_all() # The connections of this thread would not be reused
+
+    if state.status == 'cold':
+        threading.Thread(target=run, name='warm-up', daemon=True).start()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from feed.services import trim_feeds
+
+class Command(BaseCommand):
+    """
+    Keep activity feeds bounded by deleting every row beyond the newest FEED_MAX_ENTRIES per user.
+
+    Usage:
+        python manage.py trim_feeds
+        python manage.py trim_feeds --max-entries 200
+    """
+    help = 'Delete activity feed rows beyond the newest FEED_MAX_ENTRIES of each user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-entries', type=int, default=None, help='Rows kept per user (defaults to FEED_MAX_ENTRIES).')
+
+    def handle(self, *args, **options):
+        deleted = trim_feeds(options['max_entries'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} feed entries."))
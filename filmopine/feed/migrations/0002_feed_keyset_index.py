@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0001_initial'),
+        ('review', '0008_movie_set_null'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['owner', '-created_at', '-review'], name='feed_feeden_owner_i_b7f967_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feed_feeden_owner_i_855a6a_idx',
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import models
+from review.models import Review
+
+# Create your models here.
+class FeedEntry(models.Model):
+    """
+    One row of a user's materialized activity feed (timeline).
+
+    A row is written for every follower when a followed user creates a review
+    (fan-out-on-write), so reading a feed is a single range read on (owner, created_at, review).
+
+    Attributes:
+        owner (ForeignKey): The user whose feed the entry belongs to.
+        review (ForeignKey): The review shown in the feed.
+        created_at (DateTimeField): Creation time of the review, copied here to order the feed by index.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [['owner', 'review']]
+        indexes = [models.Index(fields=['owner', '-created_at', '-review'])] # Feed order, ties broken by review ID (keyset pages)
+
+    def __str__(self):
+        return f"{self.review_id} in feed of {self.owner_id}"
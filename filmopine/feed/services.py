@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from core.models import Follow, User
+from review.models import Review
+from .models import FeedEntry
+
+def is_celebrity(user):
+    """
+    Users with more followers than FEED_FANOUT_MAX_FOLLOWERS are not fanned out on write:
+    their reviews are merged into their followers' feeds at read time instead.
+    """
+    return user.followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS
+
+def fan_out_review(review, batch_size=1000):
+    """
+    Push a newly created review into the feed of every follower of its author.
+
+    Args:
+        review (Review): The review that was just created.
+        batch_size (int): Feed rows inserted per INSERT statement.
+
+    Returns:
+        int: The number of feeds the review was pushed to (0 for celebrity authors).
+    """
+    author = review.user
+    if is_celebrity(author):
+        return 0
+
+    pushed = 0
+    entries = []
+    follower_ids = Follow.objects.filter(followee=author).values_list('follower_id', flat=True)
+    for follower_id in follower_ids.iterator(chunk_size=batch_size):
+        entries.append(FeedEntry(owner_id=follower_id, review=review, created_at=review.created_at))
+        if len(entries) >= batch_size:
+            FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            pushed += len(entries)
+            entries = []
+    if entries:
+        FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+        pushed += len(entries)
+    return pushed
+
+def follow(follower, followee):
+    """
+    Make `follower` follow `followee` and backfill the followee's latest reviews into the feed.
+
+    Returns:
+        bool: True if a new follow was created, False if it already existed.
+    """
+    try:
+        with transaction.atomic():
+            Follow.objects.create(follower=follower, followee=followee)
+            User.objects.filter(pk=followee.pk).update(followers_count=F('followers_count') + 1)
+    except IntegrityError:
+        return False
+
+    followee.refresh_from_db(fields=['followers_count'])
+    if not is_celebrity(followee):
+        recent = Review.objects.filter(user=followee).order_by('-created_at')[:settings.FEED_FOLLOW_BACKFILL]
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(owner=follower, review=review, created_at=review.created_at) for review in recent],
+            ignore_conflicts=True
+        )
+    return True
+
+def unfollow(follower, followee):
+    """
+    Stop `follower` from following `followee` and drop the followee's reviews from the feed.
+
+    Returns:
+        bool: True if a follow was removed, False if there was none.
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower=follower, followee=followee).delete()
+        if not deleted:
+            return False
+        User.objects.filter(pk=followee.pk).update(followers_count=F('followers_count') - 1)
+        FeedEntry.objects.filter(owner=follower, review__user=followee).delete()
+    return True
+
+def older_than(cursor, id_field):
+    """
+    Filter on the rows after a (created_at, review ID) cursor in newest-first order. The
+    review ID breaks ties between reviews created at the same time, which a timestamp alone
+    would skip; a cursor without one (older `next` links) compares the timestamp only.
+    """
+    created_at, review_id = cursor
+    if review_id is None:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{id_field}__lt': review_id})
+
+def get_feed(user, before=None, limit=None):
+    """
+    Read a page of a user's activity feed, newest review first.
+
+    The materialized timeline is a single range read on the (owner, created_at, review)
+    index. Reviews of followed celebrities, which are not fanned out, are read from the
+    (user, created_at) index of Review and merged in. Reviews created at the same time are
+    ordered by ID, so that pages can resume exactly where the previous one ended.
+
+    Args:
+        user (User): The owner of the feed.
+        before (tuple, optional): Cursor (created_at, review ID) of the last review of the
+            previous page; only reviews after it are returned. The review ID may be None.
+        limit (int, optional): Page size. Defaults to settings.FEED_PAGE_SIZE.
+
+    Returns:
+        list: Up to `limit` Review instances, newest first.
+    """
+    limit = limit or settings.FEED_PAGE_SIZE
+
+    entries = FeedEntry.objects.filter(owner=user)
+    if before is not None:
+        entries = entries.filter(older_than(before, 'review_id'))
+    reviews = [entry.review for entry in entries.select_related('review').order_by('-created_at', '-review_id')[:limit]]
+
+    celebrity_ids = list(
+        Follow.objects
+        .filter(follower=user, followee__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS)
+        .values_list('followee_id', flat=True)
+    )
+    if celebrity_ids:
+        celebrity_reviews = Review.objects.filter(user_id__in=celebrity_ids)
+        if before is not None:
+            celebrity_reviews = celebrity_reviews.filter(older_than(before, 'id'))
+        reviews.extend(celebrity_reviews.order_by('-created_at', '-id')[:limit])
+        reviews = sorted({review.pk: review for review in reviews}.values(), key=lambda review: (review.created_at, review.pk), reverse=True)
+
+    return reviews[:limit]
+
+def trim_feeds(max_entries=None):
+    """
+    Delete the feed rows beyond the newest `max_entries` of every user.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    max_entries = max_entries or settings.FEED_MAX_ENTRIES
+    deleted = 0
+    owner_ids = FeedEntry.objects.values_list('owner_id', flat=True).distinct()
+    for owner_id in owner_ids.iterator():
+        cutoff = (
+            FeedEntry.objects.filter(owner_id=owner_id)
+            .order_by('-created_at')
+            .values_list('created_at', flat=True)[max_entries:max_entries + 1]
+        )
+        cutoff = list(cutoff)
+        if cutoff:
+            count, _ = FeedEntry.objects.filter(owner_id=owner_id, created_at__lte=cutoff[0]).delete()
+            deleted += count
+    return deleted
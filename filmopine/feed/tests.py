@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from movie.models import Movie
+from review.models import Review
+from .models import FeedEntry
+
+User = get_user_model()
+
+class FeedTest(TestCase):
+    """
+    Test case for following users and the activity feed.
+    """
+
+    def setUp(self):
+        """
+        Set up a reader, a reviewer and a movie to review.
+        """
+        self.reader = User.objects.create_user(username="reader", email="reader@example.com", password="password123")
+        self.reviewer = User.objects.create_user(username="reviewer", email="reviewer@example.com", password="password123")
+        self.movie = Movie.objects.create(imdb_id="tt1375666", title="Inception")
+        self.client = APIClient()
+
+    def post_review(self, title):
+        self.client.force_authenticate(user=self.reviewer)
+        response = self.client.post('/api/reviews/', {
+            'content_type': ContentType.objects.get_for_model(Movie).id,
+            'object_id': self.movie.id,
+            'review_title': title,
+            'review_content': 'Content',
+            'rating': 4.0,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def follow(self):
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.post(f'/api/users/{self.reviewer.id}/follow/')
+        self.reviewer.refresh_from_db() # JWT auth would load a fresh user on the next request
+        return response
+
+    def read_feed(self):
+        self.client.force_authenticate(user=self.reader)
+        return self.client.get('/api/feed/')
+
+    def test_follow_and_unfollow(self):
+        """
+        Test that following updates the follower count and unfollowing clears the feed.
+        """
+        self.assertEqual(self.follow().status_code, 201)
+        self.assertEqual(self.follow().status_code, 200)
+        self.reviewer.refresh_from_db()
+        self.assertEqual(self.reviewer.followers_count, 1)
+
+        self.post_review("First")
+        self.client.force_authenticate(user=self.reader)
+        self.assertEqual(self.client.delete(f'/api/users/{self.reviewer.id}/follow/').status_code, 204)
+        self.reviewer.refresh_from_db()
+        self.assertEqual(self.reviewer.followers_count, 0)
+        self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())
+
+    def test_new_review_is_fanned_out(self):
+        """
+        Test that a review created by a followed user shows up in the feed, newest first.
+        """
+        self.follow()
+        self.post_review("First")
+        self.post_review("Second")
+
+        response = self.read_feed()
+        self.assertEqual([review['review_title'] for review in response.data['results']], ["Second", "First"])
+        self.assertEqual(FeedEntry.objects.filter(owner=self.reader).count(), 2)
+
+    def test_follow_backfills_recent_reviews(self):
+        """
+        Test that reviews written before the follow are copied into the feed.
+        """
+        self.post_review("Before follow")
+        self.follow()
+        self.assertEqual(len(self.read_feed().data['results']), 1)
+
+    def read_all_pages(self):
+        titles, url = [], '/api/feed/'
+        self.client.force_authenticate(user=self.reader)
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles += [review['review_title'] for review in response.data['results']]
+            url = response.data['next']
+        return titles
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    def test_pages_keep_reviews_sharing_a_timestamp(self):
+        """
+        Test that paging through the feed returns every review once, even when several
+        reviews were created at the same time.
+        """
+        self.follow()
+        for index in range(5):
+            self.post_review(f"Review {index}")
+        created_at = Review.objects.first().created_at
+        Review.objects.update(created_at=created_at)
+        FeedEntry.objects.update(created_at=created_at)
+
+        titles = self.read_all_pages()
+        self.assertEqual(sorted(titles), [f"Review {index}" for index in range(5)])
+        with override_settings(FEED_FANOUT_MAX_FOLLOWERS=0): # Merged in at read time: same pages
+            FeedEntry.objects.all().delete()
+            self.assertEqual(self.read_all_pages(), titles)
+
+    def test_invalid_cursor(self):
+        """
+        Test that malformed cursors are rejected.
+        """
+        self.client.force_authenticate(user=self.reader)
+        self.assertEqual(self.client.get('/api/feed/', {'before': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/feed/', {'before': '2024-01-01T00:00:00Z', 'before_id': 'nope'}).status_code, 400)
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_celebrity_reviews_are_read_on_demand(self):
+        """
+        Test that reviews of users above the fan-out limit are merged in at read time.
+        """
+        self.follow()
+        self.post_review("Celebrity review")
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.read_feed().data['results'][0]['review_title'], "Celebrity review")
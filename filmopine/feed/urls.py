@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import FeedAPIView
+
+urlpatterns = [
+    path('', FeedAPIView.as_view(), name='feed'),
+]
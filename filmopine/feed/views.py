@@ -0,0 +1,101 @@
+import uuid
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from core.models import User
+from review.serializers import ReviewSerializer
+from .services import get_feed, follow, unfollow
+
+class FeedAPIView(APIView):
+    """
+    API view returning the activity feed of the authenticated user: the latest reviews
+    written by the users they follow, newest first.
+
+    The feed is paginated with a cursor: the `next` link carries the `before` timestamp
+    and `before_id` review ID of the last review of the page, so every page is a single
+    range read, however deep the client scrolls, and reviews sharing a timestamp are not
+    skipped.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'before', openapi.IN_QUERY,
+                description="Only return reviews created before this ISO 8601 timestamp (taken from the `next` link)",
+                type=openapi.TYPE_STRING, format='date-time'
+            ),
+            openapi.Parameter(
+                'before_id', openapi.IN_QUERY,
+                description="ID of the last review of the previous page, for reviews created at the `before` time (taken from the `next` link)",
+                type=openapi.TYPE_STRING, format='uuid'
+            ),
+        ],
+        responses={200: "Page of reviews from followed users"}
+    )
+    def get(self, request):
+        """
+        Retrieve a page of the current user's feed.
+
+        Returns:
+            Response: A JSON object with the serialized `results` and the `next` page link
+                    (null on the last page). An invalid `before` or `before_id` value returns a 400.
+        """
+        before = request.query_params.get('before')
+        if before is not None:
+            created_at = parse_datetime(before)
+            if created_at is None:
+                return Response({"detail": "Invalid 'before' timestamp."}, status=status.HTTP_400_BAD_REQUEST)
+            review_id = request.query_params.get('before_id')
+            try:
+                before = (created_at, uuid.UUID(review_id) if review_id else None)
+            except ValueError:
+                return Response({"detail": "Invalid 'before_id' review ID."}, status=status.HTTP_400_BAD_REQUEST)
+
+        reviews = get_feed(request.user, before=before)
+        serializer = ReviewSerializer(reviews, many=True)
+
+        next_link = None
+        if reviews:
+            next_link = replace_query_param(request.build_absolute_uri(), 'before', reviews[-1].created_at.isoformat())
+            next_link = replace_query_param(next_link, 'before_id', str(reviews[-1].pk))
+        return Response({"next": next_link, "results": serializer.data})
+
+class FollowAPIView(APIView):
+    """
+    API view to follow (POST) or unfollow (DELETE) another user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """
+        Follow the user identified by `pk`.
+
+        Returns:
+            Response: 201 when the follow was created, 200 if it already existed,
+                    400 when trying to follow yourself and 404 for unknown users.
+        """
+        followee = get_object_or_404(User, pk=pk)
+        if followee == request.user:
+            return Response({"detail": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = follow(request.user, followee)
+        return Response({"following": True}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        """
+        Unfollow the user identified by `pk`.
+
+        Returns:
+            Response: 204 when the follow was removed, 404 if there was none.
+        """
+        followee = get_object_or_404(User, pk=pk)
+        if not unfollow(request.user, followee):
+            return Response({"detail": "You are not following this user."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -3,6 +3,15 @@ ASGI config for filmopine project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived endpoints such as the review event stream (/api/movies/<id>/reviews/stream/)
+are only served through this application, e.g.:
+
+    gunicorn --pythonpath filmopine -k uvicorn.workers.UvicornWorker filmopine.asgi
+
+Under ASGI, the reads of the movie and review endpoints are served by async views
+(ASYNC_READ_VIEWS, see core.async_views), which the ASGI app turns on unless the
+environment says otherwise.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -12,5 +21,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'filmopine.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os #importing os modue
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,12 +45,20 @@ INSTALLED_APPS = [
     'drf_yasg',
     'core',
     'movie',
-    'review'
+    'review',
+    'recommendation',
+    'feed',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.StaticFilesMiddleware', # WhiteNoise, async capable
+    'core.middleware.TrafficCaptureMiddleware',
+    'core.middleware.IdempotencyMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MemoryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,6 +78,11 @@ INTERNAL_IPS = [
     # ...
 ]
 
+# Dev-only apps: loaded only when DEBUG is on, so production workers do not import them at startup
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(MIDDLEWARE.index('core.middleware.ReplicaRoutingMiddleware'), 'debug_toolbar.middleware.DebugToolbarMiddleware')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -101,6 +114,56 @@ DATABASES = {
         'HOST': config('DB_HOST'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=300, cast=int), # Keep each worker's connection open across requests (seconds)
+        'CONN_HEALTH_CHECKS': True, # Check persistent connections before reusing them in a new request
+    }
+}
+
+# Bounded connection pool for threaded/async workers (see core/db/backends/mysql_pool/base.py)
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=0, cast=int) # 0 disables the pool
+if DB_POOL_SIZE:
+    DATABASES['default'].update({
+        'ENGINE': 'core.db.backends.mysql_pool',
+        'CONN_MAX_AGE': 0, # Connections go back to the pool at the end of each request
+        'CONN_HEALTH_CHECKS': False, # The pool pings connections when handing them out
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=5, cast=float),
+            'MAX_IDLE_TIME': config('DB_POOL_MAX_IDLE_TIME', default=300, cast=int),
+        },
+    })
+
+# Read replicas: comma-separated HOST[/NAME][@WEIGHT] entries, e.g. "replica1.example.com@2,localhost/filmopine_replica".
+# Replicas share the primary's engine and credentials; NAME defaults to DB_NAME and WEIGHT to 1.
+# Safe-method reads are spread over the healthy replicas, everything else goes to the primary (see core.db_routers).
+
+DATABASE_REPLICAS = {}
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    replica, _, weight = replica.partition('@')
+    host, _, name = replica.partition('/')
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS[alias] = int(weight or 1)
+
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int) # Reads stay on the primary this long after a client writes
+REPLICA_READ_ONLY_PATHS = ['/api/batch/'] # POST endpoints that only read (composite requests)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=10, cast=int) # Replicas lagging more are skipped (MySQL only)
+REPLICA_HEALTH_CHECK_INTERVAL = 10 # Seconds between health checks of each replica
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) when running several workers
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
     }
 }
 
@@ -122,6 +185,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing policy (see core.hashers): new passwords are hashed by the first hasher, the
+# others only verify existing hashes, which are rehashed with the first one on the next login
+
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2') # 'pbkdf2', or 'argon2' (memory-hard, needs argon2-cffi)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=870000, cast=int) # Django's default; each login costs about this many SHA-256 rounds
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int) # Passes over the memory
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int) # KiB per hash
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int) # Lanes (threads) per hash
+
+PASSWORD_HASHERS = [
+    'core.hashers.TunedPBKDF2PasswordHasher',
+    'core.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if PASSWORD_HASHER == 'argon2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -153,9 +235,27 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Set the max number of items per page to 10
     'COERCE_DECIMAL_TO_STRING': False, # Disable coercing Decimal fields to strings in API responses.
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer', # orjson-backed, same bytes as rest_framework.renderers.JSONRenderer
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication', # Specifies the default authentication the API should use
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        # Token buckets in the shared cache (see core.throttling)
+        'core.throttling.GlobalTokenBucketThrottle',
+        'core.throttling.IPTokenBucketThrottle',
+        'core.throttling.UserTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        # 'capacity/period': bursts of up to `capacity` requests, refilled evenly over the period
+        'global': config('THROTTLE_RATE_GLOBAL', default='1000/s'),
+        'ip': config('THROTTLE_RATE_IP', default='600/min'),
+        'user': config('THROTTLE_RATE_USER', default='300/min'),
+        'omdb': config('THROTTLE_RATE_OMDB', default='10/min'), # OMDb-backed searches per client, then local results only
+        'omdb_global': config('THROTTLE_RATE_OMDB_GLOBAL', default='1000/d'), # OMDb API key quota
+    },
 }
 
 # Specify serializers that Djsor uses to register users (specified in the core app)
@@ -171,6 +271,121 @@ DJOSER = {
 
 SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('JWT',), # REMEMBER, when passing the token leave a space between the prefix and the key, i.e. JWT <token>
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1)
+    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.CachedTokenRefreshSerializer', # Refuses inactive users, from the cache
 }
 
+JWT_USER_STATE_CACHE_SECONDS = config('JWT_USER_STATE_CACHE_SECONDS', default=300, cast=int) # Upper bound, saving a user drops the entry
+
+# Fuzzy (typo-tolerant) movie title search backed by the trigram index in movie.models.MovieTitleTrigram
+
+FUZZY_SEARCH_THRESHOLD = config('FUZZY_SEARCH_THRESHOLD', default=0.3, cast=float) # Minimum trigram similarity (0-1) for a title to match
+FUZZY_SEARCH_CANDIDATES = config('FUZZY_SEARCH_CANDIDATES', default=200, cast=int) # Maximum number of candidate titles scored per query
+
+# Item-item recommendations (see recommendation.engine and the build_recommendations command)
+
+RECOMMENDATION_TOP_K = config('RECOMMENDATION_TOP_K', default=20, cast=int) # Neighbors stored per movie
+
+# Activity feed of reviews from followed users (see feed.services)
+
+FEED_FANOUT_MAX_FOLLOWERS = config('FEED_FANOUT_MAX_FOLLOWERS', default=10000, cast=int) # Authors with more followers are merged in at read time instead of fanned out
+FEED_MAX_ENTRIES = config('FEED_MAX_ENTRIES', default=500, cast=int) # Timeline rows kept per user by the trim_feeds command
+FEED_FOLLOW_BACKFILL = config('FEED_FOLLOW_BACKFILL', default=20, cast=int) # Latest reviews copied into a feed on follow
+FEED_PAGE_SIZE = 20
+
+# Server-Sent Events stream of new reviews per movie (see review.events, served by the ASGI app only)
+
+REVIEW_EVENTS_BROKER = config('REVIEW_EVENTS_BROKER', default='review.events.InProcessBroker') # Use review.events.CacheBroker with a shared cache for multiple workers
+REVIEW_STREAM_MAX_CONNECTIONS = config('REVIEW_STREAM_MAX_CONNECTIONS', default=5000, cast=int) # Open streams per process
+REVIEW_STREAM_QUEUE_SIZE = 32 # Events buffered per slow client before it is asked to resync
+REVIEW_STREAM_HEARTBEAT = 15 # Seconds between keep-alive comments
+REVIEW_STREAM_IDLE_TIMEOUT = config('REVIEW_STREAM_IDLE_TIMEOUT', default=300, cast=int) # Close streams without events after this many seconds
+REVIEW_STREAM_MAX_DURATION = config('REVIEW_STREAM_MAX_DURATION', default=3600, cast=int) # Close every stream after this many seconds
+REVIEW_STREAM_POLL_INTERVAL = 0.5 # Seconds between cache polls of the CacheBroker
+
+# Compression of API responses (see core.middleware.CompressionMiddleware, brotli is used when the brotli package is installed)
+
+COMPRESSION_CONTENT_TYPES = config('COMPRESSION_CONTENT_TYPES', default='application/json', cast=Csv()) # Media types that get compressed
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int) # Smaller (non-streaming) bodies are sent as is
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int) # 1 (fastest) - 9 (smallest)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int) # 0 (fastest) - 11 (smallest), 4-5 suits dynamic responses
+
+# Pre-generated OpenAPI schema (see core.openapi, build it with `python manage.py generate_schema`)
+
+OPENAPI_SCHEMA_PATH = config('OPENAPI_SCHEMA_PATH', default=os.path.join(BASE_DIR, 'openapi', 'openapi.json'))
+OPENAPI_SCHEMA_MAX_AGE = config('OPENAPI_SCHEMA_MAX_AGE', default=86400, cast=int) # Seconds clients may cache the schema before revalidating its ETag
+
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'core.openapi.api_info',
+    'SPEC_URL': 'schema-json', # The UIs load the pre-generated schema
+}
+
+REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-json',
+}
+
+# Throttling (see core.throttling): the token buckets must live in a cache shared by every worker
+
+THROTTLE_CACHE = config('THROTTLE_CACHE', default='default')
+
+# On-demand profiling of live requests (see core.profiling, sessions are managed in the admin)
+
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool) # Off: the middleware is not even loaded
+PROFILING_SIGNATURE_MAX_AGE = 3600 # Seconds a signed X-Profile header stays valid
+PROFILING_REFRESH_SECONDS = 10 # Seconds between reloads of the active sessions by each worker
+
+# Batch movie lookup (see movie.views.MovieBatchView)
+
+MOVIE_BATCH_MAX_ITEMS = config('MOVIE_BATCH_MAX_ITEMS', default=300, cast=int) # IDs + IMDb IDs per request
+MOVIE_BATCH_MAX_OMDB_FETCHES = config('MOVIE_BATCH_MAX_OMDB_FETCHES', default=10, cast=int) # Missing IMDb IDs fetched from OMDb per request
+OMDB_TIMEOUT = config('OMDB_TIMEOUT', default=3, cast=float) # Seconds per OMDb call of a batch lookup
+
+# Composite requests: several API reads in one round trip (see core.composite)
+
+COMPOSITE_MAX_REQUESTS = config('COMPOSITE_MAX_REQUESTS', default=10, cast=int) # Sub-requests per composite request
+COMPOSITE_MAX_RESPONSE_BYTES = config('COMPOSITE_MAX_RESPONSE_BYTES', default=1024 * 1024, cast=int) # Larger sub-responses are replaced by a 413 entry
+COMPOSITE_MAX_WORKERS = config('COMPOSITE_MAX_WORKERS', default=4, cast=int) # Threads used for parallel sub-requests (1 disables parallelism)
+
+# Async read path (see core.async_views): on by default in the ASGI app (filmopine/asgi.py), where
+# GET requests to the movie and review endpoints are served by async views on the async ORM
+
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Review archival (see review.archive): reviews older than this are moved to the ArchivedReview
+# table by `python manage.py archive_reviews`, run periodically (e.g. nightly cron)
+
+REVIEW_ARCHIVE_AFTER_DAYS = config('REVIEW_ARCHIVE_AFTER_DAYS', default=0, cast=int) # 0: reviews are never archived
+REVIEW_ARCHIVE_BATCH_SIZE = config('REVIEW_ARCHIVE_BATCH_SIZE', default=1000, cast=int) # Reviews moved per transaction
+
+# Read-only catalog snapshot (see movie.snapshot): a SQLite file exported by `python manage.py
+# export_catalog_snapshot`, from which read nodes serve the movie and review listings
+
+CATALOG_SNAPSHOT_PATH = config('CATALOG_SNAPSHOT_PATH', default='') # Empty, or no file yet: listings query the database
+CATALOG_SNAPSHOT_REVIEW_DAYS = config('CATALOG_SNAPSHOT_REVIEW_DAYS', default=90, cast=int) # Reviews of the last N days are exported (0: all)
+
+# Idempotency keys (see core.idempotency): unsafe requests retried with the same Idempotency-Key
+# header get the stored response of the first attempt instead of running again
+
+IDEMPOTENCY_CACHE = config('IDEMPOTENCY_CACHE', default='default') # Must be shared by every worker
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=86400, cast=int) # Seconds a response is replayed for its key
+IDEMPOTENCY_LOCK_TIMEOUT = 60 # Seconds a request in flight holds its key (frees the keys of crashed workers)
+IDEMPOTENCY_WAIT = config('IDEMPOTENCY_WAIT', default=10, cast=int) # Seconds duplicates wait for the request in flight, then 409
+
+# Traffic capture (see core.traffic): a sample of live requests is logged, anonymized, to be
+# replayed against other builds with `python manage.py replay_traffic`
+
+TRAFFIC_CAPTURE_RATE = config('TRAFFIC_CAPTURE_RATE', default=0.0, cast=float) # Fraction of requests logged, 0: the middleware is not loaded
+TRAFFIC_CAPTURE_PATH = config('TRAFFIC_CAPTURE_PATH', default=os.path.join(BASE_DIR, 'traffic.jsonl'))
+TRAFFIC_CAPTURE_METHODS = ['GET', 'HEAD'] # Bodies are not logged: unsafe requests could not be replayed
+TRAFFIC_CAPTURE_REDACTED_PARAMS = config('TRAFFIC_CAPTURE_REDACTED_PARAMS', default='apikey,token,password,email', cast=Csv())
+
+# Worker memory profiling (see core.memory): a sample of requests is traced with tracemalloc and
+# the memory they leave allocated is reported per view by the admin-only /api/metrics/memory/
+
+MEMORY_PROFILING_RATE = config('MEMORY_PROFILING_RATE', default=0.0, cast=float) # Fraction of requests traced, 0: the middleware is not loaded
+MEMORY_PROFILING_FRAMES = config('MEMORY_PROFILING_FRAMES', default=25, cast=int) # Stack depth kept per allocation, to find the project line behind it
+
+# Worker warm-up (see core.warmup): caches are primed before a worker serves traffic, from
+# gunicorn.conf.py (before forking with --preload, then on worker boot); /api/ready/ reports it
+
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool) # False: workers are cold, and always ready
@@ -0,0 +1,22 @@
+"""
+Settings for running the test suite locally on SQLite, without a MySQL server:
+
+    python manage.py test --settings=filmopine.test_settings
+
+Besides the primary, `replica1` is a second SQLite database standing in for a read
+replica. It is a separate database rather than a test mirror of the primary, so that
+tests can tell which one reads and writes went to. DATABASE_REPLICAS stays empty: the
+tests of the replica routing turn it on with override_settings.
+"""
+import os
+
+for name in ('DB_NAME', 'DB_HOST', 'DB_USER', 'DB_PASSWORD'):
+    os.environ.setdefault(name, '') # Required by settings.py, unused with the databases below
+
+from .settings import * # noqa: E402,F403
+
+DATABASES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'},
+    'replica1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db_replica1.sqlite3'},
+}
+DATABASE_REPLICAS = {}
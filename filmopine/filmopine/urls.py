@@ -14,38 +14,37 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-import debug_toolbar
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.views.generic import RedirectView
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from core.views import schema_json, SchemaUIView
 
+# Only used for the YAML format; the JSON schema and the UIs are served from the pre-generated artifact (core.openapi)
 schema_view = get_schema_view(
-   openapi.Info(
-      title="Film Opine API",
-      default_version='v1',
-      description="A Movie Review and Rating API",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="officialmokua@gmail.com"),
-      license=openapi.License(name="MIT License"),
-   ),
    public=True,
    permission_classes=(permissions.AllowAny,),
 )
 
 urlpatterns = [
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger.json/', schema_json, name='schema-json'),
+    path('swagger<format>/', schema_view.without_ui(cache_timeout=settings.OPENAPI_SCHEMA_MAX_AGE), name='schema-yaml'),
+    path('swagger/', SchemaUIView.as_view(ui='swagger'), name='schema-swagger-ui'),
+    path('redoc/', SchemaUIView.as_view(ui='redoc'), name='schema-redoc'),
 
     path('admin/', admin.site.urls),
     path('', RedirectView.as_view(url='/api/', permanent=False)),  # Redirect root URL to /api/ (permanent: This parameter specifies whether the redirection is permanent (HTTP status 301) or temporary (HTTP status 302). Setting it to False means a temporary redirect.)
     path('api/', include('core.urls')), # Include core app URLs
     path('api/movies/', include('movie.urls')), # Include movies app URLs
     path('api/reviews/', include('review.urls')), # Include reviews app URLs
-    path('__debug__/', include(debug_toolbar.urls)),
+    path('api/recommendations/', include('recommendation.urls')), # Include recommendation app URLs
+    path('api/feed/', include('feed.urls')), # Include activity feed URLs
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
 ]
+
+if settings.DEBUG: # Dev-only tools are not even imported in production
+    import debug_toolbar
+    urlpatterns.append(path('__debug__/', include(debug_toolbar.urls)))
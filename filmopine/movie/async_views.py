@@ -0,0 +1,45 @@
+from django.http import Http404
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from core.async_views import apaginate_queryset
+from .models import Movie
+from .serializers import MovieRowSerializer
+from .snapshot import snapshot_for
+
+async def movie_list(request):
+    """
+    Async read path of MovieViewSet.list (see core.async_views.async_read_view).
+
+    Args:
+        request (Request): The authenticated DRF request.
+
+    Returns:
+        Response: The same paginated list of movies as the sync view (an HttpResponse when
+            served from the catalog snapshot).
+    """
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    snapshot = snapshot_for(request)
+    if snapshot is not None: # Local memory-mapped file: the queries take microseconds, no need for a thread
+        return snapshot.paginated_response(snapshot.movies(), paginator, request)
+    rows = await apaginate_queryset(paginator, Movie.objects.values(*MovieRowSerializer.columns), request)
+    return paginator.get_paginated_response(await MovieRowSerializer().aserialize(rows))
+
+async def movie_detail(request, pk):
+    """
+    Async read path of MovieViewSet.retrieve, serializing a single `.values()` row.
+
+    Args:
+        request (Request): The authenticated DRF request.
+        pk (int): The ID of the movie.
+
+    Returns:
+        Response: The movie, as serialized by MovieSerializer.
+
+    Raises:
+        Http404: No movie has this ID.
+    """
+    row = await Movie.objects.filter(pk=pk).values(*MovieRowSerializer.columns).afirst()
+    if row is None:
+        raise Http404("No Movie matches the given query.")
+    data = await MovieRowSerializer().aserialize([row])
+    return Response(data[0])
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from movie import snapshot
+
+class Command(BaseCommand):
+    """
+    Apply a delta written by `export_catalog_snapshot --delta-from` to the local catalog
+    snapshot. The new version replaces the snapshot atomically; the workers serve it from
+    their next request on (see movie.snapshot). Needs no database connection.
+
+    Usage:
+        python manage.py apply_catalog_delta /srv/snapshots/catalog.delta.sqlite3
+        python manage.py apply_catalog_delta catalog.delta.sqlite3 --snapshot /srv/snapshots/catalog.sqlite3
+    """
+    help = 'Apply a catalog snapshot delta to the local snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('delta', help='Path of the delta file.')
+        parser.add_argument('--snapshot', help='Snapshot to update. Defaults to settings.CATALOG_SNAPSHOT_PATH.')
+
+    def handle(self, *args, **options):
+        path = options['snapshot'] or settings.CATALOG_SNAPSHOT_PATH
+        if not path:
+            raise CommandError("No snapshot path: set CATALOG_SNAPSHOT_PATH or pass --snapshot.")
+        try:
+            meta = snapshot.apply_delta(path, options['delta'])
+        except snapshot.SnapshotError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot updated to version {meta['version']}: {meta['movies']} movies, {meta['reviews']} reviews."
+        ))
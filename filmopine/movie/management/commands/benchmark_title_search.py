@@ -0,0 +1,68 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from movie.models import Movie
+from movie.search import fuzzy_search, rebuild_index
+
+WORDS = [
+    'inception', 'jason', 'bourne', 'dark', 'knight', 'rises', 'return', 'king', 'lord', 'rings',
+    'matrix', 'reloaded', 'star', 'wars', 'empire', 'strikes', 'back', 'godfather', 'part', 'pulp',
+    'fiction', 'fight', 'club', 'forrest', 'gump', 'interstellar', 'gladiator', 'titanic', 'avatar',
+    'alien', 'aliens', 'predator', 'terminator', 'judgment', 'day', 'night', 'city', 'lost', 'found',
+    'blue', 'red', 'green', 'black', 'white', 'house', 'river', 'mountain', 'ocean', 'eleven', 'twelve',
+]
+
+QUERIES = ['incepton', 'jason bourn', 'dark knigt', 'godfathr', 'interstelar', 'terminater judgement day']
+
+class Command(BaseCommand):
+    """
+    Compare the fuzzy trigram title search with the `title__icontains` scan it replaces.
+
+    A synthetic catalog is generated inside a transaction that is rolled back at the end,
+    so the command leaves the database untouched.
+
+    Usage:
+        python manage.py benchmark_title_search --titles 100000 --repeat 5
+    """
+    help = 'Benchmark fuzzy trigram title search against the title__icontains scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100000, help='Number of synthetic movie titles to generate.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of times each query is run.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Generating {options['titles']} titles...")
+            Movie.objects.bulk_create(
+                [
+                    Movie(imdb_id=f"bench{i:08d}", title=' '.join(rng.sample(WORDS, rng.randint(1, 4))).title())
+                    for i in range(options['titles'])
+                ],
+                batch_size=5000
+            )
+            started = time.perf_counter()
+            rebuild_index(Movie.objects.filter(imdb_id__startswith='bench'))
+            self.stdout.write(f"Indexed in {time.perf_counter() - started:.2f}s\n")
+
+            self.stdout.write(f"{'query':<28}{'icontains ms':>14}{'hits':>8}{'fuzzy ms':>12}{'hits':>8}")
+            for query in QUERIES:
+                scan_ms, scan_hits = self.time(lambda: Movie.objects.filter(title__icontains=query).count(), options['repeat'])
+                fuzzy_ms, fuzzy_hits = self.time(lambda: len(fuzzy_search(query)), options['repeat'])
+                self.stdout.write(f"{query:<28}{scan_ms:>14.2f}{scan_hits:>8}{fuzzy_ms:>12.2f}{fuzzy_hits:>8}")
+
+            transaction.set_rollback(True) # Leave the database as we found it
+
+    def time(self, func, repeat):
+        """
+        Run func `repeat` times and return (best time in milliseconds, last result).
+        """
+        best, result = float('inf'), None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            best = min(best, (time.perf_counter() - started) * 1000)
+        return best, result
@@ -0,0 +1,51 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from movie import snapshot
+
+class Command(BaseCommand):
+    """
+    Export the catalog (movies with their rating aggregates, and recent reviews) to a
+    read-only SQLite snapshot, replacing the previous one atomically. Run it periodically
+    (e.g. every few minutes from cron) and ship the file to the read nodes, whose movie and
+    review listings are then served from it (CATALOG_SNAPSHOT_PATH, see movie.snapshot).
+
+    With --delta-from, the changes since a previous snapshot are also written as a delta
+    file, usually a small fraction of the full snapshot, which read nodes apply with
+    `python manage.py apply_catalog_delta`.
+
+    Usage:
+        python manage.py export_catalog_snapshot --output /srv/snapshots/catalog.sqlite3
+        python manage.py export_catalog_snapshot --output /srv/snapshots/catalog-new.sqlite3 \
+            --delta-from /srv/snapshots/catalog.sqlite3 --delta-output /srv/snapshots/catalog.delta.sqlite3
+    """
+    help = 'Export the catalog to a read-only SQLite snapshot, optionally with a delta from a previous one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Snapshot path. Defaults to settings.CATALOG_SNAPSHOT_PATH.')
+        parser.add_argument('--review-days', type=int, help='Export the reviews of the last N days (0: all). Defaults to settings.CATALOG_SNAPSHOT_REVIEW_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=snapshot.EXPORT_BATCH_SIZE, help='Rows queried and serialized at a time.')
+        parser.add_argument('--delta-from', help='Previous snapshot to compute the delta from.')
+        parser.add_argument('--delta-output', help='Path of the delta file (with --delta-from).')
+
+    def handle(self, *args, **options):
+        if bool(options['delta_from']) != bool(options['delta_output']):
+            raise CommandError("--delta-from and --delta-output go together.")
+        output = options['output']
+        if options['delta_from'] and os.path.abspath(options['delta_from']) == os.path.abspath(output or ''):
+            raise CommandError("--delta-from must be another file than --output, which is replaced by the export.")
+
+        try:
+            meta = snapshot.export_snapshot(output, options['review_days'], options['batch_size'])
+        except snapshot.SnapshotError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot version {meta['version']} written: {meta['movies']} movies, {meta['reviews']} reviews."
+        ))
+
+        if options['delta_from']:
+            delta = snapshot.write_delta(options['delta_from'], output, options['delta_output'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Delta {delta['base_version']} -> {delta['version']} written: "
+                f"{delta['movie_upserted']} movies and {delta['review_upserted']} reviews new or changed, "
+                f"{delta['movie_removed']} movies and {delta['review_removed']} reviews removed."
+            ))
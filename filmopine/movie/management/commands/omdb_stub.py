@@ -0,0 +1,77 @@
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from django.core.management.base import BaseCommand
+
+def stub_movie(imdb_id, title):
+    digest = int(hashlib.sha256(imdb_id.encode()).hexdigest(), 16)
+    return {
+        "Title": title, "Year": str(1950 + digest % 75), "imdbID": imdb_id,
+        "Type": ("movie", "series", "episode")[digest % 3], "Poster": "N/A",
+    }
+
+def stub_payload(params):
+    """
+    The OMDb answer to a query: search results for `s`, a movie for `i`. Answers only
+    depend on the query, so every replay of a capture sees the same data.
+    """
+    if 's' in params:
+        query = params['s'][0].strip()
+        if not query:
+            return {"Response": "False", "Error": "Incorrect IMDb ID."}
+        prefix = hashlib.sha256(query.lower().encode()).hexdigest()[:6]
+        results = [stub_movie(f"tt9{prefix}{n}", f"{query.title()} {n}") for n in range(int(prefix, 16) % 10 + 1)]
+        return {"Search": results, "totalResults": str(len(results)), "Response": "True"}
+    if 'i' in params:
+        imdb_id = params['i'][0]
+        return {**stub_movie(imdb_id, f"Movie {imdb_id}"), "Response": "True"}
+    return {"Response": "False", "Error": "No API key provided."}
+
+class Command(BaseCommand):
+    """
+    Serve a deterministic stand-in for the OMDb API, for traffic replays and load tests:
+    searches are answered without network access, quota or variance.
+
+    Point the instance under test at it with OMDB_BASE_URL. --latency-ms adds a fixed
+    delay to every answer, to keep the cost of the real API in the picture.
+
+    Usage:
+        python manage.py omdb_stub --port 8765 --latency-ms 150
+        OMDB_BASE_URL=http://127.0.0.1:8765/ python manage.py runserver
+    """
+    help = 'Run a deterministic OMDb API stub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response.')
+
+    def handle(self, *args, **options):
+        latency = options['latency_ms'] / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if latency:
+                    time.sleep(latency)
+                body = json.dumps(stub_payload(parse_qs(urlsplit(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(f"OMDb stub listening on http://{options['host']}:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
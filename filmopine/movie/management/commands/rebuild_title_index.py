@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from movie.search import rebuild_index
+
+class Command(BaseCommand):
+    """
+    Rebuild the trigram index used by the fuzzy movie title search.
+
+    The index is kept up to date automatically when movies are saved; this command is
+    only needed after bulk imports that bypass Model.save() (e.g. loaddata, raw SQL).
+
+    Usage:
+        python manage.py rebuild_title_index
+    """
+    help = 'Rebuild the trigram index used by the fuzzy movie title search.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Trigram rows inserted per statement.')
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} movie titles."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.2 on 2026-10-19 02:59
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def title_trigrams(text):
+    # Frozen copy of movie.search.title_trigrams() as of this migration
+    trigrams = set()
+    for word in re.split(r'[^\w]+', (text or '').lower()):
+        if not word:
+            continue
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+    return trigrams
+
+
+def index_existing_titles(apps, schema_editor):
+    Movie = apps.get_model('movie', 'Movie')
+    MovieTitleTrigram = apps.get_model('movie', 'MovieTitleTrigram')
+    rows = [
+        MovieTitleTrigram(movie_id=movie_id, trigram=trigram)
+        for movie_id, title in Movie.objects.values_list('id', 'title')
+        for trigram in title_trigrams(title)
+    ]
+    MovieTitleTrigram.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieTitleTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='title_trigrams', to='movie.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'movie'], name='movie_movie_trigram_800153_idx')],
+                'unique_together': {('movie', 'trigram')},
+            },
+        ),
+        migrations.RunPython(index_existing_titles, migrations.RunPython.noop),
+    ]
@@ -27,4 +27,27 @@ class Movie(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class MovieTitleTrigram(models.Model):
+    """
+    Side table holding the trigram index of movie titles, used for typo-tolerant title search.
+
+    Each row maps one trigram (three consecutive characters of a padded, lowercased title word)
+    to a movie. Looking up the trigrams of a search query on the indexed `trigram` column gives
+    the candidate movies without scanning the whole movie table.
+
+    Attributes:
+        movie (ForeignKey): The movie whose title contains the trigram.
+        trigram (str): The three-character trigram.
+    """
+
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='title_trigrams')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = [['movie', 'trigram']]
+        indexes = [models.Index(fields=['trigram', 'movie'])]
+
+    def __str__(self):
+        return f"{self.trigram!r} - {self.movie_id}"
@@ -0,0 +1,148 @@
+import math
+import re
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from .models import Movie, MovieTitleTrigram
+
+NON_WORD_RE = re.compile(r'[^\w]+')
+
+def title_trigrams(text):
+    """
+    Split a title into the set of trigrams used by the fuzzy title index.
+
+    The text is lowercased and broken into words on any non-alphanumeric character.
+    Each word is padded with two leading spaces and one trailing space (the same scheme
+    PostgreSQL's pg_trgm uses), so word starts weigh more than word middles and short
+    words still produce trigrams.
+
+    Args:
+        text (str): The title or search query to split.
+
+    Returns:
+        set: The distinct trigrams found in the text.
+    """
+    trigrams = set()
+    for word in NON_WORD_RE.split((text or '').lower()):
+        if not word:
+            continue
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+    return trigrams
+
+def similarity(query_trigrams, title_trigrams_):
+    """
+    Jaccard similarity between two trigram sets (0.0 = nothing shared, 1.0 = identical).
+    """
+    if not query_trigrams or not title_trigrams_:
+        return 0.0
+    shared = len(query_trigrams & title_trigrams_)
+    return shared / (len(query_trigrams) + len(title_trigrams_) - shared)
+
+def index_movie(movie):
+    """
+    Bring the trigram rows of a single movie in line with its current title.
+
+    Only the difference between the stored and the expected trigrams is written, so
+    re-saving a movie whose title did not change (e.g. the OMDb upserts in
+    MovieSearchView) costs a single SELECT.
+
+    Args:
+        movie (Movie): The movie to (re)index.
+    """
+    expected = title_trigrams(movie.title)
+    existing = set(MovieTitleTrigram.objects.filter(movie=movie).values_list('trigram', flat=True))
+
+    stale = existing - expected
+    missing = expected - existing
+    if stale:
+        MovieTitleTrigram.objects.filter(movie=movie, trigram__in=stale).delete()
+    if missing:
+        MovieTitleTrigram.objects.bulk_create(
+            [MovieTitleTrigram(movie=movie, trigram=trigram) for trigram in missing],
+            ignore_conflicts=True
+        )
+
+def rebuild_index(movies=None, batch_size=5000):
+    """
+    Rebuild the trigram index from scratch for the given movies (all movies by default).
+
+    Args:
+        movies (QuerySet, optional): The movies to reindex. Defaults to every movie.
+        batch_size (int): Number of trigram rows inserted per INSERT statement.
+
+    Returns:
+        int: The number of movies indexed.
+    """
+    if movies is None:
+        movies = Movie.objects.all()
+
+    indexed = 0
+    with transaction.atomic():
+        MovieTitleTrigram.objects.filter(movie__in=movies).delete()
+        rows = []
+        for movie_id, title in movies.values_list('id', 'title').iterator(chunk_size=batch_size):
+            rows.extend(MovieTitleTrigram(movie_id=movie_id, trigram=trigram) for trigram in title_trigrams(title))
+            indexed += 1
+            if len(rows) >= batch_size:
+                MovieTitleTrigram.objects.bulk_create(rows, batch_size=batch_size)
+                rows = []
+        if rows:
+            MovieTitleTrigram.objects.bulk_create(rows, batch_size=batch_size)
+    return indexed
+
+def fuzzy_search(query, limit=None, threshold=None):
+    """
+    Find movies whose title is similar to the query, tolerating typos.
+
+    Candidate generation runs entirely on the indexed trigram column: movies are grouped
+    by the number of query trigrams they share, and any movie that shares fewer trigrams
+    than the similarity threshold allows is discarded in SQL (a title can only reach a
+    similarity of `threshold` if it shares at least `threshold * len(query trigrams)` of them).
+    The surviving candidates are then scored in Python with the exact Jaccard similarity.
+
+    Args:
+        query (str): The (possibly misspelled) title to look for.
+        limit (int, optional): Maximum number of candidates to score. Defaults to
+            settings.FUZZY_SEARCH_CANDIDATES.
+        threshold (float, optional): Minimum similarity for a movie to be returned.
+            Defaults to settings.FUZZY_SEARCH_THRESHOLD.
+
+    Returns:
+        list: (movie_id, similarity) tuples ordered from best to worst match.
+    """
+    limit = limit or settings.FUZZY_SEARCH_CANDIDATES
+    threshold = settings.FUZZY_SEARCH_THRESHOLD if threshold is None else threshold
+
+    query_trigrams = title_trigrams(query)
+    if not query_trigrams:
+        return []
+
+    min_shared = max(1, math.ceil(threshold * len(query_trigrams)))
+    candidates = (
+        MovieTitleTrigram.objects
+        .filter(trigram__in=query_trigrams)
+        .values('movie_id')
+        .annotate(shared=Count('id'))
+        .filter(shared__gte=min_shared)
+        .order_by('-shared')[:limit]
+    )
+    candidate_ids = [row['movie_id'] for row in candidates]
+    titles = dict(Movie.objects.filter(id__in=candidate_ids).values_list('id', 'title'))
+
+    scored = []
+    for movie_id, title in titles.items():
+        score = similarity(query_trigrams, title_trigrams(title))
+        if score >= threshold:
+            scored.append((movie_id, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored
+
+def fuzzy_search_movies(query, **kwargs):
+    """
+    Same as fuzzy_search() but returns Movie instances, best match first.
+    """
+    ranked_ids = [movie_id for movie_id, _ in fuzzy_search(query, **kwargs)]
+    movies = Movie.objects.in_bulk(ranked_ids)
+    return [movies[movie_id] for movie_id in ranked_ids if movie_id in movies]
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Movie
+from .search import index_movie
+
+@receiver(post_save, sender=Movie)
+def index_movie_title(sender, instance, **kwargs):
+    """
+    Keep the fuzzy title index in sync whenever a movie is created or updated.
+    """
+    if kwargs.get('raw'):
+        return # Skip fixture loading, the index can be rebuilt with `rebuild_title_index`
+    index_movie(instance)
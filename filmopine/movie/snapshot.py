@@ -0,0 +1,330 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
+from urllib.parse import quote
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from core.ids import uuid7
+from core.renderers import FastJSONRenderer
+from review.models import Review
+from review.serializers import ReviewRowSerializer
+from .models import Movie
+from .serializers import MovieRowSerializer
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE movie (id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE review (id TEXT PRIMARY KEY, object_id INTEGER NOT NULL, data BLOB NOT NULL) WITHOUT ROWID;
+CREATE INDEX review_object ON review (object_id, id);
+"""
+
+DELTA_SCHEMA = SCHEMA + """
+CREATE TABLE removed (tbl TEXT NOT NULL, id NOT NULL);
+"""
+
+TABLES = ('movie', 'review')
+
+MMAP_SIZE = 256 * 1024 * 1024 # Bytes of the snapshot read through a memory map instead of read() calls
+
+EXPORT_BATCH_SIZE = 1000
+
+_local = threading.local()
+
+class SnapshotError(Exception):
+    pass
+
+def render_rows(rows):
+    renderer = FastJSONRenderer()
+    return [renderer.render(row) for row in rows]
+
+def batches(queryset, columns, batch_size):
+    """
+    Iterate over the `.values()` rows of a queryset in primary key order, one batch at a
+    time (keyset pagination, so the database never has to skip rows).
+    """
+    last_id = None
+    while True:
+        page = queryset.order_by('pk') if last_id is None else queryset.filter(pk__gt=last_id).order_by('pk')
+        rows = list(page.values(*columns)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['id']
+
+def atomic_sqlite(path, build):
+    """
+    Create a SQLite file by calling `build(connection)` on a temporary file next to `path`,
+    then move it to `path` in one step: readers see the old file or the new one, never a
+    file being written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(f"file:{quote(tmp_path)}", uri=True) # uri=True: ATTACH accepts URIs (read-only mode)
+        try:
+            connection.execute('PRAGMA journal_mode = OFF') # A failed build is thrown away, no need to roll back
+            connection.execute('PRAGMA synchronous = OFF')
+            result = build(connection)
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return result
+
+def readonly_uri(path, immutable=False):
+    """
+    SQLite URI opening `path` read-only. Snapshots are never modified in place, only
+    replaced, so readers can open them `immutable`: without any file locking.
+    """
+    return f"file:{quote(os.path.abspath(path))}?mode=ro" + ('&immutable=1' if immutable else '')
+
+def read_meta(connection, schema='main'):
+    return dict(connection.execute(f'SELECT key, value FROM {schema}.meta'))
+
+def export_snapshot(path=None, review_days=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Export the catalog to a read-only SQLite snapshot, atomically replacing `path`.
+
+    The snapshot holds every movie, with its review count and average rating, and the
+    movie reviews created in the last `review_days` days. Rows are stored as the JSON the
+    list endpoints return (MovieRowSerializer, ReviewRowSerializer), in primary key order,
+    so that serving a page is one indexed range read and a byte concatenation.
+
+    Args:
+        path (str, optional): Defaults to settings.CATALOG_SNAPSHOT_PATH.
+        review_days (int, optional): Defaults to settings.CATALOG_SNAPSHOT_REVIEW_DAYS
+            (0 exports all the reviews).
+        batch_size (int): Rows queried and serialized at a time.
+
+    Returns:
+        dict: The metadata of the snapshot (version, created_at, review_days, counts).
+    """
+    path = path or settings.CATALOG_SNAPSHOT_PATH
+    if not path:
+        raise SnapshotError("No snapshot path: set CATALOG_SNAPSHOT_PATH or pass one.")
+    review_days = settings.CATALOG_SNAPSHOT_REVIEW_DAYS if review_days is None else review_days
+    reviews = Review.objects.filter(movie__isnull=False)
+    if review_days:
+        reviews = reviews.filter(created_at__gte=timezone.now() - timedelta(days=review_days))
+
+    def build(connection):
+        connection.executescript(SCHEMA)
+        movies_count = reviews_count = 0
+        for rows in batches(Movie.objects.all(), MovieRowSerializer.columns, batch_size):
+            data = render_rows(MovieRowSerializer().serialize(rows))
+            connection.executemany('INSERT INTO movie VALUES (?, ?)', [(row['id'], row_data) for row, row_data in zip(rows, data)])
+            movies_count += len(rows)
+        for rows in batches(reviews, ReviewRowSerializer.columns, batch_size):
+            data = render_rows(ReviewRowSerializer().serialize(rows))
+            connection.executemany(
+                'INSERT INTO review VALUES (?, ?, ?)',
+                [(str(row['id']), row['object_id'], row_data) for row, row_data in zip(rows, data)]
+            )
+            reviews_count += len(rows)
+        meta = {
+            'version': str(uuid7()), 'created_at': timezone.now().isoformat(), 'review_days': str(review_days),
+            'movies': str(movies_count), 'reviews': str(reviews_count),
+        }
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+        return meta
+
+    return atomic_sqlite(path, build)
+
+def write_delta(base_path, path, delta_path):
+    """
+    Write the changes from the snapshot at `base_path` to the one at `path` as a delta
+    snapshot: the new and changed rows of each table, and the keys of the removed ones.
+    Read nodes apply it with apply_delta() instead of downloading the full snapshot.
+
+    Returns:
+        dict: The metadata of the delta (base_version, version, counts of upserts and removals).
+    """
+    def build(connection):
+        connection.executescript(DELTA_SCHEMA)
+        connection.execute('ATTACH DATABASE ? AS base', (readonly_uri(base_path),))
+        connection.execute('ATTACH DATABASE ? AS new', (readonly_uri(path),))
+        meta = read_meta(connection, 'new')
+        meta['base_version'] = read_meta(connection, 'base')['version']
+        for table in TABLES:
+            upserted = connection.execute(
+                f'INSERT INTO main.{table} SELECT * FROM new.{table} EXCEPT SELECT * FROM base.{table}'
+            ).rowcount
+            removed = connection.execute(
+                f"INSERT INTO main.removed SELECT '{table}', id FROM base.{table} WHERE id NOT IN (SELECT id FROM new.{table})"
+            ).rowcount
+            meta[f'{table}_upserted'], meta[f'{table}_removed'] = str(upserted), str(removed)
+        connection.executemany('INSERT INTO main.meta VALUES (?, ?)', meta.items())
+        connection.commit()
+        connection.execute('DETACH DATABASE base')
+        connection.execute('DETACH DATABASE new')
+        return meta
+
+    return atomic_sqlite(delta_path, build)
+
+def apply_delta(path, delta_path):
+    """
+    Apply a delta written by write_delta() to the snapshot at `path`, atomically replacing
+    it with the new version. Readers (see get_snapshot()) switch to the new file on their
+    next request.
+
+    Returns:
+        dict: The metadata of the new snapshot.
+
+    Raises:
+        SnapshotError: The delta was not made from this version of the snapshot.
+    """
+    def build(connection):
+        connection.execute('ATTACH DATABASE ? AS base', (readonly_uri(path),))
+        connection.execute('ATTACH DATABASE ? AS delta', (readonly_uri(delta_path),))
+        base_version = read_meta(connection, 'base')['version']
+        meta = read_meta(connection, 'delta')
+        if meta.pop('base_version') != base_version:
+            raise SnapshotError(f"The delta does not apply to snapshot version {base_version}, export a full snapshot.")
+        connection.executescript(SCHEMA)
+        for table in TABLES:
+            connection.execute(
+                f"INSERT INTO main.{table} SELECT * FROM ("
+                f"SELECT * FROM base.{table} WHERE id NOT IN (SELECT id FROM delta.removed WHERE tbl = '{table}') "
+                f"AND id NOT IN (SELECT id FROM delta.{table}) UNION ALL SELECT * FROM delta.{table}"
+                f") ORDER BY id" # Rows stored in key order, as in a full export
+            )
+            del meta[f'{table}_upserted'], meta[f'{table}_removed']
+        meta['movies'], = connection.execute('SELECT COUNT(*) FROM main.movie').fetchone()
+        meta['reviews'], = connection.execute('SELECT COUNT(*) FROM main.review').fetchone()
+        connection.executemany('INSERT INTO main.meta VALUES (?, ?)', [(key, str(value)) for key, value in meta.items()])
+        connection.commit()
+        connection.execute('DETACH DATABASE base')
+        connection.execute('DETACH DATABASE delta')
+        return meta
+
+    return atomic_sqlite(path, build)
+
+class SnapshotRows:
+    """
+    The rows of a snapshot table as stored JSON, in primary key order.
+
+    Countable and sliceable like a queryset, so DRF paginators page through them, with one
+    COUNT and one LIMIT/OFFSET query on the snapshot.
+    """
+
+    def __init__(self, connection, table, where='', params=()):
+        self.connection = connection
+        self.table = table
+        self.where = f' WHERE {where}' if where else ''
+        self.params = tuple(params)
+
+    def count(self):
+        return self.connection.execute(f'SELECT COUNT(*) FROM {self.table}{self.where}', self.params).fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = -1 if index.stop is None else max(index.stop - start, 0)
+        query = f'SELECT data FROM {self.table}{self.where} ORDER BY id LIMIT ? OFFSET ?'
+        return [data for data, in self.connection.execute(query, (*self.params, limit, start))]
+
+class CatalogSnapshot:
+    """
+    A read-only, memory-mapped connection to a catalog snapshot file.
+
+    Attributes:
+        key (tuple): Identity of the file it was opened on (path, inode, modification time).
+        meta (dict): The metadata of the snapshot.
+        version (str): The version of the snapshot, sent as the X-Catalog-Version header.
+    """
+
+    def __init__(self, path, key=None):
+        self.key = key
+        self.connection = sqlite3.connect(readonly_uri(path, immutable=True), uri=True)
+        self.connection.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        self.meta = read_meta(self.connection)
+        self.version = self.meta['version']
+
+    def close(self):
+        self.connection.close()
+
+    def movies(self):
+        return SnapshotRows(self.connection, 'movie')
+
+    def reviews(self, object_id=None):
+        """
+        The exported reviews, all of them or those of one movie.
+        """
+        if object_id is None:
+            return SnapshotRows(self.connection, 'review')
+        return SnapshotRows(self.connection, 'review', 'object_id = ?', [object_id])
+
+    def paginated_response(self, rows, paginator, request):
+        """
+        Serve a page of `rows` with the same body as `paginator.get_paginated_response()`
+        on the database rows, by joining the stored JSON of the rows.
+
+        Args:
+            rows (SnapshotRows): The rows to paginate.
+            paginator (PageNumberPagination): The pagination of the endpoint.
+            request (Request): The DRF request.
+
+        Returns:
+            HttpResponse: The JSON page, with the X-Catalog-Version header.
+
+        Raises:
+            NotFound: The page does not exist.
+        """
+        page = paginator.paginate_queryset(rows, request)
+        renderer = FastJSONRenderer()
+        next_link, previous_link = (
+            renderer.render(link) if link is not None else b'null'
+            for link in (paginator.get_next_link(), paginator.get_previous_link())
+        )
+        body = b'{"count":%d,"next":%s,"previous":%s,"results":[%s]}' % (
+            paginator.page.paginator.count, next_link, previous_link, b','.join(page)
+        )
+        response = HttpResponse(body, content_type=FastJSONRenderer.media_type)
+        response['X-Catalog-Version'] = self.version
+        return response
+
+def get_snapshot():
+    """
+    The catalog snapshot at CATALOG_SNAPSHOT_PATH, or None when there is none.
+
+    Each thread keeps its own connection. The file is checked (stat) on every call and
+    reopened when it was replaced, so a new snapshot or an applied delta is served from
+    the next request on, while requests in progress finish on the file they started with.
+    """
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    snapshot = getattr(_local, 'snapshot', None)
+    if snapshot is None or snapshot.key != key:
+        if snapshot is not None:
+            snapshot.close()
+        snapshot = _local.snapshot = CatalogSnapshot(path, key)
+    return snapshot
+
+def snapshot_for(request):
+    """
+    The catalog snapshot to serve a listing from, or None to query the database: when
+    there is no snapshot, or the client negotiated another format than JSON (the browsable
+    API renders the regular response).
+    """
+    renderer = getattr(request, 'accepted_renderer', None) # Not negotiated by the async read views, which only serve JSON
+    if renderer is not None and renderer.format != 'json':
+        return None
+    return get_snapshot()
@@ -1,7 +1,33 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import requests
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, AsyncRequestFactory, override_settings
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
-from movie.serializers import MovieSerializer
+from rest_framework.test import APIClient
+from movie.serializers import MovieSerializer, MovieRowSerializer
+from core.renderers import FastJSONRenderer
+from rest_framework.renderers import JSONRenderer
+from django.contrib.contenttypes.models import ContentType
+from review.models import Review
+from core.models import User
 from django.test import TestCase
-from movie.models import Movie
+from movie.models import Movie, MovieTitleTrigram
+from movie.search import title_trigrams, fuzzy_search_movies
+from movie import async_views, snapshot
+from movie.views import MovieViewSet
+from core.async_views import async_read_view
 
 class MovieSerializerTest(TestCase):
     """
@@ -60,4 +86,388 @@ class MovieSerializerTest(TestCase):
             self.assertEqual(serializer.data[key], value)
 
 
+class FuzzyTitleSearchTest(TestCase):
+    """
+    Test case for the trigram-backed fuzzy title search.
+    """
+
+    def setUp(self):
+        """
+        Set up a few movies; saving them populates the trigram index.
+        """
+        self.inception = Movie.objects.create(imdb_id="tt1375666", title="Inception")
+        self.bourne = Movie.objects.create(imdb_id="tt4196776", title="Jason Bourne")
+        self.knight = Movie.objects.create(imdb_id="tt0468569", title="The Dark Knight")
+        self.client = APIClient()
+
+    def test_title_trigrams(self):
+        """
+        Test that words are lowercased and padded before being split into trigrams.
+        """
+        self.assertEqual(title_trigrams("Up!"), {"  u", " up", "up "})
+
+    def test_typo_tolerant_search(self):
+        """
+        Test that misspelled queries still find the intended movie first.
+        """
+        self.assertEqual(fuzzy_search_movies("incepton")[0], self.inception)
+        self.assertEqual(fuzzy_search_movies("jason bourn")[0], self.bourne)
+        self.assertEqual(fuzzy_search_movies("zzzz"), [])
+
+    def test_index_follows_title_changes(self):
+        """
+        Test that renaming a movie updates its trigram rows.
+        """
+        self.inception.title = "Memento"
+        self.inception.save()
+        trigrams = set(MovieTitleTrigram.objects.filter(movie=self.inception).values_list('trigram', flat=True))
+        self.assertEqual(trigrams, title_trigrams("Memento"))
+
+    def test_fuzzy_mode_on_search_endpoint(self):
+        """
+        Test that mode=fuzzy searches local titles without calling OMDb.
+        """
+        response = self.client.get('/api/movies/search/', {'query': 'the dark knigt', 'mode': 'fuzzy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['title'], "The Dark Knight")
+
+
+class MovieRowSerializerTest(TestCase):
+    """
+    Test case for the list fast path (MovieRowSerializer + FastJSONRenderer).
+    """
+
+    def setUp(self):
+        """
+        Set up movies with and without reviews, including non-ASCII titles.
+        """
+        self.user = User.objects.create_user(username="reviewer", password="password123")
+        content_type = ContentType.objects.get_for_model(Movie)
+        self.movies = [
+            Movie.objects.create(imdb_id="tt0001", title="Amélie", year="2001", film_type="movie"),
+            Movie.objects.create(imdb_id="tt0002", title="千と千尋の神隠し \u2028 line", year="2001", film_type="movie", poster="N/A"),
+            Movie.objects.create(imdb_id="tt0003", title="No Reviews", year="1999", film_type="series"),
+        ]
+        for movie, rating in ((self.movies[0], 4.5), (self.movies[0], 3.0), (self.movies[1], 5.0)):
+            Review.objects.create(
+                user=self.user, content_type=content_type, object_id=movie.id,
+                review_title="Title", review_content="Content", rating=rating
+            )
+
+    def test_same_bytes_as_model_serializer(self):
+        """
+        Test that the fast path renders exactly the same JSON as MovieSerializer + JSONRenderer.
+        """
+        expected = JSONRenderer().render(MovieSerializer(Movie.objects.order_by('id'), many=True).data)
+        rows = MovieRowSerializer().serialize(Movie.objects.order_by('id').values(*MovieRowSerializer.columns))
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+
+    def test_list_endpoint_query_count(self):
+        """
+        Test that the movie list endpoint no longer issues queries per movie.
+        """
+        client = APIClient()
+        with self.assertNumQueries(3): # count, page, review aggregates
+            response = client.get('/api/movies/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class OMDbBudgetTest(TestCase):
+    """
+    Test case for the OMDb search budget of MovieSearchView.
+    """
+
+    def setUp(self):
+        """
+        Start with empty buckets and a local movie matching the search.
+        """
+        cache.clear()
+        self.movie = Movie.objects.create(imdb_id="tt1375666", title="Inception", year="2010", film_type="movie")
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'omdb': '1/min'}
+        override = override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @mock.patch('movie.views.requests.get')
+    def test_exhausted_budget_falls_back_to_local_results(self, get):
+        """
+        Test that once the OMDb budget is used up, searches answer from the local index instead of failing.
+        """
+        get.return_value.json.return_value = {"Response": "True", "Search": [
+            {"imdbID": "tt1375666", "Title": "Inception", "Year": "2010", "Type": "movie", "Poster": "N/A"},
+        ]}
+        client = APIClient()
+
+        response = client.get('/api/movies/search/', {'query': 'inception'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Search-Source'], 'omdb')
+
+        response = client.get('/api/movies/search/', {'query': 'inception'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Search-Source'], 'local')
+        self.assertEqual(response.json()['results'][0]['id'], self.movie.id)
+        self.assertEqual(get.call_count, 1)
+
+
+class MovieBatchViewTest(TestCase):
+    """
+    Test case for the batch movie lookup endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up a few movies, one of them reviewed.
+        """
+        cache.clear()
+        self.client = APIClient()
+        self.movies = [
+            Movie.objects.create(imdb_id=f"tt000{i}", title=f"Movie {i}", year="2000", film_type="movie")
+            for i in range(3)
+        ]
+        user = User.objects.create_user(username="reviewer", password="password123")
+        Review.objects.create(
+            user=user, content_type=ContentType.objects.get_for_model(Movie), object_id=self.movies[1].id,
+            review_title="Title", review_content="Content", rating=4.0
+        )
+
+    def test_results_in_request_order_with_misses(self):
+        """
+        Test that results follow the request order, report misses and take two queries.
+        """
+        ids = [self.movies[2].id, 999, self.movies[1].id]
+        with self.assertNumQueries(2): # movies, review aggregates
+            response = self.client.post('/api/movies/batch/', {'ids': ids, 'imdb_ids': ['tt0000', 'tt9999']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result.get('id', result.get('imdb_id')) for result in results], ids + ['tt0000', 'tt9999'])
+        self.assertEqual(results[0]['movie']['title'], "Movie 2")
+        self.assertIsNone(results[1]['movie'])
+        self.assertEqual(results[2]['movie']['average_rating'], 4.0)
+        self.assertEqual(results[3]['movie']['id'], self.movies[0].id)
+        self.assertEqual(response.json()['missing'], {'ids': [999], 'imdb_ids': ['tt9999']})
+
+    def test_get_and_limits(self):
+        """
+        Test the query parameter form and the validation of the request.
+        """
+        response = self.client.get('/api/movies/batch/', {'ids': f"{self.movies[0].id},{self.movies[1].id}"})
+        self.assertEqual([result['movie']['title'] for result in response.json()['results']], ["Movie 0", "Movie 1"])
+
+        self.assertEqual(self.client.get('/api/movies/batch/').status_code, 400)
+        with override_settings(MOVIE_BATCH_MAX_ITEMS=2):
+            response = self.client.post('/api/movies/batch/', {'ids': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('movie.views.requests.Session.get')
+    def test_fetch_missing_from_omdb(self, get):
+        """
+        Test that unknown IMDb IDs are fetched from OMDb and stored when asked to.
+        """
+        get.return_value.json.return_value = {"Response": "True", "imdbID": "tt1375666", "Title": "Inception", "Year": "2010", "Type": "movie", "Poster": "N/A"}
+        response = self.client.post('/api/movies/batch/', {'imdb_ids': ['tt1375666', 'tt0001'], 'fetch_missing': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(response.json()['results'][0]['movie']['title'], "Inception")
+        self.assertEqual(response.json()['missing'], {'ids': [], 'imdb_ids': []})
+        self.assertTrue(Movie.objects.filter(imdb_id='tt1375666').exists())
+
+    @mock.patch('movie.views.requests.Session.get')
+    def test_failed_omdb_fetches_are_missing(self, get):
+        """
+        Test that OMDb timeouts and invalid responses leave their IDs missing without failing the batch.
+        """
+        invalid = mock.Mock()
+        invalid.json.side_effect = ValueError("Expecting value")
+        get.side_effect = [requests.Timeout(), invalid]
+        with self.assertLogs('movie.views', 'WARNING'):
+            response = self.client.post('/api/movies/batch/', {'ids': [self.movies[0].id], 'imdb_ids': ['tt1375666', 'tt9999'], 'fetch_missing': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['movie']['id'], self.movies[0].id)
+        self.assertEqual(response.json()['missing'], {'ids': [], 'imdb_ids': ['tt1375666', 'tt9999']})
+        self.assertEqual(get.call_args.kwargs['timeout'], settings.OMDB_TIMEOUT)
+
+class AsyncMovieViewsTest(TestCase):
+    """
+    Test case for the async read path of the movie endpoints (see core.async_views).
+    """
+
+    def setUp(self):
+        """
+        Set up two pages of movies, one of them reviewed, and the async views.
+        """
+        cache.clear()
+        self.movies = [
+            Movie.objects.create(imdb_id=f"tt00{i:02}", title=f"Movie {i}", year="2000", film_type="movie")
+            for i in range(12)
+        ]
+        user = User.objects.create_user(username="reviewer", password="password123")
+        Review.objects.create(
+            user=user, content_type=ContentType.objects.get_for_model(Movie), object_id=self.movies[0].id,
+            review_title="Title", review_content="Content", rating=4.0
+        )
+        self.factory = AsyncRequestFactory()
+        self.list_view = async_read_view(async_views.movie_list, MovieViewSet.as_view({'get': 'list', 'post': 'create'}))
+        self.detail_view = async_read_view(async_views.movie_detail, MovieViewSet.as_view({'get': 'retrieve'}))
+
+    async def test_same_bytes_as_sync_views(self):
+        """
+        Test that the async views render the same JSON as the sync views, pagination links included.
+        """
+        client = AsyncClient()
+        for path, view, kwargs in (
+            ('/api/movies/', self.list_view, {}),
+            ('/api/movies/?page=2', self.list_view, {}),
+            (f'/api/movies/{self.movies[0].id}/', self.detail_view, {'pk': self.movies[0].id}),
+        ):
+            expected = await client.get(path)
+            response = await view(self.factory.get(path), **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+    async def test_errors(self):
+        """
+        Test the 404 responses for unknown movies and pages.
+        """
+        response = await self.detail_view(self.factory.get('/api/movies/999/'), pk=999)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "No Movie matches the given query."})
+        response = await self.list_view(self.factory.get('/api/movies/?page=9'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "Invalid page."})
+
+    async def test_writes_fall_back_to_sync_view(self):
+        """
+        Test that unsafe methods still go through the sync view and its permissions.
+        """
+        response = await self.list_view(self.factory.post('/api/movies/', {'title': "New"}, content_type='application/json'))
+        self.assertEqual(response.status_code, 401)
+
+
+class CatalogSnapshotTest(TestCase):
+    """
+    Test case for the read-only catalog snapshot (see movie.snapshot).
+    """
+
+    def setUp(self):
+        """
+        Set up two pages of movies, recent and old reviews, and a snapshot path in a temporary directory.
+        """
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'catalog.sqlite3')
+        override = override_settings(CATALOG_SNAPSHOT_PATH=self.path, CATALOG_SNAPSHOT_REVIEW_DAYS=30)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.movies = [
+            Movie.objects.create(imdb_id=f"tt00{i:02}", title=f"Movie {i}", year="2000", film_type="movie")
+            for i in range(12)
+        ]
+        self.user = User.objects.create_user(username="reviewer", password="password123")
+        self.content_type = ContentType.objects.get_for_model(Movie)
+        self.reviews = [self.create_review(self.movies[i % 2], rating) for i, rating in enumerate((4.5, 3.0, 5.0, 2.5))]
+        self.old_review = self.create_review(self.movies[0], 1.0)
+        Review.objects.filter(pk=self.old_review.pk).update(created_at=timezone.now() - timedelta(days=60))
+
+    def create_review(self, movie, rating):
+        return Review.objects.create(
+            user=self.user, content_type=self.content_type, object_id=movie.id,
+            review_title="Title", review_content="Content " * 50, rating=rating
+        )
+
+    def snapshot_rows(self, path):
+        connection = sqlite3.connect(path)
+        try:
+            return {table: connection.execute(f'SELECT * FROM {table} ORDER BY id').fetchall() for table in snapshot.TABLES}
+        finally:
+            connection.close()
+
+    def snapshot_version(self, path):
+        connection = sqlite3.connect(path)
+        try:
+            return snapshot.read_meta(connection)['version']
+        finally:
+            connection.close()
+
+    def test_same_output_as_database(self):
+        """
+        Test that the listings served from the snapshot match the database listings, and carry its version.
+        """
+        client = APIClient()
+        live = {path: client.get(path) for path in ('/api/movies/', '/api/movies/?page=2', f'/api/movies/{self.movies[0].id}/reviews/')}
+        meta = snapshot.export_snapshot()
+
+        for path, expected in live.items():
+            response = client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Catalog-Version'], meta['version'])
+            self.assertNotIn('X-Catalog-Version', expected)
+            if 'reviews' not in path:
+                self.assertEqual(response.content, expected.content)
+                continue
+            # Unordered on the database: compare the reviews by ID, without the old one that is not exported
+            data, expected_data = response.json(), expected.json()
+            expected_data['results'] = [review for review in expected_data['results'] if review['id'] != str(self.old_review.id)]
+            expected_data['count'] -= 1
+            for page in (data, expected_data):
+                page['results'].sort(key=lambda review: review['id'])
+            self.assertEqual(data, expected_data)
+
+    def test_served_without_queries(self):
+        """
+        Test that anonymous listings do not query the database at all once a snapshot is deployed.
+        """
+        snapshot.export_snapshot()
+        client = APIClient()
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/movies/').status_code, 200)
+            self.assertEqual(client.get('/api/reviews/').json()['count'], 4)
+        # Full contents are not in the snapshot: served from the database
+        response = client.get('/api/reviews/?include=review_content')
+        self.assertNotIn('X-Catalog-Version', response)
+        self.assertEqual(response.json()['count'], 5)
+
+    async def test_async_view(self):
+        """
+        Test that the async read path serves the snapshot as well.
+        """
+        meta = await sync_to_async(snapshot.export_snapshot)()
+        view = async_read_view(async_views.movie_list, MovieViewSet.as_view({'get': 'list'}))
+        response = await view(AsyncRequestFactory().get('/api/movies/?page=2'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Catalog-Version'], meta['version'])
+        self.assertEqual(json.loads(response.content)['count'], 12)
+
+    def test_delta(self):
+        """
+        Test that applying the delta between two snapshots yields the second one, and is served right away.
+        """
+        snapshot.export_snapshot()
+        base = os.path.join(self.directory, 'base.sqlite3')
+        shutil.copyfile(self.path, base)
+
+        self.movies[3].delete()
+        Movie.objects.filter(pk=self.movies[4].pk).update(title="Renamed")
+        self.reviews[0].delete()
+        self.create_review(self.movies[5], 4.0)
+        new = os.path.join(self.directory, 'new.sqlite3')
+        delta_path = os.path.join(self.directory, 'catalog.delta.sqlite3')
+        call_command('export_catalog_snapshot', output=new, delta_from=base, delta_output=delta_path, stdout=io.StringIO())
+
+        delta = self.snapshot_rows(delta_path)
+        self.assertEqual(len(delta['movie']), 3) # Renamed, and the review counts of the movies 0 and 5
+        self.assertEqual(len(delta['review']), 1)
+
+        client = APIClient()
+        self.assertEqual(client.get('/api/movies/')['X-Catalog-Version'], self.snapshot_version(base))
+        call_command('apply_catalog_delta', delta_path, stdout=io.StringIO())
+        self.assertEqual(self.snapshot_rows(self.path), self.snapshot_rows(new))
+        response = client.get('/api/movies/')
+        self.assertEqual(response['X-Catalog-Version'], self.snapshot_version(new))
+        self.assertEqual(response.json()['count'], 11)
 
+        with self.assertRaises(CommandError): # Made for the previous version
+            call_command('apply_catalog_delta', delta_path, stdout=io.StringIO())
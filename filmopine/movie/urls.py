@@ -1,16 +1,36 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MovieViewSet, MovieSearchView
-from review.views import ReviewListAPIView, ReviewDetailAPIView
+from .views import MovieViewSet, MovieSearchView, MovieBatchView
+from review.views import ReviewListAPIView, ReviewDetailAPIView, RatingTimeSeriesAPIView, review_stream
+from recommendation.views import SimilarMoviesAPIView
+from core.async_views import async_read_view
+from review import async_views as review_async_views
+from . import async_views
 
 router = DefaultRouter()
 router.register('', MovieViewSet)
 
 urlpatterns = [
     path('search/', MovieSearchView.as_view(), name='movie-search'),
+    path('batch/', MovieBatchView.as_view(), name='movie-batch'),
+    path('<int:pk>/similar/', SimilarMoviesAPIView.as_view(), name='movie-similar'),
     path('<int:object_id>/reviews/', ReviewListAPIView.as_view(), name='movie_reviews'),
+    path('<int:object_id>/ratings/', RatingTimeSeriesAPIView.as_view(), name='movie_rating_timeseries'),
+    path('<int:object_id>/reviews/stream/', review_stream, name='movie_review_stream'),
     path('<int:object_id>/reviews/<uuid:review_id>/', ReviewDetailAPIView.as_view(), name='movie_review_detail'),  # New detail route within the movie app
     path('', include(router.urls)),  # Include all movie routes
 
 
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Under ASGI, reads are served by async views (see core.async_views); the sync views still handle everything else
+    urlpatterns = [
+        path('', async_read_view(async_views.movie_list, MovieViewSet.as_view({'get': 'list', 'post': 'create'})), name='movie-list'),
+        path('<int:pk>/', async_read_view(async_views.movie_detail, MovieViewSet.as_view({
+            'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+        })), name='movie-detail'),
+        path('<int:object_id>/reviews/', async_read_view(review_async_views.object_review_list, ReviewListAPIView.as_view()), name='movie_reviews'),
+        path('<int:object_id>/reviews/<uuid:review_id>/', async_read_view(review_async_views.object_review_detail, ReviewDetailAPIView.as_view()), name='movie_review_detail'),
+    ] + urlpatterns
@@ -1,5 +1,8 @@
+import logging
 import requests
 from decouple import config
+from django.conf import settings
+from django.db.models import Q
 from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.pagination import PageNumberPagination
@@ -9,8 +12,13 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from core.permissions import IsAdminOrReadOnly
+from core.throttling import omdb_budget_allows
 from .models import Movie
-from .serializers import MovieSerializer
+from .search import fuzzy_search
+from .snapshot import snapshot_for
+from .serializers import MovieSerializer, MovieRowSerializer, MovieBatchRequestSerializer
+
+logger = logging.getLogger(__name__)
 
 class MovieViewSet(viewsets.ModelViewSet):
     """
@@ -28,7 +36,8 @@ class MovieViewSet(viewsets.ModelViewSet):
             are allowed for all users.
 
     Methods:
-        list(request): Retrieves a paginated list of movies.
+        list(request): Retrieves a paginated list of movies (read-only fast path, see MovieRowSerializer,
+            or the catalog snapshot, see movie.snapshot).
         create(request): Allows an admin to create a new movie.
         retrieve(request, pk): Retrieves details of a specific movie by its primary key (pk).
         update(request, pk): Allows an admin to update an existing movie.
@@ -39,6 +48,22 @@ class MovieViewSet(viewsets.ModelViewSet):
     serializer_class = MovieSerializer
     permission_classes = [IsAdminOrReadOnly] # custom permission
 
+    def list(self, request, *args, **kwargs):
+        """
+        Retrieve a paginated list of movies.
+
+        Uses the read-only fast path: rows are fetched with `.values()` and serialized by
+        MovieRowSerializer, which returns the same output as MovieSerializer. When a catalog
+        snapshot is deployed (CATALOG_SNAPSHOT_PATH), the page is served from it instead,
+        without querying the database (see movie.snapshot).
+        """
+        snapshot = snapshot_for(request)
+        if snapshot is not None:
+            return snapshot.paginated_response(snapshot.movies(), self.paginator, request)
+        queryset = self.filter_queryset(self.get_queryset()).values(*MovieRowSerializer.columns)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(MovieRowSerializer().serialize(page))
+
 class MovieSearchPagination(PageNumberPagination):
     """
     Custom pagination class for movie search results in the Film Opine API.
@@ -70,7 +95,10 @@ class MovieSearchView(APIView):
     If no query is provided, it returns all movies in the local database with pagination.
     When a query is given, it fetches matching movies from the OMDb API, updates or
     creates corresponding entries in the local database, and returns the results with
-    pagination.
+    pagination. With `mode=fuzzy`, the query is instead matched against the local
+    trigram title index, tolerating typos (e.g. "incepton" finds "Inception"). OMDb
+    searches have their own stricter budget; once it is used up, the local search is
+    used instead (the `X-Search-Source` response header tells which one answered).
 
     Attributes:
         OMDB_API_KEY (str): The API key for accessing the OMDb API.
@@ -84,13 +112,16 @@ class MovieSearchView(APIView):
             it returns all movies from the local database.
     """
     OMDB_API_KEY = config('OMDB_API_KEY')
-    OMDB_BASE_URL = 'http://www.omdbapi.com/'
+    OMDB_BASE_URL = config('OMDB_BASE_URL', default='http://www.omdbapi.com/') # e.g. the `omdb_stub` command when replaying traffic
     paginator = MovieSearchPagination()
 
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('query', openapi.IN_QUERY, 
                               description="Search term for movies", type=openapi.TYPE_STRING),
+            openapi.Parameter('mode', openapi.IN_QUERY,
+                              description="'omdb' (default) searches the OMDb API, 'fuzzy' runs a typo-tolerant search over local movie titles",
+                              type=openapi.TYPE_STRING, enum=['omdb', 'fuzzy']),
         ],
         responses={
             200: "Paginated list of movies",
@@ -105,6 +136,8 @@ class MovieSearchView(APIView):
         If no query is provided, it returns all movies from the local database with pagination.
         If a query is provided, it fetches matching movies from the OMDb API, updates or creates
         corresponding entries in the local database, and returns the results with pagination.
+        If `mode=fuzzy` is given, or the OMDb search budget is exhausted, the query is matched
+        against local movie titles only, ordered from the most to the least similar title.
 
         Args:
             request (Request): The HTTP request object containing query parameters.
@@ -114,17 +147,26 @@ class MovieSearchView(APIView):
                 - A list of all movies if no query is provided.
                 - A list of movies matching the query from the OMDb API, 
                 along with the status code indicating success or failure.
+                - A list of local movies with a title similar to the query (fuzzy mode).
         """
         query = request.query_params.get('query')
+        mode = request.query_params.get('mode', 'omdb')
 
         # If no query is provided, return all movies
         if not query:
             # Retrieve all movies and paginate
-            movies = Movie.objects.all()
+            movies = Movie.objects.values(*MovieRowSerializer.columns)
             paginated_movies = self.paginator.paginate_queryset(movies, request)
 
-            serializer = MovieSerializer(paginated_movies, many=True)
-            return self.paginator.get_paginated_response(serializer.data)
+            return self.paginator.get_paginated_response(MovieRowSerializer().serialize(paginated_movies))
+
+        if mode == 'fuzzy':
+            return self.local_search(query, request)
+
+        # Out of OMDb budget (see core.throttling): degrade to local results instead of failing
+        if not omdb_budget_allows(request):
+            return self.local_search(query, request)
+
         # Send a request to the OMDb API
         url = f"{self.OMDB_BASE_URL}?apikey={self.OMDB_API_KEY}&s={query}"
         omdb_response = requests.get(url).json()
@@ -159,4 +201,146 @@ class MovieSearchView(APIView):
         # Paginate the results
         paginated_movies = self.paginator.paginate_queryset(movies, request)
 
-        return self.paginator.get_paginated_response(paginated_movies)
\ No newline at end of file
+        response = self.paginator.get_paginated_response(paginated_movies)
+        response['X-Search-Source'] = 'omdb'
+        return response
+
+    def local_search(self, query, request):
+        """
+        Typo-tolerant search over the local trigram title index, best match first.
+
+        Used for `mode=fuzzy` and as the fallback when the OMDb budget of the client (or of
+        the whole API) is exhausted. The response carries `X-Search-Source: local`.
+
+        Args:
+            query (str): The search term.
+            request (Request): The HTTP request object (for pagination).
+
+        Returns:
+            Response: A paginated list of local movies with a title similar to the query.
+        """
+        ranked_ids = [movie_id for movie_id, _ in fuzzy_search(query)]
+        paginated_ids = self.paginator.paginate_queryset(ranked_ids, request)
+
+        rows = {row['id']: row for row in Movie.objects.filter(id__in=paginated_ids).values(*MovieRowSerializer.columns)}
+        movies = [rows[movie_id] for movie_id in paginated_ids if movie_id in rows]
+        response = self.paginator.get_paginated_response(MovieRowSerializer().serialize(movies))
+        response['X-Search-Source'] = 'local'
+        return response
+
+class MovieBatchView(APIView):
+    """
+    API View for looking up many movies at once by local ID and/or IMDb ID.
+
+    Replaces N calls to `MovieViewSet.retrieve` (e.g. for the movies of a page of reviews,
+    or a watchlist) with one request: all movies are resolved with a single query, and the
+    review counts and average ratings with a single grouped query (see MovieRowSerializer).
+
+    Results come back in request order (`ids` first, then `imdb_ids`), one entry per
+    requested key, with `movie` set to null for misses. With `fetch_missing`, unknown IMDb
+    IDs are fetched from OMDb in one pass, within the OMDb search budget (see
+    core.throttling) and at most MOVIE_BATCH_MAX_OMDB_FETCHES per request.
+
+    Methods:
+        get(request): Lookup with comma-separated `ids` / `imdb_ids` query parameters.
+        post(request): Lookup with a JSON body, for long lists.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('ids', openapi.IN_QUERY, description="Comma-separated movie IDs", type=openapi.TYPE_STRING),
+            openapi.Parameter('imdb_ids', openapi.IN_QUERY, description="Comma-separated IMDb IDs", type=openapi.TYPE_STRING),
+        ],
+        responses={200: "Movies in request order, with misses", 400: "Invalid or too many IDs"}
+    )
+    def get(self, request):
+        """
+        Handles GET requests: `?ids=1,2,3&imdb_ids=tt0111161,tt0068646`.
+        """
+        data = {
+            name: [value for value in request.query_params.get(name, '').split(',') if value]
+            for name in ('ids', 'imdb_ids')
+        }
+        return self.lookup(data)
+
+    @swagger_auto_schema(request_body=MovieBatchRequestSerializer, responses={200: "Movies in request order, with misses", 400: "Invalid or too many IDs"})
+    def post(self, request):
+        """
+        Handles POST requests: `{"ids": [1, 2], "imdb_ids": ["tt0111161"], "fetch_missing": true}`.
+        """
+        return self.lookup(request.data)
+
+    def lookup(self, data):
+        """
+        Validate the requested keys and build the response.
+
+        Args:
+            data (dict): Request data (see MovieBatchRequestSerializer).
+
+        Returns:
+            Response: `{"results": [{"id"|"imdb_id": ..., "movie": {...} or null}, ...],
+                "missing": {"ids": [...], "imdb_ids": [...]}}`.
+        """
+        serializer = MovieBatchRequestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        imdb_ids = serializer.validated_data['imdb_ids']
+
+        rows = list(Movie.objects.filter(Q(id__in=ids) | Q(imdb_id__in=imdb_ids)).values(*MovieRowSerializer.columns))
+
+        if serializer.validated_data['fetch_missing']:
+            known = {row['imdb_id'] for row in rows}
+            fetched_ids = self.fetch_from_omdb([imdb_id for imdb_id in dict.fromkeys(imdb_ids) if imdb_id not in known])
+            if fetched_ids:
+                new_rows = Movie.objects.filter(id__in=fetched_ids).exclude(id__in=[row['id'] for row in rows])
+                rows.extend(new_rows.values(*MovieRowSerializer.columns))
+
+        by_id = {movie['id']: movie for movie in MovieRowSerializer().serialize(rows)}
+        by_imdb_id = {movie['imdb_id']: movie for movie in by_id.values()}
+
+        results = [{'id': movie_id, 'movie': by_id.get(movie_id)} for movie_id in ids]
+        results += [{'imdb_id': imdb_id, 'movie': by_imdb_id.get(imdb_id)} for imdb_id in imdb_ids]
+        return Response({
+            'results': results,
+            'missing': {
+                'ids': [movie_id for movie_id in ids if movie_id not in by_id],
+                'imdb_ids': [imdb_id for imdb_id in imdb_ids if imdb_id not in by_imdb_id],
+            },
+        })
+
+    def fetch_from_omdb(self, imdb_ids):
+        """
+        Fetch unknown movies from OMDb by IMDb ID and store them, as MovieSearchView does.
+
+        Stops at the first ID the OMDb budget refuses, and after MOVIE_BATCH_MAX_OMDB_FETCHES IDs.
+        Each call waits at most OMDB_TIMEOUT seconds; an ID whose call fails (timeout,
+        connection error, invalid response) is logged and left missing, without failing the
+        batch.
+
+        Returns:
+            list: IDs of the movies created or updated.
+        """
+        fetched = []
+        with requests.Session() as session:
+            for imdb_id in imdb_ids[:settings.MOVIE_BATCH_MAX_OMDB_FETCHES]:
+                if not omdb_budget_allows(self.request):
+                    break
+                params = {'apikey': MovieSearchView.OMDB_API_KEY, 'i': imdb_id}
+                try:
+                    item = session.get(MovieSearchView.OMDB_BASE_URL, params=params, timeout=settings.OMDB_TIMEOUT).json()
+                except (requests.RequestException, ValueError): # ValueError: the body is not JSON
+                    logger.warning("OMDb lookup of %s failed, reporting it as missing.", imdb_id, exc_info=True)
+                    continue
+                if item.get("Response") == "False":
+                    continue
+                movie, created = Movie.objects.update_or_create(
+                    imdb_id=item.get("imdbID"),
+                    defaults={
+                        "title": item.get("Title"),
+                        "year": item.get("Year"),
+                        "film_type": item.get("Type"),
+                        "poster": item.get("Poster")
+                    }
+                )
+                fetched.append(movie.id)
+        return fetched
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import RecommendationBuild
+
+# Register your models here.
+
+@admin.register(RecommendationBuild)
+class RecommendationBuildAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'finished_at', 'incremental', 'reviews_count', 'movies_count']
@@ -0,0 +1,200 @@
+from collections import defaultdict
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from review.models import Review
+from .models import SimilarMovie, RecommendationBuild
+
+RATING_MIDPOINT = 3.0 # Middle of the 1.0 - 5.0 rating scale
+
+def movie_reviews():
+    """
+    Reviews of movies that still exist (their `movie` is null otherwise).
+    """
+    return Review.objects.filter(movie__isnull=False)
+
+def load_ratings():
+    """
+    Read every movie rating as three parallel numpy arrays.
+
+    Returns:
+        tuple: (user_ids, movie_ids, ratings) arrays of equal length.
+    """
+    user_ids, movie_ids, ratings = [], [], []
+    for user_id, movie_id, rating in movie_reviews().values_list('user_id', 'movie_id', 'rating').iterator(chunk_size=20000):
+        user_ids.append(user_id)
+        movie_ids.append(movie_id)
+        ratings.append(float(rating))
+    return (
+        np.array(user_ids, dtype=np.int64),
+        np.array(movie_ids, dtype=np.int64),
+        np.array(ratings, dtype=np.float64),
+    )
+
+def build_item_matrix(user_ids, movie_ids, ratings):
+    """
+    Build the sparse movie x user matrix of mean-centered ratings, with unit-length rows.
+
+    Each rating is centered on the mean rating of its user, so that a harsh and a generous
+    reviewer liking the same movies produce similar vectors. Rows are L2-normalized, which
+    turns the dot product of two rows into their cosine similarity.
+
+    Args:
+        user_ids (ndarray): Reviewer id of every rating.
+        movie_ids (ndarray): Movie id of every rating.
+        ratings (ndarray): The ratings themselves.
+
+    Returns:
+        tuple: (movie_index, matrix) where movie_index[row] is the movie id of a matrix row.
+    """
+    movie_index, movie_pos = np.unique(movie_ids, return_inverse=True)
+    user_index, user_pos = np.unique(user_ids, return_inverse=True)
+
+    # Mean-center on each user's average rating
+    user_means = np.bincount(user_pos, weights=ratings) / np.bincount(user_pos)
+    centered = ratings - user_means[user_pos]
+
+    # A user may have reviewed the same movie more than once: average those ratings
+    cells, cell_pos = np.unique(movie_pos * len(user_index) + user_pos, return_inverse=True)
+    values = np.bincount(cell_pos, weights=centered) / np.bincount(cell_pos)
+
+    matrix = sparse.csr_matrix(
+        (values, (cells // len(user_index), cells % len(user_index))),
+        shape=(len(movie_index), len(user_index))
+    )
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return movie_index, sparse.diags(1.0 / norms) @ matrix
+
+def top_k_neighbors(matrix, rows, k, block_size=1024):
+    """
+    Compute the k most similar rows of each requested row.
+
+    Similarities are computed block by block as a sparse matrix product, so memory stays
+    bounded by `block_size` rows of the similarity matrix. Only positive similarities are kept.
+
+    Args:
+        matrix (csr_matrix): Row-normalized movie x user matrix.
+        rows (ndarray): Indices of the rows to compute neighbors for.
+        k (int): Number of neighbors to keep per row.
+        block_size (int): Number of rows multiplied at once.
+
+    Yields:
+        tuple: (row, neighbor_rows, scores), neighbors ordered from most to least similar.
+    """
+    matrix = matrix.tocsr()
+    matrix_t = matrix.T.tocsr()
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        scores = (matrix[block] @ matrix_t).tocsr()
+        for offset, row in enumerate(block):
+            begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+            cols, vals = scores.indices[begin:end], scores.data[begin:end]
+
+            keep = (cols != row) & (vals > 0)
+            cols, vals = cols[keep], vals[keep]
+            if len(vals) > k:
+                top = np.argpartition(-vals, k)[:k]
+                cols, vals = cols[top], vals[top]
+
+            order = np.argsort(-vals, kind='stable')
+            yield row, cols[order], vals[order]
+
+def build_recommendations(incremental=False, top_k=None, batch_size=5000):
+    """
+    Recompute and store the item-item neighbor lists.
+
+    A full build recomputes every movie. An incremental build only recomputes movies that
+    received new or edited reviews since the start of the last finished build (the neighbor
+    lists of the other movies are left as they are). Deleted reviews are only reflected by
+    the next full build.
+
+    Args:
+        incremental (bool): Only recompute movies with new reviews. Falls back to a full
+            build if there is no previous finished build.
+        top_k (int, optional): Neighbors kept per movie. Defaults to settings.RECOMMENDATION_TOP_K.
+        batch_size (int): Rows inserted per INSERT statement.
+
+    Returns:
+        RecommendationBuild: The finished build record.
+    """
+    top_k = top_k or settings.RECOMMENDATION_TOP_K
+    last_build = RecommendationBuild.objects.filter(finished_at__isnull=False).order_by('-started_at').first()
+    build = RecommendationBuild.objects.create(started_at=timezone.now(), incremental=incremental and last_build is not None)
+
+    user_ids, movie_ids, ratings = load_ratings()
+    movie_index, matrix = build_item_matrix(user_ids, movie_ids, ratings)
+
+    if build.incremental:
+        changed = list(movie_reviews().filter(updated_at__gte=last_build.started_at).values_list('movie_id', flat=True).distinct())
+        rows = np.flatnonzero(np.isin(movie_index, changed))
+        stale = SimilarMovie.objects.filter(movie_id__in=changed)
+    else:
+        rows = np.arange(len(movie_index))
+        stale = SimilarMovie.objects.all()
+
+    with transaction.atomic():
+        stale.delete()
+        neighbors = []
+        for row, cols, scores in top_k_neighbors(matrix, rows, top_k):
+            movie_id = int(movie_index[row])
+            neighbors.extend(
+                SimilarMovie(movie_id=movie_id, similar_id=int(movie_index[col]), score=float(score))
+                for col, score in zip(cols, scores)
+            )
+            if len(neighbors) >= batch_size:
+                SimilarMovie.objects.bulk_create(neighbors, batch_size=batch_size)
+                neighbors = []
+        if neighbors:
+            SimilarMovie.objects.bulk_create(neighbors, batch_size=batch_size)
+
+    build.reviews_count = len(ratings)
+    build.movies_count = len(rows)
+    build.finished_at = timezone.now()
+    build.save()
+    return build
+
+def recommend_for_user(user, limit=None):
+    """
+    Personalized recommendations from the stored neighbor lists.
+
+    Every unseen neighbor of a movie the user reviewed is scored by the similarity-weighted
+    average of how much the user liked (or disliked) the movies it is similar to, relative to
+    the user's own average rating (or to the middle of the scale for users with a single
+    distinct rating). Only movies with a positive score are returned.
+
+    Args:
+        user (User): The user to recommend movies to.
+        limit (int, optional): Maximum number of movies returned. Defaults to settings.RECOMMENDATION_TOP_K.
+
+    Returns:
+        list: (movie_id, score) tuples, best recommendation first.
+    """
+    limit = limit or settings.RECOMMENDATION_TOP_K
+    ratings = defaultdict(list)
+    for movie_id, rating in movie_reviews().filter(user=user).values_list('movie_id', 'rating'):
+        ratings[movie_id].append(float(rating))
+    if not ratings:
+        return []
+
+    liked = {movie_id: sum(values) / len(values) for movie_id, values in ratings.items()}
+    baseline = sum(liked.values()) / len(liked)
+    if len(set(liked.values())) == 1:
+        baseline = RATING_MIDPOINT
+
+    weighted, total_similarity = defaultdict(float), defaultdict(float)
+    neighbors = SimilarMovie.objects.filter(movie_id__in=liked).values_list('movie_id', 'similar_id', 'score')
+    for movie_id, similar_id, score in neighbors:
+        if similar_id in liked:
+            continue
+        weighted[similar_id] += score * (liked[movie_id] - baseline)
+        total_similarity[similar_id] += score
+
+    ranked = [(movie_id, weighted[movie_id] / total_similarity[movie_id]) for movie_id in weighted]
+    ranked = [item for item in ranked if item[1] > 0]
+    ranked.sort(key=lambda item: (-item[1], item[0]))
+    return ranked[:limit]
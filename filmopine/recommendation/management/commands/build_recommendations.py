@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendation.engine import build_recommendations
+
+class Command(BaseCommand):
+    """
+    Build the item-item movie neighbor lists from the review matrix.
+
+    Meant to be run periodically (e.g. a nightly full build and frequent incremental
+    builds from a scheduler such as Heroku Scheduler or cron).
+
+    Usage:
+        python manage.py build_recommendations
+        python manage.py build_recommendations --incremental
+    """
+    help = 'Build the item-item movie neighbor lists used for recommendations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true', help='Only recompute movies that received new or edited reviews since the last build.')
+        parser.add_argument('--top-k', type=int, default=None, help='Neighbors kept per movie (defaults to RECOMMENDATION_TOP_K).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        build = build_recommendations(incremental=options['incremental'], top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Incremental' if build.incremental else 'Full'} build: {build.reviews_count} ratings, "
+            f"{build.movies_count} movies recomputed in {time.perf_counter() - started:.2f}s."
+        ))
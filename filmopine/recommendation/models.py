@@ -0,0 +1,53 @@
+from django.db import models
+from movie.models import Movie
+
+# Create your models here.
+class SimilarMovie(models.Model):
+    """
+    Precomputed item-item neighbor of a movie ("users who liked X also liked Y").
+
+    Rows are written by the `build_recommendations` management command, which keeps the
+    top-k most similar movies of every reviewed movie.
+
+    Attributes:
+        movie (ForeignKey): The movie the neighbor list belongs to.
+        similar (ForeignKey): A movie similar to `movie`.
+        score (float): Cosine similarity of the two movies' mean-centered rating vectors (0-1].
+    """
+
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similar_movies')
+    similar = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = [['movie', 'similar']]
+        indexes = [models.Index(fields=['movie', '-score'])]
+        ordering = ['-score']
+
+    def __str__(self):
+        return f"{self.movie_id} -> {self.similar_id} ({self.score:.3f})"
+
+
+class RecommendationBuild(models.Model):
+    """
+    Bookkeeping for a run of the `build_recommendations` command.
+
+    The start time of the last finished build is used by incremental runs to find the
+    movies that received new or edited reviews since.
+
+    Attributes:
+        started_at (datetime): When the build started reading reviews.
+        finished_at (datetime): When the neighbor lists were stored (null while running or if it failed).
+        incremental (bool): Whether only movies with new reviews were recomputed.
+        reviews_count (int): Number of ratings in the user x movie matrix.
+        movies_count (int): Number of movies whose neighbor lists were recomputed.
+    """
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+    incremental = models.BooleanField(default=False)
+    reviews_count = models.PositiveIntegerField(default=0)
+    movies_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{'Incremental' if self.incremental else 'Full'} build started {self.started_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from movie.serializers import MovieSerializer
+from .models import SimilarMovie
+
+class SimilarMovieSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a precomputed neighbor of a movie.
+
+    Attributes:
+        movie (MovieSerializer): The similar movie.
+        similarity (float): Cosine similarity between the two movies (0-1].
+    """
+
+    movie = MovieSerializer(source='similar', read_only=True)
+    similarity = serializers.FloatField(source='score', read_only=True)
+
+    class Meta:
+        model = SimilarMovie
+        fields = ['movie', 'similarity']
+
+class RecommendedMovieSerializer(serializers.Serializer):
+    """
+    Serializer for a personalized recommendation.
+
+    Attributes:
+        movie (MovieSerializer): The recommended movie.
+        score (float): How much more than average the user is expected to like the movie.
+    """
+
+    movie = MovieSerializer(read_only=True)
+    score = serializers.FloatField(read_only=True)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from rest_framework.test import APIClient
+from movie.models import Movie
+from review.models import Review
+from .engine import build_recommendations, recommend_for_user
+from .models import SimilarMovie
+
+User = get_user_model()
+
+class RecommendationTest(TestCase):
+    """
+    Test case for the item-item recommendation engine and endpoints.
+    """
+
+    def setUp(self):
+        """
+        Set up two clusters of movies: users who like one movie of a cluster like the others.
+        """
+        self.content_type = ContentType.objects.get_for_model(Movie)
+        self.action = [Movie.objects.create(imdb_id=f"tt000000{i}", title=f"Action {i}") for i in range(3)]
+        self.drama = [Movie.objects.create(imdb_id=f"tt100000{i}", title=f"Drama {i}") for i in range(3)]
+        self.users = [User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="password123") for i in range(4)]
+
+        # users 0-1 love action and dislike drama, users 2-3 the other way round
+        for index, user in enumerate(self.users):
+            loves, dislikes = (self.action, self.drama) if index < 2 else (self.drama, self.action)
+            for movie in loves:
+                self.review(user, movie, 5.0)
+            for movie in dislikes:
+                self.review(user, movie, 1.0)
+
+        self.client = APIClient()
+
+    def review(self, user, movie, rating):
+        return Review.objects.create(
+            user=user, content_type=self.content_type, object_id=movie.id,
+            review_title="Review", review_content="Content", rating=rating
+        )
+
+    def test_neighbors_stay_within_cluster(self):
+        """
+        Test that the most similar movies of an action movie are the other action movies.
+        """
+        build_recommendations()
+        similar = list(SimilarMovie.objects.filter(movie=self.action[0]).values_list('similar_id', flat=True))
+        self.assertEqual(set(similar), {self.action[1].id, self.action[2].id})
+
+    def test_incremental_build_only_recomputes_changed_movies(self):
+        """
+        Test that an incremental build only touches movies with new reviews.
+        """
+        build_recommendations()
+        newcomer = User.objects.create_user(username="newcomer", email="newcomer@example.com", password="password123")
+        self.review(newcomer, self.action[0], 4.0)
+        self.review(newcomer, self.drama[0], 2.0)
+
+        build = build_recommendations(incremental=True)
+        self.assertTrue(build.incremental)
+        self.assertEqual(build.movies_count, 2)
+
+    def test_personalized_recommendations(self):
+        """
+        Test that a user who liked one action movie is recommended the other action movies.
+        """
+        build_recommendations()
+        fan = User.objects.create_user(username="fan", email="fan@example.com", password="password123")
+        self.review(fan, self.action[0], 5.0)
+        self.review(fan, self.drama[0], 2.0)
+
+        recommended = [movie_id for movie_id, _ in recommend_for_user(fan)]
+        self.assertEqual(set(recommended), {self.action[1].id, self.action[2].id})
+
+    def test_endpoints(self):
+        """
+        Test the similar movies and personalized recommendation endpoints.
+        """
+        build_recommendations()
+        response = self.client.get(f'/api/movies/{self.action[0].id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('similarity', response.data[0])
+
+        self.assertEqual(self.client.get('/api/recommendations/me/').status_code, 401)
+        self.client.force_authenticate(user=self.users[0])
+        self.assertEqual(self.client.get('/api/recommendations/me/').status_code, 200)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import RecommendedMoviesAPIView
+
+urlpatterns = [
+    path('me/', RecommendedMoviesAPIView.as_view(), name='recommendations-me'),
+]
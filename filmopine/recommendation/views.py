@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from movie.models import Movie
+from .engine import recommend_for_user
+from .models import SimilarMovie
+from .serializers import SimilarMovieSerializer, RecommendedMovieSerializer
+
+limit_parameter = openapi.Parameter(
+    'limit', openapi.IN_QUERY,
+    description="Maximum number of movies to return (capped at RECOMMENDATION_TOP_K)",
+    type=openapi.TYPE_INTEGER
+)
+
+def get_limit(request):
+    """
+    Read the `limit` query parameter, capped at the number of stored neighbors per movie.
+    """
+    try:
+        limit = int(request.query_params.get('limit', settings.RECOMMENDATION_TOP_K))
+    except ValueError:
+        limit = settings.RECOMMENDATION_TOP_K
+    return max(1, min(limit, settings.RECOMMENDATION_TOP_K))
+
+class SimilarMoviesAPIView(APIView):
+    """
+    API view returning the movies most similar to a given movie.
+
+    Similarities come from the neighbor lists precomputed by the `build_recommendations`
+    command ("users who liked this movie also liked..."), so the request is a single
+    indexed read.
+    """
+
+    @swagger_auto_schema(manual_parameters=[limit_parameter], responses={200: SimilarMovieSerializer(many=True)})
+    def get(self, request, pk):
+        """
+        Retrieve the movies most similar to the movie identified by `pk`, most similar first.
+
+        Args:
+            request: The HTTP request object.
+            pk (int): The ID of the movie.
+
+        Returns:
+            Response: A list of similar movies with their similarity score, or a 404 if
+                    the movie does not exist.
+        """
+        movie = get_object_or_404(Movie, pk=pk)
+        neighbors = SimilarMovie.objects.filter(movie=movie).select_related('similar')[:get_limit(request)]
+        serializer = SimilarMovieSerializer(neighbors, many=True)
+        return Response(serializer.data)
+
+class RecommendedMoviesAPIView(APIView):
+    """
+    API view returning personalized movie recommendations for the authenticated user,
+    based on the movies they reviewed and the precomputed item-item neighbor lists.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[limit_parameter], responses={200: RecommendedMovieSerializer(many=True)})
+    def get(self, request):
+        """
+        Retrieve recommended movies for the current user, best recommendation first.
+
+        Returns:
+            Response: A list of recommended movies with their score. Users who have not
+                    reviewed anything yet get an empty list.
+        """
+        ranked = recommend_for_user(request.user, limit=get_limit(request))
+        movies = Movie.objects.in_bulk([movie_id for movie_id, _ in ranked])
+        recommendations = [
+            {'movie': movies[movie_id], 'score': score}
+            for movie_id, score in ranked if movie_id in movies
+        ]
+        serializer = RecommendedMovieSerializer(recommendations, many=True)
+        return Response(serializer.data)
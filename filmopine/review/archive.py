@@ -0,0 +1,47 @@
+from contextvars import ContextVar
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Review, ArchivedReview
+
+_archiving = ContextVar('review_archiving', default=False)
+
+def is_archiving():
+    """
+    Whether reviews are being deleted because they were archived (rather than removed by
+    their author), in which case derived data such as rating rollups must be kept.
+    """
+    return _archiving.get()
+
+def archive_cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move the oldest reviews created before `cutoff` to the archive, in one transaction.
+
+    The reviews are copied with their IDs, so their URLs keep working, then deleted from
+    the Review table (which also removes them from activity feeds).
+
+    Args:
+        cutoff (datetime): Only reviews created before it are archived.
+        batch_size (int): Maximum number of reviews moved.
+
+    Returns:
+        int: Number of reviews archived; fewer than `batch_size` means there are no more.
+    """
+    fields = [field.attname for field in Review._meta.concrete_fields]
+    with transaction.atomic():
+        rows = list(
+            Review.objects.select_for_update().filter(created_at__lt=cutoff)
+            .order_by('created_at').values(*fields)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedReview.objects.bulk_create([ArchivedReview(**row) for row in rows])
+        token = _archiving.set(True)
+        try:
+            Review.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        finally:
+            _archiving.reset(token)
+    return len(rows)
@@ -0,0 +1,94 @@
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from core.async_views import apaginate_queryset
+from movie.search import fuzzy_search
+from movie.snapshot import snapshot_for
+from .models import Review, ArchivedReview
+from .serializers import ReviewRowSerializer, ReviewFullRowSerializer, review_row_serializer
+from .views import GenericReviewPagination, user_review_rows
+
+async def paginated_reviews(request, reviews, paginator):
+    row_serializer = review_row_serializer(request)
+    rows = await apaginate_queryset(paginator, reviews.values(*row_serializer.columns), request)
+    return paginator.get_paginated_response(await row_serializer().aserialize(rows))
+
+async def review_list(request):
+    """
+    Async read path of ReviewViewSet.list (see core.async_views.async_read_view).
+    """
+    snapshot = snapshot_for(request) if review_row_serializer(request) is ReviewRowSerializer else None
+    if snapshot is not None:
+        return snapshot.paginated_response(snapshot.reviews(), api_settings.DEFAULT_PAGINATION_CLASS(), request)
+    return await paginated_reviews(request, Review.objects.all(), api_settings.DEFAULT_PAGINATION_CLASS())
+
+async def object_review_list(request, object_id, content_type='movie'):
+    """
+    Async read path of ReviewListAPIView: the paginated reviews of an object.
+
+    Args:
+        request (Request): The authenticated DRF request.
+        object_id (int): The ID of the reviewed object.
+        content_type (str): Its type (default is 'movie').
+
+    Returns:
+        Response: The same paginated reviews as the sync view, or a 404 for an invalid content type.
+    """
+    snapshot = snapshot_for(request) if content_type == 'movie' and review_row_serializer(request) is ReviewRowSerializer else None
+    if snapshot is not None:
+        return snapshot.paginated_response(snapshot.reviews(object_id), GenericReviewPagination(), request)
+    if content_type == 'movie':
+        reviews = Review.objects.filter(movie_id=object_id)
+    else:
+        try:
+            content_type_obj = await ContentType.objects.aget(app_label=content_type, model=content_type)
+        except ContentType.DoesNotExist:
+            return Response({"detail": "Invalid content type."}, status=404)
+        reviews = Review.objects.filter(content_type=content_type_obj, object_id=object_id)
+    return await paginated_reviews(request, reviews, GenericReviewPagination())
+
+async def object_review_detail(request, object_id, review_id):
+    """
+    Async read path of ReviewDetailAPIView: a single review of an object, live or archived.
+
+    Returns:
+        Response: The review, as serialized by ReviewSerializer, or a 404 if it does not exist.
+    """
+    row = await Review.objects.filter(id=review_id, object_id=object_id).values(*ReviewFullRowSerializer.columns).afirst()
+    if row is None:
+        row = await ArchivedReview.objects.filter(id=review_id, object_id=object_id).values(*ReviewFullRowSerializer.columns).afirst()
+    if row is None:
+        return Response({"detail": "Review not found."}, status=status.HTTP_404_NOT_FOUND)
+    data = await ReviewFullRowSerializer().aserialize([row])
+    return Response(data[0])
+
+async def review_search(request):
+    """
+    Async read path of ReviewSearchAPIView, with the same query parameters. The fuzzy title
+    search is built on the sync ORM and runs in a thread.
+    """
+    movie_title = request.query_params.get('movie_title')
+    rating = request.query_params.get('rating')
+    mode = request.query_params.get('mode', 'contains')
+
+    filters = Q()
+    if movie_title:
+        if mode == 'fuzzy':
+            filters &= Q(movie_id__in=[movie_id for movie_id, _ in await sync_to_async(fuzzy_search)(movie_title)])
+        else:
+            filters &= Q(movie__title__icontains=movie_title)
+    if rating:
+        filters &= Q(rating=rating)
+
+    return await paginated_reviews(request, Review.objects.filter(filters), GenericReviewPagination())
+
+async def review_me(request):
+    """
+    Async read path of ReviewMeAPIView: the reviews of the authenticated user, archived ones included.
+    """
+    row_serializer, paginator = review_row_serializer(request), GenericReviewPagination()
+    rows = await apaginate_queryset(paginator, user_review_rows(request.user, row_serializer.columns), request)
+    return paginator.get_paginated_response(await row_serializer().aserialize(rows))
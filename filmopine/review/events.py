@@ -0,0 +1,255 @@
+import asyncio
+import itertools
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+def movie_channel(movie_id):
+    """
+    Name of the pub/sub channel carrying the new reviews of a movie.
+    """
+    return f"movie:{movie_id}"
+
+class Subscription:
+    """
+    A subscriber's bounded inbox on a channel.
+
+    Events are handed over to the subscriber's event loop thread-safely. When a slow
+    client lets its inbox fill up, further events are dropped and the subscription is
+    flagged as overflowed; the stream then tells the client to resynchronize (refetch
+    the review list) instead of buffering without limit.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """
+        Put an (event_id, data) tuple in the inbox. Must run in the subscriber's loop.
+        """
+        if self.queue.full():
+            self.overflowed = True
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        Wait up to `timeout` seconds for the next (event_id, data) event, or return None.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class InProcessBroker:
+    """
+    Pub/sub broker delivering events to the subscribers of the current process.
+
+    `publish` can be called from any thread (e.g. a sync view running in a worker thread
+    under ASGI); delivery is scheduled on each subscriber's event loop. Only suitable when
+    a single process serves both writes and streams.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.REVIEW_STREAM_QUEUE_SIZE
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+        self.event_ids = itertools.count(1)
+
+    def subscribe(self, channel):
+        """
+        Subscribe to a channel. Must be called from a running event loop.
+
+        Returns:
+            Subscription: The new subscription; call `close()` when done.
+        """
+        subscription = Subscription(self, channel, self.queue_size)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(subscribers) for subscribers in self.subscriptions.values())
+
+    def has_subscribers(self, channel):
+        with self.lock:
+            return bool(self.subscriptions.get(channel))
+
+    def has_listeners(self, channel):
+        """
+        Whether an event published on the channel may reach anyone, so that publishers can
+        skip rendering events nobody listens to.
+        """
+        return self.has_subscribers(channel)
+
+    def publish(self, channel, data):
+        """
+        Publish a pre-rendered event payload (str) on a channel.
+        """
+        self.dispatch(channel, next(self.event_ids), data)
+
+    def dispatch(self, channel, event_id, data):
+        """
+        Hand an event over to every local subscriber of the channel.
+        """
+        with self.lock:
+            subscribers = list(self.subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, (event_id, data))
+            except RuntimeError: # The subscriber's event loop is closed
+                self.unsubscribe(subscription)
+
+class CacheBroker(InProcessBroker):
+    """
+    Pub/sub broker for multi-worker deployments, using the shared Django cache as the
+    message log (a local stand-in for a real broker such as Redis pub/sub).
+
+    Publishing appends the event to a per-channel log in the cache (an atomic sequence
+    counter plus one key per event). In each worker, a single polling task per channel
+    with local subscribers reads new events and fans them out in-process, so the cache
+    load does not grow with the number of open streams. While it runs, the polling task
+    also keeps a presence key alive in the cache, which tells publishers in every worker
+    that the channel has listeners.
+    """
+
+    def __init__(self, queue_size=None, cache_alias='default', poll_interval=None, ttl=60):
+        super().__init__(queue_size)
+        self.cache = caches[cache_alias]
+        self.poll_interval = poll_interval or settings.REVIEW_STREAM_POLL_INTERVAL
+        self.ttl = ttl
+        self.pollers = {}
+
+    def key(self, channel, suffix):
+        return f"review-events:{channel}:{suffix}"
+
+    def has_listeners(self, channel):
+        return self.has_subscribers(channel) or self.cache.get(self.key(channel, 'listeners')) is not None
+
+    def publish(self, channel, data):
+        sequence_key = self.key(channel, 'seq')
+        self.cache.add(sequence_key, 0, timeout=None)
+        event_id = self.cache.incr(sequence_key)
+        self.cache.set(self.key(channel, event_id), data, timeout=self.ttl)
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        poller = self.pollers.get((channel, subscription.loop))
+        if poller is None or poller.done():
+            self.pollers[(channel, subscription.loop)] = subscription.loop.create_task(self.poll(channel))
+        return subscription
+
+    async def poll(self, channel):
+        """
+        Forward new events of a channel to the local subscribers until none are left.
+        """
+        sequence_key, listeners_key = self.key(channel, 'seq'), self.key(channel, 'listeners')
+        await self.cache.aset(listeners_key, True, timeout=self.ttl) # Before reading the sequence: no event is skipped in between
+        announced = time.monotonic()
+        last_seen = await self.cache.aget(sequence_key, 0)
+        try:
+            while self.has_subscribers(channel):
+                await asyncio.sleep(self.poll_interval)
+                if time.monotonic() - announced > self.ttl / 3:
+                    await self.cache.aset(listeners_key, True, timeout=self.ttl)
+                    announced = time.monotonic()
+                latest = await self.cache.aget(sequence_key, 0)
+                if latest <= last_seen:
+                    continue
+                event_ids = range(last_seen + 1, latest + 1)
+                events = await self.cache.aget_many([self.key(channel, event_id) for event_id in event_ids])
+                for event_id in event_ids:
+                    data = events.get(self.key(channel, event_id))
+                    if data is not None:
+                        self.dispatch(channel, event_id, data)
+                last_seen = latest
+        finally:
+            self.pollers.pop((channel, asyncio.get_running_loop()), None)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    """
+    Return the process-wide broker configured by settings.REVIEW_EVENTS_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.REVIEW_EVENTS_BROKER)()
+    return _broker
+
+def format_event(data, event_id=None, event=None):
+    """
+    Format a Server-Sent Events message.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+async def sse_stream(subscription, heartbeat=None, idle_timeout=None, max_duration=None):
+    """
+    Turn a subscription into a stream of Server-Sent Events.
+
+    A comment line is sent every `heartbeat` seconds to keep proxies from closing the
+    connection. The stream ends (and the client reconnects on its own) once no event has
+    been sent for `idle_timeout` seconds or after `max_duration` seconds overall, so idle
+    or forgotten tabs do not hold server resources forever. A `resync` event is sent when
+    the client could not keep up and missed events.
+
+    Args:
+        subscription (Subscription): The subscription to read from; closed when the stream ends.
+        heartbeat (float, optional): Defaults to settings.REVIEW_STREAM_HEARTBEAT.
+        idle_timeout (float, optional): Defaults to settings.REVIEW_STREAM_IDLE_TIMEOUT.
+        max_duration (float, optional): Defaults to settings.REVIEW_STREAM_MAX_DURATION.
+
+    Yields:
+        str: SSE-formatted chunks.
+    """
+    heartbeat = heartbeat or settings.REVIEW_STREAM_HEARTBEAT
+    idle_timeout = idle_timeout or settings.REVIEW_STREAM_IDLE_TIMEOUT
+    max_duration = max_duration or settings.REVIEW_STREAM_MAX_DURATION
+
+    started = last_event = time.monotonic()
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                yield format_event('{}', event='resync')
+                return
+
+            now = time.monotonic()
+            if now - last_event >= idle_timeout or now - started >= max_duration:
+                return
+
+            event = await subscription.get(timeout=min(heartbeat, idle_timeout - (now - last_event)))
+            if event is not None:
+                event_id, data = event
+                last_event = time.monotonic()
+                yield format_event(data, event_id=event_id, event='review')
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,43 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from review.archive import archive_batch, archive_cutoff
+
+class Command(BaseCommand):
+    """
+    Move the reviews older than REVIEW_ARCHIVE_AFTER_DAYS from the Review table to the
+    ArchivedReview table (see review.archive).
+
+    Reviews are moved oldest first, in transactions of REVIEW_ARCHIVE_BATCH_SIZE reviews,
+    with an optional pause between batches to spread the load on the primary and let the
+    replicas keep up. The command can be interrupted and resumed at any time.
+
+    Usage:
+        python manage.py archive_reviews
+        python manage.py archive_reviews --older-than 730 --max-batches 100 --pause 0.5
+    """
+    help = 'Move old reviews to the review archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, help='Age in days; defaults to REVIEW_ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=settings.REVIEW_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        if not settings.REVIEW_ARCHIVE_AFTER_DAYS:
+            # Movie statistics only include the archive when archiving is turned on
+            raise CommandError("Review archiving is disabled, set REVIEW_ARCHIVE_AFTER_DAYS.")
+        days = options['older_than'] or settings.REVIEW_ARCHIVE_AFTER_DAYS
+        cutoff = archive_cutoff(days)
+
+        archived = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive_batch(cutoff, options['batch_size'])
+            archived += moved
+            batches += 1
+            if moved < options['batch_size']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} reviews created before {cutoff:%Y-%m-%d %H:%M}."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from review.rollups import backfill_rollups
+
+class Command(BaseCommand):
+    """
+    Rebuild the daily rating rollups from the reviews table.
+
+    Rollups are maintained automatically on review create, update and delete; run this
+    once after deploying them, or after bulk changes that bypass model signals
+    (QuerySet.update(), raw SQL).
+
+    Usage:
+        python manage.py backfill_rating_rollups
+    """
+    help = 'Rebuild the daily rating rollups from the reviews table.'
+
+    def handle(self, *args, **options):
+        written = backfill_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily rollup rows."))
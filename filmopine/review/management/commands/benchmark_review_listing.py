@@ -0,0 +1,80 @@
+import random
+import time
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import User
+from core.renderers import FastJSONRenderer
+from movie.models import Movie
+from review.models import Review, make_excerpt
+from review.serializers import ReviewRowSerializer, ReviewFullRowSerializer
+
+WORDS = "the film plot actor scene story camera light score pacing ending character dialogue twist".split()
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    """
+    Measure what listing excerpts save over listing full reviews: payload size and time
+    to query, serialize and render a page, with and without `review_content`.
+
+    Sample reviews of about --size bytes on average are created inside a transaction that
+    is rolled back at the end, so the command can be run against any database (measure on
+    MySQL, where the TEXT column is stored off-page).
+
+    Usage:
+        python manage.py benchmark_review_listing --reviews 2000 --page-size 100 --size 5000
+    """
+    help = 'Compare review listing pages with excerpts and with the full content.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=2000, help='Number of sample reviews.')
+        parser.add_argument('--page-size', type=int, default=100, help='Reviews per listed page.')
+        parser.add_argument('--size', type=int, default=5000, help='Average review_content length in bytes.')
+        parser.add_argument('--rounds', type=int, default=20, help='Number of timed pages per representation.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['reviews'], options['page_size'], options['size'], options['rounds'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count, page_size, size, rounds):
+        user = User.objects.create_user(username='benchmark-review-listing', password=None)
+        movie = Movie.objects.create(imdb_id='bench-listing', title="Benchmark Movie", year="2024", film_type="movie")
+        content_type = ContentType.objects.get_for_model(Movie)
+        rng = random.Random(0)
+        reviews = []
+        for i in range(count):
+            words = []
+            length = rng.randint(size // 2, size * 3 // 2)
+            while sum(len(word) + 1 for word in words) < length:
+                words.append(rng.choice(WORDS))
+            content = ' '.join(words)
+            reviews.append(Review(
+                user=user, content_type=content_type, object_id=movie.id, movie=movie, review_title=f"Review {i}",
+                review_content=content, review_excerpt=make_excerpt(content), review_length=len(content), rating=3.5,
+            ))
+        Review.objects.bulk_create(reviews, batch_size=500) # bulk_create bypasses Review.save(): the excerpts and movie are set above
+        queryset = Review.objects.filter(user=user).order_by('created_at', 'id')
+        pages = max(1, count // page_size)
+
+        self.stdout.write(f"{count} reviews of ~{size} bytes, pages of {page_size}\n")
+        results = {}
+        for label, row_serializer in (('full content', ReviewFullRowSerializer), ('excerpts', ReviewRowSerializer)):
+            payload = 0
+            started = time.perf_counter()
+            for round_ in range(rounds):
+                offset = (round_ % pages) * page_size
+                rows = queryset.values(*row_serializer.columns)[offset:offset + page_size]
+                payload = len(FastJSONRenderer().render(row_serializer().serialize(rows)))
+            results[label] = ((time.perf_counter() - started) / rounds * 1000, payload)
+            self.stdout.write(f"{label:<13} {results[label][0]:>8.2f} ms/page {payload / 1024:>10.1f} KB/page")
+
+        (full_ms, full_bytes), (excerpt_ms, excerpt_bytes) = results['full content'], results['excerpts']
+        self.stdout.write(self.style.SUCCESS(
+            f"Excerpts: x{full_ms / excerpt_ms:.1f} faster, x{full_bytes / excerpt_bytes:.1f} smaller pages."
+        ))
@@ -0,0 +1,104 @@
+import random
+import time
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import User
+from core.renderers import FastJSONRenderer
+from movie.models import Movie
+from review.models import Review, make_excerpt
+from review.serializers import ReviewRowSerializer
+
+WORDS = "dark night star city river ghost king summer storm silent last lost red iron golden".split()
+
+class Rollback(Exception):
+    pass
+
+def generic_page(title, offset, page_size):
+    """
+    A page of review search results as found before the `movie` foreign key: through the
+    generic relation, with a subquery on the titles and the titles of the page queried
+    separately.
+    """
+    content_type = ContentType.objects.get(app_label='movie', model='movie')
+    movie_ids = Movie.objects.filter(title__icontains=title).values_list('id', flat=True)
+    columns = [column for column in ReviewRowSerializer.columns if column != 'movie__title']
+    reviews = Review.objects.filter(content_type=content_type, object_id__in=movie_ids).order_by('id').values(*columns)
+    count = reviews.count()
+    rows = list(reviews[offset:offset + page_size])
+    titles = dict(Movie.objects.filter(id__in={row['object_id'] for row in rows}).values_list('id', 'title'))
+    for row in rows:
+        row['movie__title'] = titles.get(row['object_id']) if row['content_type'] == content_type.id else None
+    return count, ReviewRowSerializer().serialize(rows)
+
+def joined_page(title, offset, page_size):
+    """
+    The same page as ReviewSearchAPIView finds it now: one query joining the movies.
+    """
+    reviews = Review.objects.filter(movie__title__icontains=title).order_by('id').values(*ReviewRowSerializer.columns)
+    count = reviews.count()
+    return count, ReviewRowSerializer().serialize(reviews[offset:offset + page_size])
+
+class Command(BaseCommand):
+    """
+    Measure the review search by movie title before and after the `movie` foreign key:
+    the generic relation (content type and object ID, a subquery on the titles, then a
+    query for the titles of the page) against a join on the movies.
+
+    Sample movies and reviews are created inside a transaction that is rolled back at the
+    end, so the command can be run against any database (measure on MySQL, with the
+    production table sizes).
+
+    Usage:
+        python manage.py benchmark_review_search --movies 5000 --reviews 50000 --title night
+    """
+    help = 'Compare review search pages through the generic relation and through the movie foreign key.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=5000, help='Number of sample movies.')
+        parser.add_argument('--reviews', type=int, default=50000, help='Number of sample reviews.')
+        parser.add_argument('--title', default='night', help='Title fragment searched for.')
+        parser.add_argument('--page-size', type=int, default=10, help='Reviews per page.')
+        parser.add_argument('--rounds', type=int, default=50, help='Number of timed pages per query path.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['movies'], options['reviews'], options['title'], options['page_size'], options['rounds'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, movie_count, review_count, title, page_size, rounds):
+        user = User.objects.create_user(username='benchmark-review-search', password=None)
+        rng = random.Random(0)
+        movies = Movie.objects.bulk_create([
+            Movie(imdb_id=f"bench-search{i}", title=' '.join(rng.sample(WORDS, 3)).title(), year="2024", film_type="movie")
+            for i in range(movie_count)
+        ], batch_size=1000)
+        content_type = ContentType.objects.get_for_model(Movie)
+        reviews = []
+        for i in range(review_count):
+            movie = rng.choice(movies)
+            content = f"Review {i} of {movie.title}."
+            reviews.append(Review(
+                user=user, content_type=content_type, object_id=movie.id, movie=movie, review_title=f"Review {i}",
+                review_content=content, review_excerpt=make_excerpt(content), review_length=len(content), rating=rng.randint(2, 10) / 2,
+            ))
+        Review.objects.bulk_create(reviews, batch_size=1000) # bulk_create bypasses Review.save(): the excerpts and movie are set above
+
+        matches, _ = joined_page(title, 0, page_size)
+        pages = max(1, matches // page_size)
+        self.stdout.write(f"{movie_count} movies, {review_count} reviews, {matches} matching {title!r}, pages of {page_size}\n")
+        results = {}
+        for label, page in (('generic', generic_page), ('foreign key', joined_page)):
+            started = time.perf_counter()
+            for round_ in range(rounds):
+                page(title, (round_ % pages) * page_size, page_size)
+            results[label] = (time.perf_counter() - started) / rounds * 1000
+            self.stdout.write(f"{label:<12} {results[label]:>8.2f} ms/page")
+
+        # Both paths must find the same reviews (pages are ordered by ID for the comparison)
+        if FastJSONRenderer().render(generic_page(title, 0, page_size)) != FastJSONRenderer().render(joined_page(title, 0, page_size)):
+            self.stdout.write(self.style.ERROR("The two query paths returned different pages."))
+        self.stdout.write(self.style.SUCCESS(f"Foreign key: x{results['generic'] / results['foreign key']:.1f} faster."))
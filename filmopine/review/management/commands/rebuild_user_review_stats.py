@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from review.user_stats import rebuild_user_stats
+
+class Command(BaseCommand):
+    """
+    Recompute the review statistics of every user from the reviews table and the review
+    archive.
+
+    Statistics are maintained automatically on review create, update and delete, and were
+    backfilled by the migration creating them; run this after bulk changes that bypass
+    model signals (bulk_create, QuerySet.update(), raw SQL).
+
+    Usage:
+        python manage.py rebuild_user_review_stats
+    """
+    help = 'Recompute the review statistics of every user from the reviews table.'
+
+    def handle(self, *args, **options):
+        written = rebuild_user_stats()
+        self.stdout.write(self.style.SUCCESS(f"Wrote review statistics for {written} users."))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-19 03:07
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0002_review_review_revi_user_id_71aa0b_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRatingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('day', models.DateField()),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.DecimalField(decimal_places=1, default=Decimal('0.0'), max_digits=12)),
+            ],
+            options={
+                'unique_together': {('object_id', 'day')},
+            },
+        ),
+    ]
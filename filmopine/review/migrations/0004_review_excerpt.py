@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-19 03:37
+
+from django.db import migrations, models
+
+
+def make_excerpt(text, length=280):
+    # Frozen copy of review.models.make_excerpt() as of this migration
+    if len(text) <= length:
+        return text
+    excerpt = text[:length - 1]
+    space = excerpt.rfind(' ')
+    if space > length // 2:
+        excerpt = excerpt[:space]
+    return excerpt.rstrip() + '…'
+
+
+def backfill_excerpts(apps, schema_editor):
+    Review = apps.get_model('review', 'Review')
+    batch = []
+    for review in Review.objects.only('id', 'review_content').iterator(chunk_size=1000):
+        review.review_excerpt = make_excerpt(review.review_content)
+        review.review_length = len(review.review_content)
+        batch.append(review)
+        if len(batch) == 1000:
+            Review.objects.bulk_update(batch, ['review_excerpt', 'review_length'])
+            batch = []
+    Review.objects.bulk_update(batch, ['review_excerpt', 'review_length'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0003_dailyratingrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='review_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=280),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='review_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
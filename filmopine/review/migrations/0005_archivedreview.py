@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-19 03:41
+
+import core.ids
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('review', '0004_review_excerpt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='id',
+            field=models.UUIDField(default=core.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('review_title', models.CharField(max_length=255)),
+                ('review_content', models.TextField()),
+                ('review_excerpt', models.CharField(blank=True, max_length=280)),
+                ('review_length', models.PositiveIntegerField(default=0)),
+                ('rating', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='review_arch_content_f66636_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_movies(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Movie = apps.get_model('movie', 'Movie')
+    content_type = ContentType.objects.filter(app_label='movie', model='movie').first()
+    if content_type is None: # Fresh database: no reviews yet
+        return
+    for model_name in ('Review', 'ArchivedReview'):
+        model = apps.get_model('review', model_name)
+        # Reviews of movies that no longer exist keep a null movie
+        reviews = model.objects.filter(content_type=content_type, movie__isnull=True, object_id__in=Movie.objects.values('id'))
+        batch = []
+        for review_id in reviews.values_list('id', flat=True).iterator(chunk_size=1000):
+            batch.append(review_id)
+            if len(batch) == 1000:
+                model.objects.filter(pk__in=batch).update(movie_id=F('object_id'))
+                batch = []
+        model.objects.filter(pk__in=batch).update(movie_id=F('object_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('movie', '0002_movietitletrigram'),
+        ('review', '0005_archivedreview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreview',
+            name='movie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_reviews', to='movie.movie'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='movie',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='movie.movie'),
+        ),
+        migrations.RunPython(backfill_movies, migrations.RunPython.noop),
+    ]
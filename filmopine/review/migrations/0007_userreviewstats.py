@@ -0,0 +1,58 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_user_stats(apps, schema_editor):
+    # Same aggregates as review.user_stats.rebuild_user_stats(), on the historical models, so
+    # that the signals only ever apply deltas on top of complete rows
+    UserReviewStats = apps.get_model('review', 'UserReviewStats')
+    aggregates = {
+        'reviews_count': Count('id'), 'rating_sum': Sum('rating'), 'last_reviewed_at': Max('created_at'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating__gte=star, rating__lt=star + 1)) for star in range(1, 6)},
+    }
+    totals = {}
+    for model_name in ('Review', 'ArchivedReview'):
+        model = apps.get_model('review', model_name)
+        for row in model.objects.values('user_id').annotate(**aggregates).order_by().iterator():
+            user_id = row.pop('user_id')
+            if user_id not in totals:
+                totals[user_id] = row
+                continue
+            total = totals[user_id]
+            for field, value in row.items():
+                total[field] = max(total[field], value) if field == 'last_reviewed_at' else total[field] + value
+    UserReviewStats.objects.bulk_create(
+        [UserReviewStats(user_id=user_id, **values) for user_id, values in totals.items()],
+        batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_profiling'),
+        ('review', '0006_review_movie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReviewStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.DecimalField(decimal_places=1, default=Decimal('0.0'), max_digits=12)),
+                ('rating_1_count', models.PositiveIntegerField(default=0)),
+                ('rating_2_count', models.PositiveIntegerField(default=0)),
+                ('rating_3_count', models.PositiveIntegerField(default=0)),
+                ('rating_4_count', models.PositiveIntegerField(default=0)),
+                ('rating_5_count', models.PositiveIntegerField(default=0)),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
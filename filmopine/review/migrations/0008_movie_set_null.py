@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0002_movietitletrigram'),
+        ('review', '0007_userreviewstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedreview',
+            name='movie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_reviews', to='movie.movie'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='movie',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviews', to='movie.movie'),
+        ),
+    ]
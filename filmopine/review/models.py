@@ -1,37 +1,201 @@
-from uuid import uuid4
 from decimal import Decimal
 from django.conf import settings
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core import validators
+from core.ids import uuid7
+from movie.models import Movie
+
+EXCERPT_LENGTH = 280 # Characters of review_content shown in listings
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """
+    Shorten a review to at most `length` characters for listings, cutting at the last
+    word boundary when there is one in the second half and marking the cut with "…".
+    """
+    if len(text) <= length:
+        return text
+    excerpt = text[:length - 1]
+    space = excerpt.rfind(' ')
+    if space > length // 2:
+        excerpt = excerpt[:space]
+    return excerpt.rstrip() + '…'
 
 class Review(models.Model):
     """
     Represents a review for a movie or other content.
 
     Attributes:
-        id (UUIDField): Unique identifier for the review, automatically generated.
+        id (UUIDField): Unique identifier for the review, automatically generated and time-ordered (UUIDv7).
         user (ForeignKey): Reference to the user who created the review.
         content_type (ForeignKey): The type of content being reviewed, linked to the ContentType model.
         object_id (PositiveBigIntegerField): The ID of the object being reviewed.
         content_object (GenericForeignKey): Generic relation to the object being reviewed.
+        movie (ForeignKey): The reviewed movie, for movie reviews, kept in sync with the generic
+            relation by save(): a real foreign key, which queries can join on. Null once the
+            movie is deleted (the review itself is kept).
         review_title (CharField): The title of the review.
         review_content (TextField): The main content of the review.
+        review_excerpt (CharField): The start of the content, shown by list endpoints instead of it.
+        review_length (PositiveIntegerField): Number of characters of the content.
         rating (DecimalField): The rating given by the user, constrained to a range of 1.0 to 5.0.
         created_at (DateTimeField): Timestamp for when the review was created.
         updated_at (DateTimeField): Timestamp for when the review was last updated.
     """
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveBigIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
+    movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='reviews') # Maintained by save()
     review_title = models.CharField(max_length=255, blank=False, null=False)
     review_content = models.TextField(blank=False, null=False)
+    review_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False) # Maintained by save()
+    review_length = models.PositiveIntegerField(default=0, editable=False)
     rating = models.DecimalField(max_digits=3, decimal_places=1, blank=False, null=False, validators=[validators.MinValueValidator(Decimal('1.0')), validators.MaxValueValidator(Decimal('5.0'))])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', '-created_at'])] # Latest reviews of a user (profile pages, activity feed)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the values loaded from the database, so that signal receivers maintaining
+        derived data (e.g. rating rollups) can compute deltas on update without a query.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the excerpt and length in sync with the content, and the movie in sync with the
+        generic relation (a review can also be created with just `movie`). Bulk operations
+        (bulk_create, QuerySet.update) bypass this and must set them themselves.
+        """
+        deferred = self.get_deferred_fields()
+        update_fields = kwargs.get('update_fields')
+        if 'review_content' not in deferred:
+            self.review_excerpt = make_excerpt(self.review_content)
+            self.review_length = len(self.review_content)
+            if update_fields is not None and 'review_content' in update_fields:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'review_excerpt', 'review_length'}
+        if not deferred & {'content_type_id', 'object_id', 'movie_id'}:
+            movie_content_type = ContentType.objects.get_for_model(Movie)
+            if self.content_type_id is None and self.movie_id is not None:
+                self.content_type, self.object_id = movie_content_type, self.movie_id
+            loaded = getattr(self, '_loaded_values', {})
+            if (loaded.get('content_type_id'), loaded.get('object_id')) != (self.content_type_id, self.object_id):
+                # Only when the relation changed: reviews of deleted movies keep a null movie
+                self.movie_id = self.object_id if self.content_type_id == movie_content_type.id else None
+            if update_fields is not None and {'content_type', 'content_type_id', 'object_id'} & set(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'movie'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.review_title} - {self.rating}/5"
+
+
+class ArchivedReview(models.Model):
+    """
+    A review moved out of the Review table by the `archive_reviews` command (see
+    review.archive), once older than REVIEW_ARCHIVE_AFTER_DAYS.
+
+    Keeping cold reviews in their own table bounds the size of the Review table and of its
+    indexes, so inserts and queries on recent reviews do not slow down as history grows.
+    Archived reviews are read-only: the detail endpoints fall back to this table, and they
+    still count towards the review count and average rating of their movie.
+
+    The columns are those of Review (including `movie`), plus:
+        archived_at (DateTimeField): When the review was archived.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_reviews')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    object_id = models.PositiveBigIntegerField()
+    movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_reviews')
+    review_title = models.CharField(max_length=255)
+    review_content = models.TextField()
+    review_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True)
+    review_length = models.PositiveIntegerField(default=0)
+    rating = models.DecimalField(max_digits=3, decimal_places=1)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['content_type', 'object_id'])] # Per-movie aggregates
+
+    def __str__(self):
+        return f"{self.review_title} - {self.rating}/5 (archived)"
+
+
+class DailyRatingRollup(models.Model):
+    """
+    Per-movie, per-day totals of the reviews written, used for rating trend analytics.
+
+    Rows are maintained incrementally when reviews are created, updated or deleted (see
+    review.rollups), so a year of history is read as at most 365 rows per movie instead of
+    aggregating every review. Use the `backfill_rating_rollups` command to rebuild them.
+
+    Attributes:
+        object_id (PositiveBigIntegerField): The ID of the reviewed movie.
+        day (DateField): The day the reviews were created on.
+        reviews_count (PositiveIntegerField): Number of reviews created on that day.
+        rating_sum (DecimalField): Sum of the ratings of those reviews.
+    """
+    object_id = models.PositiveBigIntegerField()
+    day = models.DateField()
+    reviews_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=Decimal('0.0'))
+
+    class Meta:
+        unique_together = [['object_id', 'day']]
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.reviews_count if self.reviews_count else 0
+
+    def __str__(self):
+        return f"{self.object_id} on {self.day}: {self.reviews_count} reviews"
+
+class UserReviewStats(models.Model):
+    """
+    Totals of the reviews written by a user, for profile pages.
+
+    The row is maintained incrementally when the user's reviews are created, updated or
+    deleted (see review.user_stats), so showing the totals never scans the reviews. Like
+    the rating rollups, they include archived reviews. Use the `rebuild_user_review_stats`
+    command to recompute them.
+
+    Attributes:
+        user (OneToOneField): The user, also the primary key.
+        reviews_count (PositiveIntegerField): Number of reviews written.
+        rating_sum (DecimalField): Sum of the ratings given.
+        rating_1_count ... rating_5_count (PositiveIntegerField): Number of ratings given per
+            star, half stars counting towards the star below (4.5 counts as 4).
+        last_reviewed_at (DateTimeField): When the latest review was written.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='review_stats')
+    reviews_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=Decimal('0.0'))
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.reviews_count if self.reviews_count else 0
+
+    @property
+    def rating_distribution(self):
+        return {str(star): getattr(self, f'rating_{star}_count') for star in range(1, 6)}
+
     def __str__(self):
-        return f"{self.review_title} - {self.rating}/5"
\ No newline at end of file
+        return f"{self.user_id}: {self.reviews_count} reviews"
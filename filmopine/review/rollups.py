@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from movie.models import Movie
+from .models import Review, ArchivedReview, DailyRatingRollup
+
+ROLLUP_FIELDS = ['content_type_id', 'object_id', 'rating', 'created_at', 'user_id'] # user_id: for review.user_stats
+
+def rollup_key(values):
+    """
+    The (object_id, day) rollup row a review counts towards, or None if it is not a movie review.
+    """
+    if values.get('content_type_id') != ContentType.objects.get_for_model(Movie).id or values.get('created_at') is None:
+        return None
+    return values['object_id'], timezone.localdate(values['created_at'])
+
+def apply_delta(key, count_delta, rating_delta):
+    """
+    Atomically add the deltas to a rollup row, creating the row on first use.
+    """
+    object_id, day = key
+    rows = DailyRatingRollup.objects.filter(object_id=object_id, day=day)
+    changes = {'reviews_count': F('reviews_count') + count_delta, 'rating_sum': F('rating_sum') + rating_delta}
+    if rows.update(**changes) or count_delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyRatingRollup.objects.create(object_id=object_id, day=day, reviews_count=count_delta, rating_sum=rating_delta)
+    except IntegrityError: # Created concurrently by another request
+        rows.update(**changes)
+
+def review_values(review):
+    values = {field: getattr(review, field) for field in ROLLUP_FIELDS}
+    values['rating'] = Decimal(str(values['rating']))
+    return values
+
+def remember_previous_values(review):
+    """
+    Make sure the values stored before an update are known (pre_save).
+
+    Reviews loaded from the database carry them already (see Review.from_db); other
+    instances (e.g. built by hand with an existing pk, or loaded with deferred fields)
+    cost one query.
+    """
+    if review._state.adding:
+        return
+    loaded = getattr(review, '_loaded_values', {})
+    if all(field in loaded for field in ROLLUP_FIELDS):
+        return
+    review._loaded_values = Review.objects.filter(pk=review.pk).values(*ROLLUP_FIELDS).first()
+
+def record_saved(review, created):
+    """
+    Update the rollups after a review was created or updated (post_save).
+
+    Returns:
+        dict: The values of the review before the update, None on creation.
+    """
+    current = review_values(review)
+    previous = None if created else getattr(review, '_loaded_values', None)
+    review._loaded_values = current
+
+    new_key = rollup_key(current)
+    old_key = rollup_key(previous) if previous else None
+    if old_key == new_key:
+        if new_key and previous['rating'] != current['rating']:
+            apply_delta(new_key, 0, current['rating'] - Decimal(str(previous['rating'])))
+        return previous
+    if old_key:
+        apply_delta(old_key, -1, -Decimal(str(previous['rating'])))
+    if new_key:
+        apply_delta(new_key, 1, current['rating'])
+    return previous
+
+def record_deleted(review):
+    """
+    Update the rollups after a review was deleted (post_delete).
+    """
+    values = review_values(review)
+    key = rollup_key(values)
+    if key:
+        apply_delta(key, -1, -values['rating'])
+
+def backfill_rollups():
+    """
+    Rebuild every rollup row from the reviews table and the review archive (archived
+    reviews stay in the rating history).
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    content_type = ContentType.objects.get_for_model(Movie)
+    totals = {}
+    for model in (Review, ArchivedReview):
+        rows = (
+            model.objects.filter(content_type=content_type)
+            .annotate(day=TruncDate('created_at'))
+            .values('object_id', 'day')
+            .annotate(reviews_count=Count('id'), rating_sum=Sum('rating'))
+            .order_by()
+        )
+        for row in rows.iterator():
+            key = (row['object_id'], row['day']) # A day can be split between both tables
+            count, rating_sum = totals.get(key, (0, Decimal('0')))
+            totals[key] = (count + row['reviews_count'], rating_sum + row['rating_sum'])
+    with transaction.atomic():
+        DailyRatingRollup.objects.all().delete()
+        rollups = DailyRatingRollup.objects.bulk_create(
+            [
+                DailyRatingRollup(object_id=object_id, day=day, reviews_count=count, rating_sum=rating_sum)
+                for (object_id, day), (count, rating_sum) in totals.items()
+            ],
+            batch_size=5000
+        )
+    return len(rollups)
+
+def rating_time_series(object_id, start, end, interval='day'):
+    """
+    Review counts and average ratings of a movie per day or per week, read from the rollups.
+
+    Args:
+        object_id (int): The ID of the movie.
+        start (date): First day included.
+        end (date): Last day included.
+        interval (str): 'day' or 'week' (weeks start on Monday).
+
+    Returns:
+        list: Dicts with `period` (the day, or the Monday of the week), `reviews_count` and
+            `average_rating`, in chronological order. Periods without reviews are omitted.
+    """
+    rows = (
+        DailyRatingRollup.objects
+        .filter(object_id=object_id, day__range=(start, end), reviews_count__gt=0)
+        .order_by('day')
+        .values_list('day', 'reviews_count', 'rating_sum')
+    )
+
+    periods = OrderedDict()
+    for day, reviews_count, rating_sum in rows:
+        period = day - timedelta(days=day.weekday()) if interval == 'week' else day
+        count, total = periods.get(period, (0, Decimal('0')))
+        periods[period] = (count + reviews_count, total + rating_sum)
+
+    return [
+        {'period': period, 'reviews_count': count, 'average_rating': (total / count).quantize(Decimal('0.01'))}
+        for period, (count, total) in periods.items()
+    ]
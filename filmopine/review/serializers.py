@@ -1,6 +1,7 @@
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
-from .models import Review
+from core.fast_serializers import RowSerializer, iso_datetime
+from .models import Review, ArchivedReview
 from movie.models import Movie  # Import your Movie model
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -8,7 +9,8 @@ class ReviewSerializer(serializers.ModelSerializer):
     Serializer for the Review model.
 
     This serializer is used to validate and serialize Review instances, including additional fields
-    for the movie title and the currently authenticated user.
+    for the movie title and the currently authenticated user. The excerpt and length of the
+    content are read-only, they are computed when the review is saved.
 
     Attributes:
         movie_title (SerializerMethodField): The title of the movie associated with the review.
@@ -24,29 +26,120 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ['id', 'user', 'content_type', 'object_id', 'movie_title', 'review_title', 'review_content', 'rating', 'created_at', 'updated_at']
+        fields = [
+            'id', 'user', 'content_type', 'object_id', 'movie_title', 'review_title', 'review_content',
+            'review_excerpt', 'review_length', 'rating', 'created_at', 'updated_at',
+        ]
     
     def get_movie_title(self, obj):
-            """
-            Retrieve the title of the movie associated with the review.
-
-            This method checks if the content type of the review corresponds to a movie.
-            If so, it attempts to retrieve the movie instance using the object_id. If the movie exists,
-            its title is returned; otherwise, None is returned.
-
-            Args:
-                obj (Review): The review instance for which the movie title is being retrieved.
-
-            Returns:
-                str or None: The title of the associated movie if it exists; otherwise, None.
-            """
-            # Get the ContentType instance for the object's content_type
-            content_type = ContentType.objects.get(id=obj.content_type_id)  # Use content_type_id
-            
-            if content_type.model == 'movie':  # Check if the content type is 'movie'
-                try:
-                    movie = Movie.objects.get(id=obj.object_id)
-                    return movie.title  # Return the movie title
-                except Movie.DoesNotExist:
-                    return None  # Handle case where the movie does not exist
-            return None  # Return None if the content type is not 'movie'
\ No newline at end of file
+        """
+        Retrieve the title of the movie associated with the review.
+
+        The movie is the review's `movie` foreign key, so views listing reviews load the
+        titles with `select_related('movie')` instead of one query per review.
+
+        Args:
+            obj (Review): The review instance for which the movie title is being retrieved.
+
+        Returns:
+            str or None: The title of the associated movie if it is a movie review; otherwise, None.
+        """
+        return obj.movie.title if obj.movie_id is not None else None
+
+    def validate(self, attrs):
+        """
+        Reject movie reviews of movies that do not exist: `movie` is a real foreign key. Only
+        checked when the reviewed object changes, so that reviews of deleted movies can still
+        be edited.
+        """
+        if not {'content_type', 'object_id'} & set(attrs):
+            return attrs
+        content_type = attrs.get('content_type', getattr(self.instance, 'content_type', None))
+        object_id = attrs.get('object_id', getattr(self.instance, 'object_id', None))
+        if content_type == ContentType.objects.get_for_model(Movie) and not Movie.objects.filter(id=object_id).exists():
+            raise serializers.ValidationError({'object_id': "No movie with this ID."})
+        return attrs
+
+
+class ArchivedReviewSerializer(ReviewSerializer):
+    """
+    Read-only serializer of archived reviews, with the same output as ReviewSerializer.
+    """
+
+    class Meta(ReviewSerializer.Meta):
+        model = ArchivedReview
+
+
+class ReviewRowSerializer(RowSerializer):
+    """
+    Read-only fast path of ReviewSerializer for list endpoints.
+
+    Serializes `Review.objects.values(*ReviewRowSerializer.columns)` rows, with the movie
+    titles joined through the `movie` foreign key instead of two queries per review.
+
+    Listings show the stored excerpt and length of each review instead of its content,
+    which is not even selected: reviews are several KB long, and a page of them would
+    otherwise carry every body from the database to the client. Otherwise the output is
+    the same as ReviewSerializer.
+    """
+    columns = ['id', 'content_type', 'object_id', 'movie__title', 'review_title', 'review_excerpt', 'review_length', 'rating', 'created_at', 'updated_at']
+    fields = [
+        ('id', str), ('content_type', None), ('object_id', None), ('movie_title', None), ('review_title', None),
+        ('review_excerpt', None), ('review_length', None), ('rating', None), ('created_at', iso_datetime), ('updated_at', iso_datetime),
+    ]
+
+    def prepare_rows(self, rows):
+        for row in rows:
+            row['movie_title'] = row.pop('movie__title')
+        return rows
+
+    async def aprepare_rows(self, rows):
+        return self.prepare_rows(rows)
+
+class ReviewFullRowSerializer(ReviewRowSerializer):
+    """
+    ReviewRowSerializer including the full content: the same output as ReviewSerializer.
+    """
+    columns = ReviewRowSerializer.columns + ['review_content']
+    fields = [
+        ('id', str), ('content_type', None), ('object_id', None), ('movie_title', None), ('review_title', None), ('review_content', None),
+        ('review_excerpt', None), ('review_length', None), ('rating', None), ('created_at', iso_datetime), ('updated_at', iso_datetime),
+    ]
+
+def review_row_serializer(request):
+    """
+    The row serializer of a review listing: excerpts only, unless the client asks for the
+    content with `?include=review_content`.
+    """
+    if 'review_content' in request.query_params.get('include', '').split(','):
+        return ReviewFullRowSerializer
+    return ReviewRowSerializer
+
+class RatingPeriodSerializer(serializers.Serializer):
+    """
+    Serializer for one period (day or week) of a movie's rating time series.
+
+    Attributes:
+        period (date): The day, or the Monday starting the week.
+        reviews_count (int): Number of reviews written during the period.
+        average_rating (Decimal): Average rating of those reviews.
+    """
+    period = serializers.DateField()
+    reviews_count = serializers.IntegerField()
+    average_rating = serializers.DecimalField(max_digits=3, decimal_places=2)
+
+class UserReviewStatsSerializer(serializers.Serializer):
+    """
+    Serializer for the review statistics of a user (see UserReviewStats).
+
+    Attributes:
+        reviews_count (int): Number of reviews written, archived ones included.
+        average_rating (Decimal): Average rating given, 0 without reviews.
+        rating_distribution (dict): Number of ratings given per star, "1" to "5" (half stars
+            count towards the star below).
+        last_reviewed_at (datetime): When the latest review was written, null without reviews.
+    """
+    reviews_count = serializers.IntegerField()
+    average_rating = serializers.DecimalField(max_digits=3, decimal_places=2)
+    rating_distribution = serializers.DictField(child=serializers.IntegerField())
+    last_reviewed_at = serializers.DateTimeField(allow_null=True)
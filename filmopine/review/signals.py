@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+from . import archive, rollups, user_stats
+from .events import get_broker, movie_channel
+from .models import Review
+from .serializers import ReviewSerializer
+
+@receiver(post_save, sender=Review)
+def publish_new_review(sender, instance, created, **kwargs):
+    """
+    Publish newly created reviews to the subscribers of the movie's review stream,
+    once the transaction that created them is committed. Nothing is serialized for
+    movies without subscribers.
+    """
+    if not created or kwargs.get('raw'):
+        return
+
+    def publish():
+        broker, channel = get_broker(), movie_channel(instance.object_id)
+        if not broker.has_listeners(channel):
+            return
+        data = JSONRenderer().render(ReviewSerializer(instance).data).decode() # Rendered once, shared by every subscriber
+        broker.publish(channel, data)
+
+    transaction.on_commit(publish)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_values(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        rollups.remember_previous_values(instance)
+
+@receiver(post_save, sender=Review)
+def update_rating_rollups(sender, instance, created, **kwargs):
+    """
+    Keep the daily rating rollups and the user review stats in sync with review creations
+    and updates (both from the values the review had before, which the rollups consume).
+    """
+    if not kwargs.get('raw'):
+        previous = rollups.record_saved(instance, created)
+        user_stats.record_saved(instance, previous)
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_rollups(sender, instance, **kwargs):
+    if not archive.is_archiving(): # Archived reviews stay in the rating history and the user stats
+        rollups.record_deleted(instance)
+        user_stats.record_deleted(instance)
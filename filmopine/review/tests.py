@@ -1,14 +1,35 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import json
+import threading
+from unittest import mock
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from rest_framework.test import APIRequestFactory
-from .models import Review
+from .models import Review, ArchivedReview, DailyRatingRollup, UserReviewStats, EXCERPT_LENGTH
 from movie.models import Movie  # Make sure to import your Movie model
 from .serializers import *
+from .views import ReviewListAPIView, ReviewDetailAPIView, ReviewSearchAPIView, ReviewMeAPIView
+from . import async_views
+from core.async_views import async_read_view
+from rest_framework_simplejwt.tokens import AccessToken
+from .rollups import backfill_rollups
+from .events import InProcessBroker, CacheBroker, movie_channel, sse_stream
+from core.renderers import FastJSONRenderer
+from rest_framework.renderers import JSONRenderer
 import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -40,6 +61,41 @@ class ReviewModelTest(TestCase):
     def test_review_str(self):
         self.assertEqual(str(self.review), 'Great Movie - 4.5/5')
 
+    def test_excerpt_follows_content(self):
+        self.assertEqual(self.review.review_excerpt, 'This movie was amazing!')
+        self.review.review_content = 'word ' * 100
+        self.review.save(update_fields=['review_content'])
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.review_length, 500)
+        self.assertLessEqual(len(self.review.review_excerpt), EXCERPT_LENGTH)
+        self.assertTrue(self.review.review_excerpt.endswith('word…'))
+
+    def test_movie_follows_generic_relation(self):
+        self.assertEqual(self.review.movie, self.movie)
+        self.review.content_type = ContentType.objects.get_for_model(User)
+        self.review.object_id = self.user.id
+        self.review.save(update_fields=['content_type', 'object_id'])
+        self.review.refresh_from_db()
+        self.assertIsNone(self.review.movie_id)
+
+        review = Review.objects.create(user=self.user, movie=self.movie, review_title='Short', review_content='Ok', rating=3.0)
+        self.assertEqual((review.content_type.model, review.object_id), ('movie', self.movie.id))
+
+    def test_review_of_deleted_movie(self):
+        self.movie.delete()
+        review = Review.objects.get(pk=self.review.pk)
+        self.assertIsNone(review.movie_id)
+        review.review_title = 'Still there'
+        review.save()
+        review.refresh_from_db()
+        self.assertEqual((review.review_title, review.movie_id), ('Still there', None))
+
+    def test_backfill_migration(self):
+        migration = importlib.import_module('review.migrations.0006_review_movie')
+        Review.objects.update(movie=None)
+        migration.backfill_movies(django_apps, None)
+        self.assertEqual(Review.objects.get(pk=self.review.pk).movie_id, self.movie.id)
+
 
 class ReviewSerializerTest(TestCase):
     def setUp(self):
@@ -77,6 +133,13 @@ class ReviewSerializerTest(TestCase):
         self.assertFalse(serializer.is_valid())
         self.assertIn('rating', serializer.errors)
 
+    def test_unknown_movie(self):
+        request = self.factory.post('/fake-url/', {})
+        request.user = self.user
+        serializer = ReviewSerializer(data={**self.review_data, 'object_id': self.movie.id + 1}, context={'request': request})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('object_id', serializer.errors)
+
 
 class ReviewAPITest(APITestCase):
     def setUp(self):
@@ -112,4 +175,393 @@ class ReviewAPITest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.review.refresh_from_db()
-        self.assertEqual(self.review.rating, 5.0)  # Check that the rating was updated
\ No newline at end of file
+        self.assertEqual(self.review.rating, 5.0)  # Check that the rating was updated
+
+    def test_update_review_of_deleted_movie(self):
+        self.movie.delete()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(reverse('review-detail', kwargs={'pk': self.review.id}), {'review_title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(reverse('review-detail', kwargs={'pk': self.review.id}), {'object_id': self.movie.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('object_id', response.data)
+
+
+class ReviewEventStreamTest(SimpleTestCase):
+    async def test_publish_from_another_thread(self):
+        broker = InProcessBroker(queue_size=4)
+        subscription = broker.subscribe(movie_channel(1))
+        other = broker.subscribe(movie_channel(2))
+
+        thread = threading.Thread(target=broker.publish, args=(movie_channel(1), '{"id": 1}'))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await subscription.get(timeout=1), (1, '{"id": 1}'))
+        self.assertIsNone(await other.get(timeout=0.05))
+        subscription.close()
+        other.close()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_sse_stream_and_overflow(self):
+        broker = InProcessBroker(queue_size=1)
+        subscription = broker.subscribe(movie_channel(1))
+        stream = sse_stream(subscription, heartbeat=0.05, idle_timeout=1, max_duration=1)
+
+        self.assertTrue((await anext(stream)).startswith('retry:'))
+        broker.publish(movie_channel(1), '{"id": 1}')
+        broker.publish(movie_channel(1), '{"id": 2}') # Does not fit in the queue
+        await asyncio.sleep(0) # Let the loop run the deliveries
+
+        self.assertEqual(await anext(stream), 'id: 1\nevent: review\ndata: {"id": 1}\n\n')
+        self.assertTrue((await anext(stream)).startswith('event: resync'))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_cache_broker(self):
+        broker = CacheBroker(poll_interval=0.01)
+        subscription = broker.subscribe(movie_channel(7))
+        await asyncio.sleep(0.02) # Let the poller read the current sequence number
+        broker.publish(movie_channel(7), '{"id": 7}')
+
+        event_id, data = await subscription.get(timeout=1)
+        self.assertEqual(data, '{"id": 7}')
+        self.assertTrue(CacheBroker(poll_interval=0.01).has_listeners(movie_channel(7))) # Seen from other workers
+        self.assertFalse(CacheBroker(poll_interval=0.01).has_listeners(movie_channel(8)))
+        subscription.close()
+
+
+class ReviewEventPublishTest(TestCase):
+    def test_created_review_is_published(self):
+        user = User.objects.create_user(username='testuser', password='password')
+        movie = Movie.objects.create(title='Test Movie')
+        broker = mock.Mock()
+
+        with mock.patch('review.signals.get_broker', return_value=broker), self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                user=user, content_type=ContentType.objects.get_for_model(Movie), object_id=movie.id,
+                review_title='Great Movie', review_content='Content', rating=4.5
+            )
+
+        channel, data = broker.publish.call_args.args
+        self.assertEqual(channel, movie_channel(movie.id))
+        self.assertEqual(json.loads(data)['movie_title'], 'Test Movie')
+
+    def test_not_serialized_without_listeners(self):
+        user = User.objects.create_user(username='testuser', password='password')
+        movie = Movie.objects.create(title='Test Movie')
+        broker = mock.Mock()
+        broker.has_listeners.return_value = False
+
+        with mock.patch('review.signals.get_broker', return_value=broker), mock.patch('review.signals.ReviewSerializer') as serializer:
+            with self.captureOnCommitCallbacks(execute=True):
+                Review.objects.create(user=user, movie=movie, review_title='Great Movie', review_content='Content', rating=4.5)
+
+        broker.has_listeners.assert_called_once_with(movie_channel(movie.id))
+        serializer.assert_not_called()
+        broker.publish.assert_not_called()
+
+    def test_stream_requires_asgi(self):
+        response = self.client.get('/api/movies/1/reviews/stream/')
+        self.assertEqual(response.status_code, 501)
+
+
+class RatingRollupTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.movie = Movie.objects.create(title='Test Movie')
+        self.content_type = ContentType.objects.get_for_model(Movie)
+
+    def create_review(self, rating, days_ago=0):
+        review = Review.objects.create(
+            user=self.user, content_type=self.content_type, object_id=self.movie.id,
+            review_title='Review', review_content='Content', rating=rating
+        )
+        if days_ago:
+            # created_at is auto_now_add: move it back in time the way an import would, then rebuild
+            Review.objects.filter(pk=review.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return review
+
+    def rollup(self):
+        return DailyRatingRollup.objects.get(object_id=self.movie.id, day=timezone.localdate())
+
+    def test_rollups_follow_review_writes(self):
+        first = self.create_review(4.0)
+        second = self.create_review(2.0)
+        self.assertEqual((self.rollup().reviews_count, self.rollup().rating_sum), (2, Decimal('6.0')))
+
+        second = Review.objects.get(pk=second.pk)
+        second.rating = Decimal('3.0')
+        second.save()
+        self.assertEqual((self.rollup().reviews_count, self.rollup().rating_sum), (2, Decimal('7.0')))
+
+        first.delete()
+        self.assertEqual((self.rollup().reviews_count, self.rollup().rating_sum), (1, Decimal('3.0')))
+
+    def test_backfill_and_weekly_series(self):
+        self.create_review(5.0)
+        self.create_review(3.0, days_ago=7)
+        self.create_review(4.0, days_ago=7)
+        self.assertEqual(backfill_rollups(), 2)
+
+        response = self.client.get(f'/api/movies/{self.movie.id}/ratings/', {'interval': 'week'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([period['reviews_count'] for period in response.data], [2, 1])
+        self.assertEqual(response.data[0]['average_rating'], Decimal('3.50'))
+
+    def test_invalid_interval(self):
+        response = self.client.get(f'/api/movies/{self.movie.id}/ratings/', {'interval': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_dates(self):
+        for params in ({'start': 'foo'}, {'end': '2024-1-xx'}, {'start': '2024-13-45'}):
+            response = self.client.get(f'/api/movies/{self.movie.id}/ratings/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class ReviewRowSerializerTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.movie = Movie.objects.create(title='Le Fabuleux Destin d\'Amélie Poulain')
+        content_type = ContentType.objects.get_for_model(Movie)
+        Review.objects.create(
+            user=self.user, content_type=content_type, object_id=self.movie.id,
+            review_title='Très bien \u2029', review_content='"Quoted" \\ and emoji 🎬', rating=4.5
+        )
+        Review.objects.create(
+            user=self.user, content_type=content_type, object_id=self.movie.id,
+            review_title='Meh', review_content='Average.', rating=2.0
+        )
+        # A review of another kind of object has no movie title
+        Review.objects.create(
+            user=self.user, content_type=ContentType.objects.get_for_model(User), object_id=self.user.id,
+            review_title='Not a movie', review_content='Content', rating=1.0
+        )
+
+    def test_same_bytes_as_model_serializer(self):
+        reviews = Review.objects.order_by('created_at')
+        expected = JSONRenderer().render(ReviewSerializer(reviews, many=True).data)
+        rows = ReviewFullRowSerializer().serialize(reviews.values(*ReviewFullRowSerializer.columns))
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+
+    def test_listing_omits_content(self):
+        reviews = Review.objects.order_by('created_at')
+        expected = [{key: value for key, value in review.items() if key != 'review_content'} for review in ReviewSerializer(reviews, many=True).data]
+        rows = ReviewRowSerializer().serialize(reviews.values(*ReviewRowSerializer.columns))
+        self.assertEqual(FastJSONRenderer().render(rows), JSONRenderer().render(expected))
+
+    def test_renderer_falls_back_for_exponent_floats(self):
+        data = {'small': 1e-7, 'large': 1e16, 'nested': [{'value': 0.1}]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_movie_reviews_endpoint(self):
+        url = f'/api/movies/{self.movie.id}/reviews/'
+        with self.assertNumQueries(2): # count, page (movie titles joined)
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(response.json()['results'][0]['movie_title'], self.movie.title)
+
+    def test_search_joins_movie_titles(self):
+        with self.assertNumQueries(2): # count, page
+            response = self.client.get('/api/reviews/search/', {'movie_title': 'amélie'})
+        self.assertEqual([review['movie_title'] for review in response.json()['results']], [self.movie.title] * 2)
+
+    def test_content_is_deferred_unless_requested(self):
+        url = f'/api/movies/{self.movie.id}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertNotIn('review_content', ' '.join(query['sql'] for query in queries))
+        review = {review['review_title']: review for review in response.json()['results']}['Meh']
+        self.assertNotIn('review_content', review)
+        self.assertEqual((review['review_excerpt'], review['review_length']), ('Average.', 8))
+
+        response = self.client.get(url, {'include': 'review_content'})
+        review = {review['review_title']: review for review in response.json()['results']}['Meh']
+        self.assertEqual(review['review_content'], 'Average.')
+
+
+class AsyncReviewViewsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpass')
+        self.movie = Movie.objects.create(title="Test Movie", year="2020", film_type="movie")
+        content_type = ContentType.objects.get_for_model(Movie)
+        self.reviews = [
+            Review.objects.create(
+                user=self.user, content_type=content_type, object_id=self.movie.id,
+                review_title=f"Review {i}", review_content="Content", rating=Decimal(i % 5 + 1)
+            )
+            for i in range(12)
+        ]
+        self.token = f"JWT {AccessToken.for_user(self.user)}"
+        self.factory = AsyncRequestFactory()
+
+    async def test_same_bytes_as_sync_views(self):
+        client = AsyncClient()
+        views = (
+            (f'/api/movies/{self.movie.id}/reviews/?page=2', async_views.object_review_list, ReviewListAPIView.as_view(), {'object_id': self.movie.id}),
+            (f'/api/movies/{self.movie.id}/reviews/{self.reviews[0].id}/', async_views.object_review_detail, ReviewDetailAPIView.as_view(), {'object_id': self.movie.id, 'review_id': self.reviews[0].id}),
+            ('/api/reviews/search/?movie_title=test&rating=1.0', async_views.review_search, ReviewSearchAPIView.as_view(), {}),
+            ('/api/reviews/me/', async_views.review_me, ReviewMeAPIView.as_view(), {}),
+        )
+        for path, handler, sync_view, kwargs in views:
+            expected = await client.get(path, headers={'Authorization': self.token})
+            response = await async_read_view(handler, sync_view)(self.factory.get(path, headers={'Authorization': self.token}), **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, expected.content)
+
+    async def test_authentication(self):
+        view = async_read_view(async_views.review_me, ReviewMeAPIView.as_view())
+        response = await view(self.factory.get('/api/reviews/me/'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'JWT realm="api"')
+
+        response = await view(self.factory.get('/api/reviews/me/', headers={'Authorization': 'JWT invalid'}))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content)['code'], 'token_not_valid')
+
+        self.user.is_active = False
+        await self.user.asave()
+        response = await view(self.factory.get('/api/reviews/me/', headers={'Authorization': self.token}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_wsgi_requests_use_sync_view(self):
+        view = async_read_view(async_views.review_me, ReviewMeAPIView.as_view())
+        request = APIRequestFactory().get('/api/reviews/me/', HTTP_AUTHORIZATION=self.token)
+        response = await view(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 12)
+
+
+@override_settings(REVIEW_ARCHIVE_AFTER_DAYS=365)
+class ReviewArchiveTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.movie = Movie.objects.create(imdb_id='tt0001', title='Test Movie')
+        content_type = ContentType.objects.get_for_model(Movie)
+        self.old, self.recent = [
+            Review.objects.create(
+                user=self.user, content_type=content_type, object_id=self.movie.id,
+                review_title=title, review_content='Content', rating=rating
+            )
+            for title, rating in (('Old', 2.0), ('Recent', 5.0))
+        ]
+        Review.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=400))
+        backfill_rollups()
+
+    def test_archive_moves_old_reviews(self):
+        movie_before = self.client.get(f'/api/movies/{self.movie.id}/').content
+        rollups_before = list(DailyRatingRollup.objects.values_list('day', 'reviews_count', 'rating_sum'))
+
+        call_command('archive_reviews', stdout=io.StringIO())
+
+        self.assertEqual(list(Review.objects.values_list('id', flat=True)), [self.recent.id])
+        self.assertEqual(ArchivedReview.objects.get().review_title, 'Old')
+        self.assertEqual(self.client.get(f'/api/movies/{self.movie.id}/').content, movie_before)
+        self.assertEqual(self.client.get('/api/movies/').json()['results'][0]['average_rating'], 3.5)
+        self.assertEqual(list(DailyRatingRollup.objects.values_list('day', 'reviews_count', 'rating_sum')), rollups_before)
+        backfill_rollups()
+        self.assertEqual(sorted(DailyRatingRollup.objects.values_list('day', 'reviews_count', 'rating_sum')), sorted(rollups_before))
+
+    def test_archived_reviews_stay_readable(self):
+        call_command('archive_reviews', stdout=io.StringIO())
+        expected = ReviewSerializer(self.old).data
+        response = self.client.get(f'/api/movies/{self.movie.id}/reviews/{self.old.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['review_title'], expected['review_title'])
+        response = self.client.get(f'/api/reviews/{self.old.id}/')
+        self.assertEqual(response.json()['id'], str(self.old.id))
+        self.assertEqual(self.client.get(f'/api/reviews/{uuid.uuid4()}/').status_code, 404)
+
+    def test_archived_reviews_counted_but_not_listed(self):
+        call_command('archive_reviews', stdout=io.StringIO())
+        self.assertEqual(self.client.get(f'/api/movies/{self.movie.id}/').json()['reviews_count'], 2)
+        self.assertEqual(self.client.get(f'/api/movies/{self.movie.id}/reviews/').json()['count'], 1)
+        self.assertEqual(self.client.get('/api/reviews/search/', {'movie_title': 'Test'}).json()['count'], 1)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/reviews/me/stats/').json()['reviews_count'], 2)
+
+    def test_own_archived_reviews_are_listed(self):
+        call_command('archive_reviews', stdout=io.StringIO())
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/reviews/me/', {'include': 'review_content'})
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([review['review_title'] for review in response.json()['results']], ['Recent', 'Old'])
+        self.assertEqual(response.json()['results'][1]['movie_title'], 'Test Movie')
+        self.assertEqual(response.json()['results'][1]['review_content'], 'Content')
+
+    def test_disabled_by_default(self):
+        with override_settings(REVIEW_ARCHIVE_AFTER_DAYS=0), self.assertRaises(CommandError):
+            call_command('archive_reviews')
+
+
+@override_settings(REVIEW_ARCHIVE_AFTER_DAYS=365)
+class UserReviewStatsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='password')
+        self.movie = Movie.objects.create(imdb_id='tt0001', title='Test Movie')
+        self.reviews = [
+            Review.objects.create(user=self.user, movie=self.movie, review_title=f'Review {rating}', review_content='Content', rating=rating)
+            for rating in (Decimal('4.5'), Decimal('2.0'), Decimal('5.0'))
+        ]
+
+    def stats(self):
+        return UserReviewStatsSerializer(UserReviewStats.objects.get(user=self.user)).data
+
+    def test_maintained_on_review_writes(self):
+        stats = self.stats()
+        self.assertEqual((stats['reviews_count'], stats['average_rating']), (3, Decimal('3.83')))
+        self.assertEqual(stats['rating_distribution'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(UserReviewStats.objects.get(user=self.user).last_reviewed_at, self.reviews[2].created_at)
+
+        self.reviews[1].rating = Decimal('3.0')
+        self.reviews[1].save()
+        self.reviews[2].delete()
+        stats = self.stats()
+        self.assertEqual((stats['reviews_count'], stats['average_rating']), (2, Decimal('3.75')))
+        self.assertEqual(stats['rating_distribution'], {'1': 0, '2': 0, '3': 1, '4': 1, '5': 0})
+        self.assertEqual(UserReviewStats.objects.get(user=self.user).last_reviewed_at, self.reviews[1].created_at)
+
+    def test_archived_reviews_are_kept(self):
+        Review.objects.filter(pk=self.reviews[0].pk).update(created_at=timezone.now() - timedelta(days=400))
+        before = self.stats()
+        call_command('archive_reviews', stdout=io.StringIO())
+        self.assertEqual(self.stats(), before)
+
+    def test_rebuild_matches_incremental_stats(self):
+        Review.objects.filter(pk=self.reviews[0].pk).update(created_at=timezone.now() - timedelta(days=400))
+        call_command('archive_reviews', stdout=io.StringIO())
+        incremental = self.stats()
+        UserReviewStats.objects.all().delete()
+        call_command('rebuild_user_review_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(), incremental)
+
+    def test_backfill_migration(self):
+        migration = importlib.import_module('review.migrations.0007_userreviewstats')
+        incremental = self.stats()
+        UserReviewStats.objects.all().delete()
+        migration.backfill_user_stats(django_apps, None)
+        self.assertEqual(self.stats(), incremental)
+
+    def test_drifted_stats_do_not_block_deletes(self):
+        # Stats missing the older reviews (e.g. written before the stats existed)
+        UserReviewStats.objects.filter(user=self.user).update(reviews_count=1, rating_sum=Decimal('5.0'), rating_2_count=0, rating_4_count=0)
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.delete(f'/api/reviews/{self.reviews[1].pk}/').status_code, 204)
+        stats = UserReviewStats.objects.get(user=self.user)
+        self.assertEqual((stats.reviews_count, stats.rating_2_count, stats.rating_sum), (0, 0, Decimal('3.0')))
+
+    def test_stats_endpoints(self):
+        self.assertEqual(self.client.get('/api/reviews/me/stats/').status_code, 401)
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reviews/me/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reviews_count'], 3)
+        self.assertEqual(self.client.get('/auth/users/me/').json()['review_stats'], response.json())
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get('/api/reviews/me/stats/').json()['reviews_count'], 0)
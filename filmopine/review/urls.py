@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReviewViewSet, ReviewSearchAPIView, ReviewMeAPIView
+from core.async_views import async_read_view
+from .views import ReviewViewSet, ReviewSearchAPIView, ReviewMeAPIView, ReviewMeStatsAPIView
+from . import async_views
 
 router = DefaultRouter()
 router.register('', ReviewViewSet)
@@ -8,5 +11,14 @@ router.register('', ReviewViewSet)
 urlpatterns = [
     path('search/', ReviewSearchAPIView.as_view(), name='review-search'),
     path('me/', ReviewMeAPIView.as_view(), name='review-me'),
+    path('me/stats/', ReviewMeStatsAPIView.as_view(), name='review-me-stats'),
     path('', include(router.urls)),  # Include all review routes
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Under ASGI, reads are served by async views (see core.async_views); the sync views still handle everything else
+    urlpatterns = [
+        path('search/', async_read_view(async_views.review_search, ReviewSearchAPIView.as_view()), name='review-search'),
+        path('me/', async_read_view(async_views.review_me, ReviewMeAPIView.as_view()), name='review-me'),
+        path('', async_read_view(async_views.review_list, ReviewViewSet.as_view({'get': 'list', 'post': 'create'})), name='review-list'),
+    ] + urlpatterns
@@ -0,0 +1,133 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import Review, ArchivedReview, UserReviewStats
+
+STARS = range(1, 6)
+
+def star_field(rating):
+    """
+    The distribution counter of a rating: half stars count towards the star below.
+    """
+    return f'rating_{min(5, max(1, int(rating)))}_count'
+
+def plus(field, delta, floor=0):
+    """
+    `field + delta`, kept at or above `floor` when decremented: a row that drifted (e.g.
+    reviews changed behind the signals' back) must not fail the review write with a
+    negative unsigned counter.
+    """
+    return F(field) + delta if delta >= 0 else Greatest(F(field) + delta, Value(floor))
+
+def apply_delta(user_id, count_delta, rating_delta, star_deltas, reviewed_at=None):
+    """
+    Atomically add the deltas to the stats row of a user, creating the row on first use.
+    Counters never go below zero (see plus()).
+
+    Args:
+        user_id (int): The user.
+        count_delta (int): Change of the number of reviews.
+        rating_delta (Decimal): Change of the sum of the ratings.
+        star_deltas (dict): Distribution counter -> change.
+        reviewed_at (datetime, optional): Creation time of an added review, kept if it is the latest.
+    """
+    rows = UserReviewStats.objects.filter(user_id=user_id)
+    changes = {'reviews_count': plus('reviews_count', count_delta), 'rating_sum': plus('rating_sum', rating_delta, Decimal('0.0'))}
+    changes.update({field: plus(field, delta) for field, delta in star_deltas.items() if delta})
+    if reviewed_at is not None:
+        reviewed = Value(reviewed_at, output_field=DateTimeField())
+        changes['last_reviewed_at'] = Greatest(Coalesce('last_reviewed_at', reviewed), reviewed)
+    if rows.update(**changes) or count_delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            UserReviewStats.objects.create(
+                user_id=user_id, reviews_count=count_delta, rating_sum=rating_delta,
+                last_reviewed_at=reviewed_at, **{field: delta for field, delta in star_deltas.items()}
+            )
+    except IntegrityError: # Created concurrently by another request
+        rows.update(**changes)
+
+def add(user_id, rating, created_at):
+    apply_delta(user_id, 1, rating, {star_field(rating): 1}, created_at)
+
+def remove(user_id, rating):
+    """
+    Take a review out of the stats of its user. The latest review date is looked up again,
+    as it may have been the removed review's.
+    """
+    apply_delta(user_id, -1, -rating, {star_field(rating): -1})
+    latest = [model.objects.filter(user_id=user_id).aggregate(latest=Max('created_at'))['latest'] for model in (Review, ArchivedReview)]
+    latest = max((value for value in latest if value is not None), default=None)
+    UserReviewStats.objects.filter(user_id=user_id).update(last_reviewed_at=latest)
+
+def record_saved(review, previous):
+    """
+    Update the stats after a review was created or updated (post_save).
+
+    Args:
+        review (Review): The saved review.
+        previous (dict): Its values before the update (see review.rollups), None on creation.
+    """
+    rating = Decimal(str(review.rating))
+    if previous is None:
+        add(review.user_id, rating, review.created_at)
+        return
+    previous_rating = Decimal(str(previous['rating']))
+    if previous['user_id'] != review.user_id:
+        remove(previous['user_id'], previous_rating)
+        add(review.user_id, rating, review.created_at)
+    elif previous_rating != rating:
+        star_deltas = {star_field(previous_rating): -1}
+        star_deltas[star_field(rating)] = star_deltas.get(star_field(rating), 0) + 1
+        apply_delta(review.user_id, 0, rating - previous_rating, star_deltas)
+
+def record_deleted(review):
+    """
+    Update the stats after a review was deleted (post_delete).
+    """
+    remove(review.user_id, Decimal(str(review.rating)))
+
+def rebuild_user_stats():
+    """
+    Recompute the stats of every user from the reviews table and the review archive.
+
+    Returns:
+        int: The number of stats rows written.
+    """
+    aggregates = {
+        'reviews_count': Count('id'), 'rating_sum': Sum('rating'), 'last_reviewed_at': Max('created_at'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating__gte=star, rating__lt=star + 1)) for star in STARS},
+    }
+    with transaction.atomic():
+        # Deleted first: the row locks make concurrent review writes wait for the rebuild and
+        # apply their delta on top of it, instead of landing between the aggregation and the rewrite
+        UserReviewStats.objects.all().delete()
+        totals = {}
+        for model in (Review, ArchivedReview):
+            for row in model.objects.values('user_id').annotate(**aggregates).order_by().iterator():
+                user_id = row.pop('user_id')
+                if user_id not in totals:
+                    totals[user_id] = row
+                    continue
+                total = totals[user_id] # A user can have reviews in both tables
+                for field, value in row.items():
+                    if field == 'last_reviewed_at':
+                        total[field] = max(total[field], value)
+                    else:
+                        total[field] += value
+        rows = UserReviewStats.objects.bulk_create(
+            [UserReviewStats(user_id=user_id, **values) for user_id, values in totals.items()],
+            batch_size=5000
+        )
+    return len(rows)
+
+def stats_of(user):
+    """
+    The stats of a user, unsaved and empty if they have not reviewed anything yet.
+    """
+    try:
+        return user.review_stats
+    except UserReviewStats.DoesNotExist:
+        return UserReviewStats(user=user)
@@ -1,7 +1,14 @@
 from django.shortcuts import render
 from django.shortcuts import render, get_object_or_404
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Q
-from rest_framework import viewsets, status
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from django.http import Http404
+from rest_framework import generics, viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -9,13 +16,24 @@ from rest_framework.pagination import PageNumberPagination
 from django.contrib.contenttypes.models import ContentType
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Review
-from .serializers import ReviewSerializer
-from movie.models import Movie
+from .events import get_broker, movie_channel, sse_stream
+from .models import Review, ArchivedReview
+from .rollups import rating_time_series
+from .user_stats import stats_of
+from .serializers import ReviewSerializer, ArchivedReviewSerializer, RatingPeriodSerializer, ReviewRowSerializer, UserReviewStatsSerializer, review_row_serializer
+from movie.search import fuzzy_search
+from movie.snapshot import snapshot_for
 from core.permissions import IsAdminOrOwner
+from feed.services import fan_out_review
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+include_content_parameter = openapi.Parameter(
+    'include', openapi.IN_QUERY,
+    description="'review_content' to return the full content of each review, not only its excerpt",
+    type=openapi.TYPE_STRING, enum=['review_content']
+)
+
 class ReviewViewSet(viewsets.ModelViewSet):
     """
     A viewset for handling reviews associated with movies.
@@ -29,7 +47,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         permission_classes (list): A list of permission classes that restrict access based on user roles.
     """
 
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('movie') # Movie titles joined, not queried per review
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminOrOwner]
 
@@ -39,13 +57,41 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
         This method prevents user impersonation by ensuring that the `user` field of the review
         is automatically set to the currently authenticated user when a review is created.
+        The new review is then pushed into the activity feed of the author's followers.
 
         Args:
             serializer (ReviewSerializer): The serializer instance that contains the validated data for the review.
         """
                 
         # Prevent user impersonation by setting the user field to the current authenticated user
-        serializer.save(user=self.request.user)
+        review = serializer.save(user=self.request.user)
+        fan_out_review(review)
+
+    @swagger_auto_schema(manual_parameters=[include_content_parameter])
+    def list(self, request, *args, **kwargs):
+        """
+        Retrieve a paginated list of reviews through the read-only fast path (see ReviewRowSerializer).
+
+        Listings of excerpts are served from the catalog snapshot when one is deployed (see
+        movie.snapshot): it only holds the movie reviews of the last CATALOG_SNAPSHOT_REVIEW_DAYS.
+        """
+        row_serializer = review_row_serializer(request)
+        snapshot = snapshot_for(request) if row_serializer is ReviewRowSerializer else None
+        if snapshot is not None:
+            return snapshot.paginated_response(snapshot.reviews(), self.paginator, request)
+        queryset = self.filter_queryset(self.get_queryset()).values(*row_serializer.columns)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(row_serializer().serialize(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a review, falling back to the review archive for archived (read-only) reviews.
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = generics.get_object_or_404(ArchivedReview, pk=kwargs['pk'])
+            return Response(ArchivedReviewSerializer(archived).data)
     
 class GenericReviewPagination(PageNumberPagination):
     """
@@ -85,6 +131,7 @@ class ReviewListAPIView(APIView):
     """
     pagination_class = GenericReviewPagination
 
+    @swagger_auto_schema(manual_parameters=[include_content_parameter])
     def get(self, request, object_id, content_type='movie'):
         """
         Retrieve paginated reviews for a specific object identified by its object ID and content type.
@@ -93,6 +140,11 @@ class ReviewListAPIView(APIView):
         a movie or series). It checks if the specified content type is valid and then retrieves 
         the corresponding reviews. The results are paginated to manage the response size.
 
+        Archived reviews (older than REVIEW_ARCHIVE_AFTER_DAYS, when archiving is turned on)
+        are not listed, although the `reviews_count` and `average_rating` of the movie still
+        include them: the count can be higher than the number of listed reviews. Archived
+        reviews remain readable through the review detail endpoints.
+
         Args:
             request: The HTTP request object.
             object_id (str): The ID of the object for which reviews are being requested.
@@ -102,24 +154,36 @@ class ReviewListAPIView(APIView):
         Returns:
             Response: A paginated response containing serialized review data for the specified object.
                     If the content type is invalid, a 404 response with an error message is returned.
+                    Listings of movie review excerpts are served from the catalog snapshot when
+                    one is deployed (see movie.snapshot).
         """
-        try:
-            content_type_obj = ContentType.objects.get(app_label=content_type, model=content_type)
-        except ContentType.DoesNotExist:
-            return Response({"detail": "Invalid content type."}, status=404)
-
-        # Filter reviews related to the specific object
-        reviews = Review.objects.filter(content_type=content_type_obj, object_id=object_id)
+        row_serializer = review_row_serializer(request)
+        snapshot = snapshot_for(request) if content_type == 'movie' and row_serializer is ReviewRowSerializer else None
+        if snapshot is not None:
+            return snapshot.paginated_response(snapshot.reviews(object_id), self.pagination_class(), request)
+
+        if content_type == 'movie':
+            # Movie reviews are found through their movie foreign key
+            reviews = Review.objects.filter(movie_id=object_id)
+        else:
+            try:
+                content_type_obj = ContentType.objects.get(app_label=content_type, model=content_type)
+            except ContentType.DoesNotExist:
+                return Response({"detail": "Invalid content type."}, status=404)
+
+            # Filter reviews related to the specific object
+            reviews = Review.objects.filter(content_type=content_type_obj, object_id=object_id)
+        reviews = reviews.values(*row_serializer.columns)
 
         # Apply pagination
         paginator = self.pagination_class()
         paginated_reviews = paginator.paginate_queryset(reviews, request)
 
-        # Serialize the reviews
-        serializer = ReviewSerializer(paginated_reviews, many=True)
+        # Serialize the reviews (read-only fast path, excerpts instead of the content by default)
+        data = row_serializer().serialize(paginated_reviews)
 
         # Return paginated response
-        return paginator.get_paginated_response(serializer.data)
+        return paginator.get_paginated_response(data)
     
 class ReviewDetailAPIView(APIView):
     def get(self, request, object_id, review_id):
@@ -127,8 +191,9 @@ class ReviewDetailAPIView(APIView):
         Retrieve a specific review by its UUID and the associated object ID.
 
         This method handles GET requests to fetch a single review based on its unique identifier 
-        (UUID) and the ID of the object (e.g., a movie) it is associated with. If the review is 
-        not found, it returns a 404 error with an appropriate message.
+        (UUID) and the ID of the object (e.g., a movie) it is associated with. Reviews that were
+        archived are read from the review archive. If the review is not found, it returns a 404
+        error with an appropriate message.
 
         Args:
             request: The HTTP request object.
@@ -141,12 +206,13 @@ class ReviewDetailAPIView(APIView):
         """
         try:
             # Fetch the review using the UUID and object_id
-            review = Review.objects.get(id=review_id, object_id=object_id)
+            review = Review.objects.select_related('movie').get(id=review_id, object_id=object_id)
+            serializer = ReviewSerializer(review)
         except Review.DoesNotExist:
-            return Response({"detail": "Review not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        # Serialize the review
-        serializer = ReviewSerializer(review)
+            archived = ArchivedReview.objects.select_related('movie').filter(id=review_id, object_id=object_id).first()
+            if archived is None:
+                return Response({"detail": "Review not found."}, status=status.HTTP_404_NOT_FOUND)
+            serializer = ArchivedReviewSerializer(archived)
 
         return Response(serializer.data)
     
@@ -161,12 +227,19 @@ class ReviewSearchAPIView(APIView):
                 description="Filter reviews by movie title",
                 type=openapi.TYPE_STRING
             ),
+            openapi.Parameter(
+                'mode', openapi.IN_QUERY,
+                description="How movie_title is matched: 'contains' (default, case-insensitive substring) or 'fuzzy' (typo-tolerant)",
+                type=openapi.TYPE_STRING,
+                enum=['contains', 'fuzzy']
+            ),
             openapi.Parameter(
                 'rating', openapi.IN_QUERY,
                 description="Filter reviews by rating (1.0 - 5.0)",
                 type=openapi.TYPE_NUMBER,
                 format='float'
             ),
+            include_content_parameter,
         ],
         responses={200: "Paginated list of reviews"}
     )
@@ -176,6 +249,8 @@ class ReviewSearchAPIView(APIView):
 
         This method handles GET requests to filter and retrieve reviews based on specified query 
         parameters: movie title and/or rating. The results are paginated for easier consumption.
+        Only live reviews are searched: archived reviews are left out (see the movie reviews
+        listing; users find their own archived reviews in /api/reviews/me/).
 
         Query Parameters:
             movie_title (str, optional): The title of the movie to filter reviews. The search 
@@ -183,6 +258,11 @@ class ReviewSearchAPIView(APIView):
                                         specified substring.
             rating (float, optional): The rating to filter reviews. Must be a float value between 
                                     1.0 and 5.0.
+            mode (str, optional): How `movie_title` is matched. 'contains' (default) does a
+                                  case-insensitive substring match, 'fuzzy' uses the trigram
+                                  title index and tolerates typos.
+            include (str, optional): 'review_content' to return the full content of the reviews
+                                  instead of their excerpt.
 
         Returns:
             Response: A paginated JSON response containing the serialized list of reviews that 
@@ -190,65 +270,194 @@ class ReviewSearchAPIView(APIView):
         """
         movie_title = request.query_params.get('movie_title')
         rating = request.query_params.get('rating')
+        mode = request.query_params.get('mode', 'contains')
 
         # Build the query filters
         filters = Q()
 
         if movie_title:
-            # Find content types associated with Movie
-            content_type_movie = ContentType.objects.get(app_label='movie', model='movie')
-
-            # Get movie IDs that match the title
-            movies = Movie.objects.filter(title__icontains=movie_title)
-            movie_ids = movies.values_list('id', flat=True)
-
-            # Add to filters
-            filters &= Q(content_type=content_type_movie, object_id__in=movie_ids)
+            # Match the titles of the reviewed movies, joined through the movie foreign key
+            if mode == 'fuzzy':
+                filters &= Q(movie_id__in=[movie_id for movie_id, _ in fuzzy_search(movie_title)])
+            else:
+                filters &= Q(movie__title__icontains=movie_title)
 
         if rating:
             # Filter by rating
             filters &= Q(rating=rating)
 
         # Fetch reviews based on the filters
-        reviews = Review.objects.filter(filters)
+        row_serializer = review_row_serializer(request)
+        reviews = Review.objects.filter(filters).values(*row_serializer.columns)
 
         # Apply pagination
         paginator = self.pagination_class()
         paginated_reviews = paginator.paginate_queryset(reviews, request)
 
-        # Serialize the reviews
-        serializer = ReviewSerializer(paginated_reviews, many=True)
+        # Serialize the reviews (read-only fast path, excerpts instead of the content by default)
+        data = row_serializer().serialize(paginated_reviews)
 
         # Return paginated response
-        return paginator.get_paginated_response(serializer.data)
+        return paginator.get_paginated_response(data)
+
+def user_review_rows(user, columns):
+    """
+    The reviews of a user as `columns` rows, archived ones included, newest first.
+
+    Both tables are read by their user index and combined with UNION ALL, so that users
+    keep finding their reviews once they are archived, as /api/reviews/me/stats/ counts them.
+    """
+    live = Review.objects.filter(user=user).values(*columns)
+    archived = ArchivedReview.objects.filter(user=user).values(*columns)
+    return live.union(archived, all=True).order_by('-created_at', '-id')
 
 class ReviewMeAPIView(APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = GenericReviewPagination
 
+    @swagger_auto_schema(manual_parameters=[include_content_parameter])
     def get(self, request):
         """
         Retrieve all reviews submitted by the currently authenticated user.
 
         This method handles GET requests to fetch and return a paginated list of reviews that 
-        the authenticated user has submitted. If the user has no reviews, an empty list will be returned.
+        the authenticated user has submitted, newest first, archived reviews included (see
+        user_review_rows()). If the user has no reviews, an empty list will be returned.
 
         Returns:
             Response: A paginated JSON response containing the serialized list of reviews 
                     submitted by the authenticated user. Each review includes relevant details 
-                    such as title, content, rating, and timestamps.
+                    such as title, excerpt, rating, and timestamps.
         """
         user = request.user  # Get the currently authenticated user
 
-        # Fetch reviews created by the current user
-        reviews = Review.objects.filter(user=user)
+        # Fetch reviews created by the current user, live and archived
+        row_serializer = review_row_serializer(request)
+        reviews = user_review_rows(user, row_serializer.columns)
 
         # Apply pagination
         paginator = self.pagination_class()
         paginated_reviews = paginator.paginate_queryset(reviews, request)
 
-        # Serialize the reviews
-        serializer = ReviewSerializer(paginated_reviews, many=True)
+        # Serialize the reviews (read-only fast path, excerpts instead of the content by default)
+        data = row_serializer().serialize(paginated_reviews)
 
         # Return paginated response
-        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
+        return paginator.get_paginated_response(data)
+
+class ReviewMeStatsAPIView(APIView):
+    """
+    API view returning the review statistics of the currently authenticated user: total
+    reviews, average rating given, rating distribution and when they last reviewed.
+
+    The statistics are maintained as reviews are written (see review.user_stats), so this
+    is a single-row read however many reviews the user has.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(responses={200: UserReviewStatsSerializer})
+    def get(self, request):
+        """
+        Retrieve the review statistics of the authenticated user.
+
+        Returns:
+            Response: A JSON object with `reviews_count`, `average_rating`,
+                    `rating_distribution` and `last_reviewed_at` (zeros and null for a user
+                    without reviews).
+        """
+        return Response(UserReviewStatsSerializer(stats_of(request.user)).data)
+
+class RatingTimeSeriesAPIView(APIView):
+    """
+    API view returning the rating trend of a movie: review counts and average rating per
+    day or per week.
+
+    Data is read from the daily rating rollups, so a year of history is at most a few
+    hundred rows regardless of how many reviews the movie has.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'interval', openapi.IN_QUERY,
+                description="Aggregation period: 'day' (default) or 'week'",
+                type=openapi.TYPE_STRING, enum=['day', 'week']
+            ),
+            openapi.Parameter(
+                'start', openapi.IN_QUERY,
+                description="First day included (YYYY-MM-DD), defaults to one year before `end`",
+                type=openapi.TYPE_STRING, format='date'
+            ),
+            openapi.Parameter(
+                'end', openapi.IN_QUERY,
+                description="Last day included (YYYY-MM-DD), defaults to today",
+                type=openapi.TYPE_STRING, format='date'
+            ),
+        ],
+        responses={200: RatingPeriodSerializer(many=True)}
+    )
+    def get(self, request, object_id):
+        """
+        Retrieve the rating time series of the movie identified by `object_id`.
+
+        Args:
+            request: The HTTP request object.
+            object_id (int): The ID of the movie.
+
+        Returns:
+            Response: A chronological list of periods with their review count and average
+                    rating (periods without reviews are omitted), or a 400 for invalid parameters.
+        """
+        interval = request.query_params.get('interval', 'day')
+        if interval not in ('day', 'week'):
+            return Response({"detail": "interval must be 'day' or 'week'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            dates = {}
+            for name in ('start', 'end'):
+                value = request.query_params.get(name)
+                dates[name] = parse_date(value) if value else None
+                if value and dates[name] is None: # parse_date() only raises for impossible dates, e.g. 2024-13-45
+                    raise ValueError(value)
+        except ValueError:
+            return Response({"detail": "start and end must be valid YYYY-MM-DD dates."}, status=status.HTTP_400_BAD_REQUEST)
+        end = dates['end'] or timezone.localdate()
+        start = dates['start'] or end - timedelta(days=365)
+
+        series = rating_time_series(object_id, start, end, interval)
+        serializer = RatingPeriodSerializer(series, many=True)
+        return Response(serializer.data)
+
+async def review_stream(request, object_id):
+    """
+    Stream the reviews created for a movie as Server-Sent Events.
+
+    Replaces polling `/api/movies/<id>/reviews/`: the client opens one long-lived
+    connection (e.g. with the browser's EventSource) and receives a `review` event
+    carrying the serialized review each time one is created. Open streams cost no
+    database queries; events are pushed from the review write path through the
+    broker configured in REVIEW_EVENTS_BROKER.
+
+    Streaming requires the ASGI application (filmopine/asgi.py); under WSGI each open
+    stream would pin a whole worker, so the endpoint refuses to serve it there.
+
+    Args:
+        request: The HTTP request object.
+        object_id (int): The ID of the movie whose new reviews are streamed.
+
+    Returns:
+        StreamingHttpResponse: A `text/event-stream` response, a 501 under WSGI, or a 503
+                    when this process already serves REVIEW_STREAM_MAX_CONNECTIONS streams.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Review streams are only served by the ASGI application."}, status=501)
+
+    broker = get_broker()
+    if broker.subscriber_count() >= settings.REVIEW_STREAM_MAX_CONNECTIONS:
+        return JsonResponse({"detail": "Too many open streams, retry later."}, status=503, headers={'Retry-After': '5'})
+
+    subscription = broker.subscribe(movie_channel(object_id))
+    response = StreamingHttpResponse(sse_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Stop reverse proxies from buffering the stream
+    return response
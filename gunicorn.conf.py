@@ -0,0 +1,42 @@
+"""
+Gunicorn settings, read from the environment (see Procfile).
+
+Workers are recycled to bound the memory they can accumulate: after
+GUNICORN_MAX_REQUESTS requests (plus a random jitter, so they do not all restart at
+once), and, if GUNICORN_WORKER_MAX_RSS_MB is set, as soon as their resident memory goes
+over that limit. A recycled worker finishes its current request and is replaced by a
+fresh one. Use MEMORY_PROFILING_RATE (see core.memory) to find out what the memory grows
+with, rather than relying on recycling alone.
+
+New workers are warmed up (see core.warmup) before they accept connections. With
+GUNICORN_PRELOAD (the default), the app is loaded and its process-wide caches primed once
+in the master, before forking, so workers boot faster and share that memory.
+"""
+import decouple # Not `from decouple import config`: gunicorn would read `config` as its own setting
+
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=2000, cast=int) # 0: never recycle on request count
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+preload_app = decouple.config('GUNICORN_PRELOAD', default=True, cast=bool)
+
+WORKER_MAX_RSS = decouple.config('GUNICORN_WORKER_MAX_RSS_MB', default=0, cast=int) * 1024 * 1024 # 0: no memory limit
+
+def post_request(worker, req, environ, resp):
+    if not WORKER_MAX_RSS or not worker.alive:
+        return
+    from core.memory import current_rss # Imported once the Django app is loaded (--pythonpath filmopine)
+    rss = current_rss()
+    if rss > WORKER_MAX_RSS:
+        worker.log.info("Worker %s uses %.0f MB (limit %.0f MB): recycling it", worker.pid, rss / 1024 / 1024, WORKER_MAX_RSS / 1024 / 1024)
+        worker.alive = False
+
+def when_ready(server):
+    if server.cfg.preload_app: # The app is loaded in the master: prime what the workers can share
+        from core import warmup
+        timings = warmup.warm_up(before_fork=True)
+        server.log.info("Preloaded app warmed up in %.0f ms: %s", sum(timings.values()), timings)
+
+def post_worker_init(worker):
+    from core import warmup
+    timings = warmup.warm_up()
+    worker.log.info("Worker %s warmed up in %.0f ms: %s", worker.pid, sum(timings.values()), timings)